@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
 import os
-import tempfile
-from datetime import datetime
 from modules.cleaner import DataCleaner
 from modules.db_connector import DBHandler
 from modules.auth import AuthManager
+from modules.column_stats import dataset_fingerprint, get_dataset_stats
+from modules.memory import enable_copy_on_write, export_metrics
+from modules.storage import UPLOAD_TYPES, read_dataset, read_schema
+from modules.artifacts import ArtifactStore
+from modules.export import EXPORT_FORMATS, export_name, get_export_cache
+from modules.operation_log import get_checkpoint_cache
+from modules.persistence import get_persistence_queue
+from modules.preview import FramePreview
+from modules.profiler import get_column_profile, get_profile, histogram_frame, top_values_frame
+from modules.upload_cache import get_upload_cache
 
 # Page configuration
 st.set_page_config(
@@ -19,9 +27,27 @@ st.set_page_config(
     }
 )
 
+# Cleaners share the uploaded frame instead of copying it, which is only
+# safe with copy-on-write (the default from pandas 3)
+enable_copy_on_write()
+
 # Initialize services
 auth = AuthManager()
 db = DBHandler()
+# Parsed uploads shared across reruns and sessions; evicted frames spill to disk
+upload_cache = get_upload_cache(spill_dir=os.path.join("data", "upload_cache"))
+# Cleaned results are stored once per distinct content, within a disk quota
+artifact_store = ArtifactStore(db=db)
+# Result files and history rows are saved off the UI thread
+persistence = get_persistence_queue(db, store=artifact_store)
+# Downloads, serialized once per cleaned version and format
+export_cache = get_export_cache()
+# Operation metrics exported from the Clean page, one JSON record per line
+METRICS_FILE = os.path.join("data", "metrics.jsonl")
+PREVIEW_SAMPLE_ROWS = 1000
+# Convert Data Types choices -> pandas dtypes
+DTYPE_CHOICES = {"int": "Int64", "float": "float64", "str": "str",
+                 "datetime": "datetime64[ns]", "category": "category"}
 
 # Session state initialization
 if 'df' not in st.session_state:
@@ -30,6 +56,16 @@ if 'cleaned_df' not in st.session_state:
     st.session_state.cleaned_df = None
 if 'cleaning_history' not in st.session_state:
     st.session_state.cleaning_history = []
+if 'df_fingerprint' not in st.session_state:
+    st.session_state.df_fingerprint = None
+if 'cleaned_stats' not in st.session_state:
+    st.session_state.cleaned_stats = None
+if 'cleaned_version' not in st.session_state:
+    st.session_state.cleaned_version = None
+if 'upload_id' not in st.session_state:
+    st.session_state.upload_id = None
+if 'save_jobs' not in st.session_state:
+    st.session_state.save_jobs = []
 
 # Custom CSS
 st.markdown("""
@@ -42,6 +78,75 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def get_current_stats():
+    """Column statistics for the uploaded dataset, computed once per content"""
+    if st.session_state.df_fingerprint is None:
+        st.session_state.df_fingerprint = dataset_fingerprint(st.session_state.df)
+    return get_dataset_stats(st.session_state.df, st.session_state.df_fingerprint)
+
+def show_preview(df, version, key):
+    """Browse df a page at a time; only the visible rows are sent to the browser"""
+    preview = FramePreview(df, version)
+    mode = st.radio("View", ["Pages", "Sample overview"], horizontal=True, key=f"{key}_mode")
+    if mode == "Sample overview":
+        sample = preview.sample(PREVIEW_SAMPLE_ROWS)
+        st.caption(f"{len(sample):,} rows sampled evenly across all {len(df):,}")
+        st.dataframe(sample, use_container_width=True)
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", ["(none)"] + list(df.columns), key=f"{key}_sort")
+    with col2:
+        ascending = st.radio("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Ascending"
+    with col3:
+        filter_column = st.selectbox("Filter column", ["(none)"] + list(df.columns), key=f"{key}_filter_col")
+    with col4:
+        query = st.text_input("Filter", key=f"{key}_query", help="Text to search for, or e.g. '> 10' on numbers")
+    view = {
+        'sort_by': None if sort_by == "(none)" else sort_by,
+        'ascending': ascending,
+        'filter_column': None if filter_column == "(none)" else filter_column,
+        'query': query.strip() or None,
+    }
+
+    page_size = st.select_slider("Rows per page", [25, 50, 100, 250, 500], value=100, key=f"{key}_size")
+    try:
+        pages = preview.page_count(page_size, **view)
+    except ValueError as e:
+        st.warning(f"Filter ignored: {e}")
+        view['query'] = None
+        pages = preview.page_count(page_size, **view)
+    # A narrower filter or bigger pages can leave the stored page past the end
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    number = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key=page_key)
+    st.dataframe(preview.page(int(number) - 1, page_size, **view), use_container_width=True)
+    st.caption(f"{preview.row_count(**view):,} of {len(df):,} rows")
+
+def show_column_profile(profile):
+    """Render one column's profile from modules.profiler"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Missing", f"{profile['missing']:,} ({profile['missing_pct']:.1f}%)")
+    with col2:
+        st.metric("Distinct (approx.)", f"{profile['distinct']:,}")
+    with col3:
+        if 'mean' in profile:
+            st.metric("Mean", f"{profile['mean']:.4g}")
+    if 'quantiles' in profile:
+        st.write(pd.DataFrame({
+            'statistic': ['min'] + [f"{q:.0%}" for q in profile['quantiles']] + ['max'],
+            'value': [profile['min'], *profile['quantiles'].values(), profile['max']],
+        }).astype(str).set_index('statistic'))
+    if 'histogram' in profile:
+        st.markdown("**Distribution**")
+        st.bar_chart(histogram_frame(profile))
+    if profile['top_values']:
+        st.markdown("**Most frequent values**")
+        st.dataframe(top_values_frame(profile).astype({'value': str}), use_container_width=True)
+
 # Navigation pages
 def upload_page():
     """File upload and preview functionality"""
@@ -49,29 +154,36 @@ def upload_page():
     
     with st.expander("How to use", expanded=True):
         st.write("""
-        1. Upload your CSV or Excel file
+        1. Upload your CSV, Excel, Parquet or Feather file
         2. Preview your data
         3. Navigate to other sections to clean or analyze
         """)
     
     uploaded_file = st.file_uploader(
-        "Choose a file (CSV or Excel)", 
-        type=["csv", "xlsx"],
+        "Choose a file (CSV, Excel, Parquet or Feather)", 
+        type=UPLOAD_TYPES,
         accept_multiple_files=False
     )
     
     if uploaded_file is not None:
         try:
-            # Read file based on extension
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-            
-            # Store in session state
-            st.session_state.df = df
-            st.session_state.cleaned_df = None
-            st.session_state.cleaning_history = []
+            # Reruns keep the same uploaded file object; only a new upload is
+            # parsed (or fetched from the cache) and resets the session
+            upload_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+            if upload_id != st.session_state.upload_id or st.session_state.df is None:
+                df, upload_key = upload_cache.load(uploaded_file, name=uploaded_file.name)
+                
+                # Store in session state; the upload key identifies the parsed
+                # content, so it doubles as the statistics fingerprint
+                st.session_state.df = df
+                st.session_state.df_fingerprint = upload_key
+                st.session_state.cleaned_df = None
+                st.session_state.cleaned_version = None
+                st.session_state.cleaned_stats = None
+                st.session_state.cleaning_history = []
+                st.session_state.upload_id = upload_id
+            df = st.session_state.df
+            stats = get_current_stats()
             
             st.success("✅ File uploaded successfully!")
             
@@ -84,16 +196,11 @@ def upload_page():
             
             # Data preview
             with st.expander("Data Preview", expanded=True):
-                st.dataframe(df.head())
+                show_preview(df, st.session_state.df_fingerprint, key="upload_preview")
             
             # Basic stats
             with st.expander("Column Information"):
-                st.table(pd.DataFrame({
-                    'Column': df.columns,
-                    'Data Type': df.dtypes,
-                    'Missing Values': df.isna().sum(),
-                    'Unique Values': df.nunique()
-                }))
+                st.table(stats.summary())
                 
         except Exception as e:
             st.error(f"❌ Error reading file: {str(e)}")
@@ -106,8 +213,17 @@ def clean_page():
         st.warning("⚠️ Please upload a file first from the Upload Data page!")
         return
     
-    df = st.session_state.df.copy()
-    cleaner = DataCleaner(df)
+    df = st.session_state.df
+    # Record the selected operations and run them when the preview first
+    # needs the data, resuming from the last checkpointed step this dataset
+    # already went through. The cleaner shares the uploaded frame
+    # copy-on-write instead of copying it.
+    stats = get_current_stats()
+    profile = st.sidebar.checkbox("Record operation metrics", key="profile_operations")
+    cleaner = DataCleaner(df, lazy=True, copy=False, stats=stats.copy(),
+                          checkpoints=get_checkpoint_cache(),
+                          fingerprint=st.session_state.df_fingerprint,
+                          profile=profile, track_memory=profile)
     
     # Layout columns
     col1, col2 = st.columns([1, 2])
@@ -130,7 +246,7 @@ def clean_page():
         
         # Handle missing values
         with st.expander("Handle Missing Values"):
-            missing_cols = df.columns[df.isna().any()].tolist()
+            missing_cols = stats.columns_with_missing()
             
             if missing_cols:
                 for col in missing_cols:
@@ -164,21 +280,17 @@ def clean_page():
         # Remove duplicates
         with st.expander("Remove Duplicates"):
             if st.checkbox("Remove duplicate rows"):
-                initial_rows = len(cleaner.df)
                 cleaner.remove_duplicates()
-                removed = initial_rows - len(cleaner.df)
-                if removed > 0:
-                    st.session_state.cleaning_history.append(
-                        f"Removed {removed} duplicate rows"
-                    )
-                    st.success(f"Removed {removed} duplicates")
-                else:
-                    st.info("No duplicates found")
+                st.session_state.cleaning_history.append("Removed duplicate rows")
+                st.caption("The number removed is listed under Changes")
         
-        # Data type conversion
+        # Data type conversion; the schema comes from the uploaded frame so
+        # the recorded plan isn't run before every step has been chosen.
+        # Conversions are reported after the plan runs, as they can fail
+        conversions = []
         with st.expander("Convert Data Types"):
-            for col in cleaner.df.columns:
-                current_type = str(cleaner.df[col].dtype)
+            for col in [c for c in df.columns if c not in cols_to_drop]:
+                current_type = str(df[col].dtype)
                 new_type = st.selectbox(
                     f"{col} (current: {current_type})",
                     ["Keep as is", "int", "float", "str", "datetime", "category"],
@@ -186,53 +298,93 @@ def clean_page():
                 )
                 if new_type != "Keep as is":
                     if st.button(f"Convert {col}", key=f"convert_{col}"):
-                        cleaner.convert_dtype(col, new_type)
-                        st.session_state.cleaning_history.append(
-                            f"Converted {col} from {current_type} to {new_type}"
-                        )
+                        cleaner.change_data_types({col: DTYPE_CHOICES[new_type]})
+                        conversions.append((col, current_type, new_type))
+    
+        # Memory optimization
+        with st.expander("Optimize Memory"):
+            st.caption("Downcast numbers, store repeated text as categories and parse date strings")
+            if st.checkbox("Optimize memory usage", key="optimize_memory"):
+                cleaner.optimize_memory()
+                st.session_state.cleaning_history.append("Optimized memory usage")
     
     with col2:
         st.subheader("Data Preview")
         
-        # Show current state of data
-        if st.checkbox("Show full cleaned data", False):
-            st.dataframe(cleaner.df)
+        # Show current state of data; the operation hash names this version
+        if st.checkbox("Browse full cleaned data", False):
+            show_preview(cleaner.df, cleaner.operations.head, key="clean_preview")
         else:
             st.dataframe(cleaner.df.head())
         
         st.write(f"Shape: {cleaner.df.shape}")
+        changes = cleaner.get_changes_log()
+        for col, current_type, new_type in conversions:
+            failed = f"Failed to convert {col} to {DTYPE_CHOICES[new_type]}:"
+            error = next((change for change in changes if change.startswith(failed)), None)
+            if error is not None:
+                st.error(error)
+            else:
+                st.session_state.cleaning_history.append(
+                    f"Converted {col} from {current_type} to {new_type}"
+                )
+                st.success(f"Converted {col} to {new_type}")
+        with st.expander("Changes"):
+            for change in cleaner.get_changes_log():
+                st.write(f"- {change}")
+        
+        # Timings of the operations that ran on this rerun; steps resumed
+        # from a checkpoint do not run and are not listed
+        if profile:
+            with st.expander("Performance", expanded=True):
+                metrics = cleaner.get_metrics()
+                if metrics:
+                    st.dataframe(pd.DataFrame(metrics).drop(columns=['timestamp']))
+                    if st.button("Export metrics"):
+                        export_metrics(metrics, METRICS_FILE)
+                        st.success(f"Appended {len(metrics)} records to {METRICS_FILE}")
+                else:
+                    st.info("No operations ran on this rerun")
         
         # Apply all cleaning
         if st.button("💾 Apply All Cleaning", use_container_width=True):
             st.session_state.cleaned_df = cleaner.df
+            st.session_state.cleaned_version = cleaner.operations.head
+            st.session_state.cleaned_stats = cleaner.stats
             
             # Save to database if logged in
             if auth.is_authenticated():
                 try:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     user_id = auth.get_user_id()
                     
-                    # Save files temporarily
-                    os.makedirs("data", exist_ok=True)
-                    cleaned_path = f"data/cleaned_{timestamp}.csv"
-                    st.session_state.cleaned_df.to_csv(cleaned_path, index=False)
-                    
-                    # Save to database
-                    db.save_cleaning_history(
+                    # Written in the background to the content-addressed
+                    # artifact store
+                    job_id = persistence.submit(
+                        st.session_state.cleaned_df,
                         user_id=user_id,
                         original_shape=str(st.session_state.df.shape),
-                        cleaned_shape=str(st.session_state.cleaned_df.shape),
                         cleaning_notes=", ".join(st.session_state.cleaning_history),
-                        cleaned_file_path=cleaned_path
+                        operations=cleaner.get_operations()
                     )
-                    
-                    st.success("Cleaning history saved!")
+                    st.session_state.save_jobs.append(job_id)
                 except Exception as e:
                     st.error(f"Could not save history: {str(e)}")
             
             st.success("All cleaning operations applied!")
             st.balloons()
         
+        # Background saves started from this session
+        for job_id in list(st.session_state.save_jobs):
+            status = persistence.status(job_id)
+            if status['state'] == 'saved':
+                st.success("Cleaning history saved!")
+                st.session_state.save_jobs.remove(job_id)
+            elif status['state'] == 'failed':
+                st.error(f"Could not save history: {status['error']}")
+                st.session_state.save_jobs.remove(job_id)
+            else:
+                st.info("Saving cleaning history in the background...")
+        
         # Download cleaned data
         if st.session_state.cleaned_df is not None:
             st.subheader("Download Cleaned Data")
@@ -240,36 +392,33 @@ def clean_page():
             # Format selection
             export_format = st.radio(
                 "Export format",
-                ["CSV", "Excel"],
+                ["CSV", "Excel", "Parquet", "Arrow (Feather)"],
                 horizontal=True
             )
+            fmt = {"CSV": "csv", "Excel": "excel", "Parquet": "parquet", "Arrow (Feather)": "arrow"}[export_format]
+            compression = None
+            if fmt == "csv":
+                choice = st.radio("Compression", ["None", "gzip", "zstd"], horizontal=True)
+                compression = None if choice == "None" else choice
             
-            if export_format == "CSV":
-                csv = st.session_state.cleaned_df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="📥 Download CSV",
-                    data=csv,
-                    file_name="cleaned_data.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-            else:
-                excel_file = tempfile.NamedTemporaryFile(delete=False)
-                st.session_state.cleaned_df.to_excel(
-                    excel_file.name, 
-                    index=False,
-                    engine='openpyxl'
-                )
-                with open(excel_file.name, "rb") as f:
+            # Serialized once per cleaned version and format, straight to disk
+            try:
+                with st.spinner("Preparing download..."):
+                    path = export_cache.export(
+                        st.session_state.cleaned_df, fmt,
+                        version=st.session_state.cleaned_version,
+                        compression=compression
+                    )
+                with open(path, "rb") as f:
                     st.download_button(
-                        label="📥 Download Excel",
+                        label=f"📥 Download {export_format}",
                         data=f,
-                        file_name="cleaned_data.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        file_name=export_name("cleaned_data", fmt, compression),
+                        mime=EXPORT_FORMATS[fmt][1],
                         use_container_width=True
                     )
-                excel_file.close()
-                os.unlink(excel_file.name)
+            except Exception as e:
+                st.error(f"Could not export: {str(e)}")
 
 def profile_page():
     """Data profiling and analysis"""
@@ -281,6 +430,11 @@ def profile_page():
         st.warning("⚠️ Please upload a file first from the Upload Data page!")
         return
     
+    if st.session_state.cleaned_df is not None:
+        stats = st.session_state.cleaned_stats or get_dataset_stats(df, st.session_state.cleaned_version)
+    else:
+        stats = get_current_stats()
+    
     # Quick stats
     st.subheader("Quick Statistics")
     
@@ -290,38 +444,35 @@ def profile_page():
     with col2:
         st.metric("Total Columns", df.shape[1])
     with col3:
-        st.metric("Missing Values", df.isna().sum().sum())
+        st.metric("Missing Values", stats.total_missing)
+    
+    # Identifies this version of the data for the preview and report caches
+    version = st.session_state.cleaned_version if st.session_state.cleaned_df is not None \
+        else st.session_state.df_fingerprint
+    with st.expander("Browse data"):
+        show_preview(df, version, key="profile_preview")
     
     # Column selector for detailed stats
     selected_col = st.selectbox(
         "Select a column for detailed statistics",
         df.columns
     )
+    show_column_profile(get_column_profile(df, selected_col, fingerprint=version))
     
-    if pd.api.types.is_numeric_dtype(df[selected_col]):
-        st.write(df[selected_col].describe())
-        
-        # Histogram
-        st.subheader("Distribution")
-        st.bar_chart(df[selected_col].value_counts())
-    else:
-        st.write("Value counts:")
-        st.write(df[selected_col].value_counts())
-    
-    # Full profile report
+    # Full profile report, built once per data version
     st.subheader("Comprehensive Profile Report")
     if st.button("Generate Full Report", use_container_width=True):
-        with st.spinner("Generating report... This may take a moment for large datasets"):
-            profile = ProfileReport(
-                df, 
-                title="Data Profiling Report",
-                explorative=True
-            )
-            st.components.v1.html(
-                profile.to_html(), 
-                height=1000, 
-                scrolling=True
-            )
+        with st.spinner("Generating report..."):
+            report = get_profile(df, fingerprint=version)
+        st.caption(f"Profiled {report.n_rows:,} rows in {report.seconds:.1f}s; "
+                   f"correlations on {report.sample_rows:,} sampled rows")
+        st.dataframe(report.summary(), use_container_width=True)
+        if not report.correlations.empty:
+            st.markdown("**Correlations**")
+            st.dataframe(report.correlations.round(2), use_container_width=True)
+        for column, profile in report.columns.items():
+            with st.expander(f"{column} ({profile['dtype']})"):
+                show_column_profile(profile)
 
 def history_page():
     """User's cleaning history"""
@@ -331,16 +482,43 @@ def history_page():
         st.warning("🔒 Please login to view your history")
         return
     
+    # Filters; changing them restarts paging from the newest session
+    with st.expander("Filter sessions"):
+        date_range = st.date_input("Date range", value=(), key="history_dates")
+        min_rows = st.number_input("Minimum original rows", min_value=0, value=0, step=1000, key="history_min_rows")
+    filters = {
+        'date_from': date_range[0] if len(date_range) > 0 else None,
+        'date_to': date_range[1] if len(date_range) > 1 else None,
+        'min_rows': min_rows or None,
+    }
+    if st.session_state.get('history_filters') != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_cursors = [None]
+    
+    page_size = 20
+    page_index = len(st.session_state.history_cursors) - 1
+    
     try:
-        history = db.get_user_history(auth.get_user_id())
+        # Only the current page is fetched, keyed by the cursor that starts it
+        page = db.get_history_page(
+            auth.get_user_id(),
+            limit=page_size,
+            cursor=st.session_state.history_cursors[-1],
+            **filters
+        )
+        history = page['records']
         
         if not history:
-            st.info("You don't have any cleaning history yet")
+            if any(value is not None for value in filters.values()):
+                st.info("No cleaning sessions match these filters")
+            else:
+                st.info("You don't have any cleaning history yet")
             return
         
         st.subheader("Your Recent Cleaning Sessions")
         
-        for i, record in enumerate(history):
+        for offset, record in enumerate(history):
+            i = page_index * page_size + offset
             with st.expander(f"Session {i+1} - {record['timestamp'].strftime('%Y-%m-%d %H:%M')}"):
                 col1, col2 = st.columns(2)
                 with col1:
@@ -352,14 +530,61 @@ def history_page():
                 st.write("**Operations Performed:**")
                 st.write(record['cleaning_notes'])
                 
+                operations = db.get_operations(record['id'])
+                if operations:
+                    st.dataframe(pd.DataFrame(operations), use_container_width=True)
+                    if st.session_state.df is not None and st.button(
+                        "Replay these steps on the current dataset", key=f"replay_{i}"
+                    ):
+                        try:
+                            get_current_stats()
+                            replayed = DataCleaner.from_operations(
+                                st.session_state.df, operations,
+                                fingerprint=st.session_state.df_fingerprint
+                            )
+                            st.session_state.cleaned_df = replayed.df
+                            st.session_state.cleaned_version = replayed.operations.head
+                            st.session_state.cleaned_stats = None
+                            st.success("Steps replayed! Download the result from the Clean Data page")
+                        except Exception as e:
+                            st.error(f"Error replaying: {str(e)}")
+                
+                # Columnar results can be reloaded partially
+                try:
+                    available_cols = read_schema(record['file_path'])
+                except Exception:
+                    available_cols = []
+                load_cols = st.multiselect(
+                    "Columns to load (all if empty)",
+                    available_cols,
+                    key=f"reload_cols_{i}"
+                )
+                
                 if st.button(f"Reload this dataset", key=f"reload_{i}"):
                     try:
-                        st.session_state.df = pd.read_csv(record['file_path'])
+                        st.session_state.df = read_dataset(record['file_path'], columns=load_cols or None)
+                        artifact_store.touch(record['file_path'])
+                        st.session_state.df_fingerprint = None
                         st.session_state.cleaned_df = None
+                        st.session_state.cleaned_version = None
+                        st.session_state.cleaned_stats = None
                         st.session_state.cleaning_history = []
                         st.success("Dataset reloaded! Go to Clean Data page to continue working")
                     except Exception as e:
                         st.error(f"Error reloading: {str(e)}")
+        
+        # Page navigation
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if page_index > 0 and st.button("← Newer"):
+                st.session_state.history_cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Page {page_index + 1}")
+        with col3:
+            if page['next_cursor'] is not None and st.button("Older →"):
+                st.session_state.history_cursors.append(page['next_cursor'])
+                st.rerun()
                 
     except Exception as e:
         st.error(f"Error loading history: {str(e)}")
@@ -388,7 +613,7 @@ def auth_page():
                 success, message = auth.login_user(email, password)
                 if success:
                     st.success(message)
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error(message)
     
@@ -405,7 +630,7 @@ def auth_page():
                     success, message = auth.register_user(email, password, confirm_password)
                     if success:
                         st.success(message)
-                        st.experimental_rerun()
+                        st.rerun()
                     else:
                         st.error(message)
 
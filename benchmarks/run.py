@@ -0,0 +1,166 @@
+"""Benchmarks for DataCleaner and MLCleaner operations
+
+    python -m benchmarks.run --sizes 10000 100000 1000000 --save benchmarks/baselines/local.json
+    python -m benchmarks.run --compare benchmarks/baselines/local.json --threshold 0.25
+
+Each operation runs on a fresh cleaner over the same synthetic frame. Time
+is the best of --repeat untraced runs; peak memory comes from one extra
+run under tracemalloc (allocations in worker processes are not seen).
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import DTYPE_MIXES, make_frame
+from modules.cleaner import DataCleaner
+from modules.memory import track_allocations
+from modules.ml_cleaner import MLCleaner
+from modules.outliers import clear_cache as clear_outlier_cache
+
+METRICS = ('seconds', 'peak_bytes')
+
+
+def _fill(strategy):
+    def run(df):
+        columns = [col for col in df.columns if df[col].hasnans]
+        DataCleaner(df, copy=False).fill_missing(columns, strategy)
+    return run
+
+
+def _detect_outliers(df):
+    # Time a fresh fit rather than a cache hit from the previous repeat
+    clear_outlier_cache()
+    MLCleaner(df, copy=False).detect_outliers()
+
+
+def _convert(df):
+    types = {col: 'float32' if pd.api.types.is_numeric_dtype(df[col]) else 'category' for col in df.columns}
+    DataCleaner(df, copy=False).change_data_types(types)
+
+
+# name -> callable(df); every callable builds its own cleaner
+OPERATIONS = {
+    'remove_duplicates': lambda df: DataCleaner(df, copy=False).remove_duplicates(),
+    'remove_duplicates_partitioned': lambda df: DataCleaner(df, copy=False).remove_duplicates(partitioned=True),
+    'fill_mean': _fill('mean'),
+    'fill_median': _fill('median'),
+    'fill_mode': _fill('mode'),
+    'fill_auto': _fill('auto'),
+    'change_data_types': _convert,
+    'optimize_memory': lambda df: DataCleaner(df, copy=False).optimize_memory(),
+    'lazy_plan': lambda df: DataCleaner(df, lazy=True, copy=False)
+        .remove_duplicates().fill_missing(list(df.columns)).optimize_memory().df,
+    'detect_outliers': _detect_outliers,
+    'smart_impute': lambda df: MLCleaner(df, copy=False).smart_impute(),
+    'suggest_cleaning': lambda df: MLCleaner(df, copy=False).suggest_cleaning(time_budget=60),
+}
+
+
+def measure(operation, df, repeat=3, memory=True):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation(df)
+        timings.append(time.perf_counter() - started)
+    result = {'seconds': min(timings)}
+    if memory:
+        with track_allocations() as stats:
+            operation(df)
+        result['peak_bytes'] = stats['peak_bytes']
+    return result
+
+
+def run_suite(sizes, operations, repeat=3, memory=True, **frame_kwargs):
+    results = {}
+    for rows in sizes:
+        df = make_frame(rows, **frame_kwargs)
+        for name in operations:
+            key = f"{name}@{rows}"
+            results[key] = measure(OPERATIONS[name], df, repeat=repeat, memory=memory)
+            peak = results[key].get('peak_bytes')
+            print(f"{key:45s} {results[key]['seconds']:9.4f}s"
+                  + (f" {peak / 1024 ** 2:10.1f} MB" if peak is not None else ""), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold=0.2, min_seconds=0.01):
+    """Metrics that got worse than baseline by more than threshold (a fraction)
+
+    Timings where both runs are under min_seconds are ignored as noise.
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            if metric not in current or not previous.get(metric):
+                continue
+            if metric == 'seconds' and max(current[metric], previous[metric]) < min_seconds:
+                continue
+            change = current[metric] / previous[metric] - 1
+            if change > threshold:
+                regressions.append((key, metric, previous[metric], current[metric], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--ops', nargs='+', choices=sorted(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument('--null-rate', type=float, default=0.05)
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--cardinality', type=int, default=100)
+    parser.add_argument('--mix', choices=sorted(DTYPE_MIXES), default='mixed')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced peak memory run")
+    parser.add_argument('--save', help="write results as a JSON baseline")
+    parser.add_argument('--compare', help="baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown/growth, e.g. 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    config = {
+        'null_rate': args.null_rate,
+        'duplicate_rate': args.duplicate_rate,
+        'cardinality': args.cardinality,
+        'mix': args.mix,
+    }
+    results = run_suite(args.sizes, args.ops, repeat=args.repeat, memory=not args.no_memory, **config)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'machine': {
+                    'python': platform.python_version(),
+                    'pandas': pd.__version__,
+                    'numpy': np.__version__,
+                    'platform': platform.platform(),
+                    'processor': platform.processor(),
+                },
+                'config': config,
+                'results': results,
+            }, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print(f"Warning: baseline was recorded with {baseline.get('config')}")
+        regressions = compare(results, baseline['results'], threshold=args.threshold)
+        for key, metric, before, after, change in regressions:
+            print(f"REGRESSION {key} {metric}: {before:.4g} -> {after:.4g} (+{change:.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
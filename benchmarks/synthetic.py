@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+# Column kinds per dtype mix
+DTYPE_MIXES = {
+    'numeric': ('float', 'float', 'int', 'int'),
+    'text': ('category_text', 'category_text', 'free_text', 'date_text'),
+    'mixed': ('float', 'int', 'category_text', 'free_text', 'date_text'),
+}
+
+
+def _column(kind, rows, cardinality, rng):
+    if kind == 'float':
+        return rng.normal(100, 15, rows)
+    if kind == 'int':
+        return rng.integers(0, max(cardinality, 2), rows)
+    if kind == 'category_text':
+        labels = np.array([f"level_{i}" for i in range(cardinality)], dtype=object)
+        return labels[rng.integers(0, cardinality, rows)]
+    if kind == 'free_text':
+        return np.char.add('id_', rng.integers(0, rows * 10, rows).astype(str)).astype(object)
+    if kind == 'date_text':
+        days = rng.integers(0, 3650, rows).astype('timedelta64[D]')
+        return np.datetime_as_string(np.datetime64('2015-01-01') + days).astype(object)
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def make_frame(rows, null_rate=0.05, duplicate_rate=0.02, cardinality=100, mix='mixed', seed=0):
+    """Synthetic frame with controlled nulls, duplicates, cardinality and dtypes
+
+    null_rate is the fraction of missing cells in every column, and
+    duplicate_rate the fraction of rows that repeat an earlier row.
+    cardinality is the number of distinct values in categorical and
+    integer columns.
+    """
+    rng = np.random.default_rng(seed)
+    unique_rows = rows - int(rows * duplicate_rate)
+    data = {}
+    for i, kind in enumerate(DTYPE_MIXES[mix]):
+        values = _column(kind, unique_rows, cardinality, rng)
+        if null_rate:
+            values = pd.Series(values)
+            values[rng.random(unique_rows) < null_rate] = np.nan
+        data[f"{kind}_{i}"] = values
+    df = pd.DataFrame(data)
+    if rows > unique_rows:
+        repeats = df.iloc[rng.integers(0, unique_rows, rows - unique_rows)]
+        df = pd.concat([df, repeats], ignore_index=True)
+        df = df.iloc[rng.permutation(rows)].reset_index(drop=True)
+    return df
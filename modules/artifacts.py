@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+import threading
+from modules.column_stats import dataset_fingerprint
+from modules.storage import result_path, write_dataset
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 60 * 60
+# How often maybe_enforce_quota() sweeps for expired files with max_age_days
+AGE_SWEEP_SECONDS = 60 * 60
+
+
+class ArtifactStore:
+    """Content-addressed store for cleaned datasets
+
+    Each dataset is saved once under the hash of its content, compressed
+    (zstd Parquet when pyarrow is available), so identical results from
+    any user share one file. A file's last use is its modification time,
+    refreshed whenever it is saved again or read.
+
+    enforce_quota() evicts files no file_history row references: those
+    unused for max_age_days (when set), then least recently used ones
+    until the store fits in quota_bytes. Referenced files are never
+    evicted; if they alone exceed the quota, that is logged and they stay.
+    maybe_enforce_quota() runs it only when new files could have pushed
+    the store over quota or an age sweep is due, so callers can invoke it
+    after every write without scanning the history table each time.
+    """
+
+    def __init__(self, root=os.path.join("data", "artifacts"), db=None,
+                 quota_bytes=20 << 30, max_age_days=None):
+        self.root = root
+        self.db = db
+        self.quota_bytes = quota_bytes
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        # Bytes stored as of the last sweep plus files added since
+        self._usage = None
+        self._added = 0
+        self._last_sweep = None
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest):
+        # Two-character fan-out keeps directories small
+        return result_path(os.path.join(self.root, digest[:2]), digest)
+
+    def put(self, df):
+        """Store a dataset and return its path; existing content is reused"""
+        path = self.path_for(dataset_fingerprint(df))
+        with self._lock:
+            if os.path.exists(path):
+                self.touch(path)
+                return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stem, ext = os.path.splitext(path)
+        partial = f"{stem}.{threading.get_ident()}.partial{ext}"
+        try:
+            write_dataset(df, partial)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._added += size
+            if self._usage is not None:
+                self._usage += size
+        return path
+
+    @staticmethod
+    def touch(path):
+        """Mark a stored file as just used"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def artifacts(self):
+        """(path, size, last use) of every stored file"""
+        found = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if '.partial' in name:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, info.st_size, info.st_mtime))
+        return found
+
+    def usage(self):
+        """Total bytes stored"""
+        return sum(size for _, size, _ in self.artifacts())
+
+    def reference_counts(self):
+        """Number of history records pointing at each stored path"""
+        if self.db is None:
+            return {}
+        return {os.path.normpath(path): count
+                for path, count in self.db.get_file_reference_counts().items()}
+
+    def sweep_due(self):
+        """Whether enforce_quota() could evict anything since it last ran"""
+        with self._lock:
+            if self._last_sweep is None:
+                return True
+            if self.max_age_days is not None and time.time() - self._last_sweep > AGE_SWEEP_SECONDS:
+                return True
+            return self._added > 0 and self._usage > self.quota_bytes
+
+    def maybe_enforce_quota(self):
+        """enforce_quota() when sweep_due(); returns bytes freed"""
+        return self.enforce_quota() if self.sweep_due() else 0
+
+    def enforce_quota(self):
+        """Evict files as described in the class docstring; returns bytes freed"""
+        with self._lock:
+            refs = self.reference_counts()
+            now = time.time()
+            entries = self.artifacts()
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+
+            def evict(path, size):
+                nonlocal total, freed
+                try:
+                    os.remove(path)
+                except OSError:
+                    return
+                total -= size
+                freed += size
+
+            unreferenced = [entry for entry in entries if not refs.get(os.path.normpath(entry[0]))]
+            max_age = self.max_age_days * DAY_SECONDS if self.max_age_days is not None else None
+            for path, size, used in sorted(unreferenced, key=lambda entry: entry[2]):
+                if total > self.quota_bytes or (max_age is not None and now - used > max_age):
+                    evict(path, size)
+
+            if total > self.quota_bytes:
+                logger.warning(
+                    f"Artifact store is {(total - self.quota_bytes) / 1024**2:.1f} MB over quota "
+                    f"with only referenced files left; keeping them"
+                )
+
+            if freed:
+                logger.info(f"Artifact store freed {freed / 1024**2:.1f} MB")
+            self._usage, self._added, self._last_sweep = total, 0, now
+            return freed
@@ -1,34 +1,129 @@
 import streamlit as st
+import os
+import hmac
+import time
 import hashlib
 import secrets
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, Tuple
 from modules.db_connector import DBHandler
 
+PBKDF2_ITERATIONS = 100000
+# pbkdf2_hmac releases the GIL, so a few threads hash in parallel while the
+# pool size caps how many cores logins can take
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+MAX_PENDING_HASHES = HASH_WORKERS * 8
+HASH_WAIT_SECONDS = 10
+SESSION_TTL_SECONDS = 12 * 60 * 60
+
+# Stand-in stored hash, checked for unknown emails so they take as long as
+# a wrong password
+_DUMMY_PASSWORD_HASH = f"{secrets.token_hex(16)}${'0' * 64}"
+
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="autoclean-auth")
+_hash_slots = threading.BoundedSemaphore(MAX_PENDING_HASHES)
+
+
+def _pbkdf2(password: str, salt: str) -> str:
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        PBKDF2_ITERATIONS
+    ).hex()
+
+
+def _run_hash(password: str, salt: str) -> str:
+    """Hash on the shared worker pool; raises RuntimeError when saturated"""
+    if not _hash_slots.acquire(timeout=HASH_WAIT_SECONDS):
+        raise RuntimeError("Server busy, please try again in a moment")
+    try:
+        return _hash_pool.submit(_pbkdf2, password, salt).result()
+    finally:
+        _hash_slots.release()
+
+
+class RateLimiter:
+    """At most max_attempts per key within a sliding window of seconds
+
+    Keys without attempts in the last window are pruned once per window,
+    so memory stays proportional to recent activity.
+    """
+    
+    def __init__(self, max_attempts: int = 5, window_seconds: float = 60):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._attempts = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._next_prune = time.monotonic() + window_seconds
+    
+    def _prune(self, now: float):
+        stale = [key for key, attempts in self._attempts.items()
+                 if not attempts or now - attempts[-1] > self.window_seconds]
+        for key in stale:
+            del self._attempts[key]
+        self._next_prune = now + self.window_seconds
+    
+    def retry_after(self, key: str) -> float:
+        """Record an attempt; return 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+            attempts = self._attempts[key]
+            while attempts and now - attempts[0] > self.window_seconds:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                return self.window_seconds - (now - attempts[0])
+            attempts.append(now)
+            return 0
+    
+    def reset(self, key: str):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+# Shared by every session in the process
+login_limiter = RateLimiter()
+
+
 class AuthManager:
     def __init__(self):
         self.db = DBHandler()
         if 'user' not in st.session_state:
             st.session_state.user = None
+        if 'session_id' not in st.session_state:
+            st.session_state.session_id = None
+        if st.session_state.user is not None:
+            self._check_session()
+    
+    def _check_session(self):
+        """Log out if the server-side session expired or was revoked
+
+        The session id lives only in st.session_state, on the server: it
+        is never put in the URL, where it would leak through history,
+        Referer headers, logs and shared links. A page reload therefore
+        starts logged out.
+        """
+        session_id = st.session_state.session_id
+        if session_id is None or self.db.get_session_user(session_id) is None:
+            st.session_state.user = None
+            st.session_state.session_id = None
     
     def hash_password(self, password: str, salt: Optional[str] = None) -> str:
         """Securely hash password with salt"""
         if salt is None:
             salt = secrets.token_hex(16)
-        hashed = hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt.encode('utf-8'),
-            100000
-        )
-        return f"{salt}${hashed.hex()}"
+        return f"{salt}${_run_hash(password, salt)}"
     
     def verify_password(self, stored_password: str, provided_password: str) -> bool:
-        """Verify password against stored hash"""
+        """Verify password against stored hash in constant time"""
         try:
             salt, hashed = stored_password.split('$')
-            new_hash = self.hash_password(provided_password, salt)
-            return new_hash == stored_password
-        except:
+            return hmac.compare_digest(_run_hash(provided_password, salt), hashed)
+        except ValueError:
             return False
     
     def get_current_user(self) -> Optional[Dict[str, Any]]:
@@ -49,15 +144,32 @@ class AuthManager:
         if not email or not password:
             return False, "Email and password are required"
         
+        wait = login_limiter.retry_after(email.lower())
+        if wait:
+            return False, f"Too many login attempts, try again in {int(wait) + 1} seconds"
+        
         user = self.db.get_user_by_email(email)
-        if user and self.verify_password(user['password_hash'], password):
-            st.session_state.user = {
+        try:
+            # Unknown emails are hashed too, so response times don't reveal them
+            stored = user['password_hash'] if user is not None else _DUMMY_PASSWORD_HASH
+            verified = self.verify_password(stored, password) and user is not None
+        except RuntimeError as e:
+            return False, str(e)
+        if verified:
+            login_limiter.reset(email.lower())
+            self._start_session({
                 'user_id': user['user_id'],
                 'email': user['email']
-            }
+            })
             return True, "Login successful"
         return False, "Invalid email or password"
     
+    def _start_session(self, user: Dict[str, Any]):
+        session_id = secrets.token_urlsafe(24)
+        self.db.create_session(session_id, user['user_id'], int(time.time()) + SESSION_TTL_SECONDS)
+        st.session_state.user = user
+        st.session_state.session_id = session_id
+    
     def register_user(self, email: str, password: str, confirm_password: str) -> Tuple[bool, str]:
         """Register new user"""
         if not email or not password or not confirm_password:
@@ -66,21 +178,28 @@ class AuthManager:
         if password != confirm_password:
             return False, "Passwords don't match"
         
+        wait = login_limiter.retry_after(email.lower())
+        if wait:
+            return False, f"Too many attempts, try again in {int(wait) + 1} seconds"
+        
         if self.db.get_user_by_email(email):
             return False, "Email already registered"
         
         try:
             password_hash = self.hash_password(password)
             user_id = self.db.create_user(email, password_hash)
-            st.session_state.user = {
+            self._start_session({
                 'user_id': user_id,
                 'email': email
-            }
+            })
             return True, "Registration successful"
         except Exception as e:
             return False, f"Registration failed: {str(e)}"
     
     def logout_user(self):
-        """Logout current user"""
-        if 'user' in st.session_state:
-            st.session_state.user = None
\ No newline at end of file
+        """Logout current user and revoke their session"""
+        session_id = st.session_state.get('session_id')
+        if session_id:
+            self.db.revoke_session(session_id)
+        st.session_state.user = None
+        st.session_state.session_id = None
\ No newline at end of file
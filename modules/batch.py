@@ -0,0 +1,354 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import _thread
+import argparse
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.cleaner import DataCleaner
+from modules.ml_cleaner import MLCleaner
+from modules.parallel import ColumnExecutor
+from modules.storage import (CSV_EXTENSIONS, EXCEL_EXTENSIONS, FEATHER_EXTENSIONS,
+                             PARQUET_EXTENSIONS, read_dataset, write_dataset)
+from modules.streaming import StreamingCleaner
+
+logger = logging.getLogger(__name__)
+
+DATA_OPERATIONS = ('remove_duplicates', 'drop_columns', 'handle_missing_values', 'fill_missing',
+                   'rename_columns', 'change_data_types', 'optimize_memory')
+ML_OPERATIONS = ('remove_outliers', 'smart_impute')
+# Steps StreamingCleaner can run chunk by chunk
+STREAMING_OPERATIONS = ('remove_duplicates', 'drop_columns', 'handle_missing_values', 'fill_missing',
+                        'rename_columns', 'change_data_types')
+INPUT_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS + PARQUET_EXTENSIONS + FEATHER_EXTENSIONS
+MANIFEST_NAME = 'manifest.json'
+# How often a worker checks its resident memory against the limit
+MEMORY_POLL_SECONDS = 0.25
+
+
+def load_recipe(path):
+    """Read and validate a JSON recipe
+
+    A recipe is {"steps": [{"op": <name>, <keyword arguments>...}, ...]}
+    with DataCleaner operations (DATA_OPERATIONS) and MLCleaner operations
+    (ML_OPERATIONS) in any order.
+    """
+    with open(path) as f:
+        recipe = json.load(f)
+    steps = recipe.get('steps')
+    if not isinstance(steps, list):
+        raise ValueError("Recipe needs a 'steps' list")
+    for step in steps:
+        if step.get('op') not in DATA_OPERATIONS + ML_OPERATIONS:
+            raise ValueError(f"Unknown recipe operation: {step.get('op')}")
+    return recipe
+
+
+def recipe_hash(recipe):
+    return hashlib.blake2b(json.dumps(recipe, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def apply_recipe(df, steps):
+    """Run recipe steps on df; returns (cleaned frame, changes log)
+
+    Consecutive DataCleaner steps run as one lazy, optimized plan.
+    """
+    changes = []
+    cleaner = None
+    for step in steps:
+        params = {key: value for key, value in step.items() if key != 'op'}
+        if step['op'] in DATA_OPERATIONS:
+            if cleaner is None:
+                # Files already run one per process; columns stay in-process
+                cleaner = DataCleaner(df, lazy=True, copy=False, executor=ColumnExecutor(n_jobs=1))
+            getattr(cleaner, step['op'])(**params)
+            continue
+        if cleaner is not None:
+            df = cleaner.df
+            changes.extend(cleaner.get_changes_log())
+            cleaner = None
+        ml_cleaner = MLCleaner(df, copy=False)
+        # Files already run one per process; no nested pools
+        params['n_jobs'] = 1
+        getattr(ml_cleaner, step['op'])(**params)
+        df = ml_cleaner.get_cleaned_data()
+        changes.extend(ml_cleaner.get_changes_log())
+    if cleaner is not None:
+        df = cleaner.df
+        changes.extend(cleaner.get_changes_log())
+    return df, changes
+
+
+def stream_recipe(input_path, output, steps, spill_dir=None):
+    """Run recipe steps over a CSV chunk by chunk, writing CSV to output
+
+    Returns (rows in, rows out, changes log). Duplicates are always found
+    through spilled hash partitions, so a step's 'partitioned' flag is ignored.
+    """
+    cleaner = StreamingCleaner(input_path, spill_dir=spill_dir)
+    for step in steps:
+        params = {key: value for key, value in step.items() if key not in ('op', 'partitioned')}
+        getattr(cleaner, step['op'])(**params)
+    result = cleaner.run(output)
+    return result['rows_in'], result['rows_out'], cleaner.get_changes_log()
+
+
+def _inside(path, directory):
+    return os.path.commonpath([path, directory]) == directory
+
+
+def collect_inputs(sources, exclude=()):
+    """Dataset files from directories (recursively), globs and file paths
+
+    Files below any directory in exclude (e.g. the output directory, when
+    it sits inside an input directory) and partially written files are
+    left out.
+    """
+    exclude = [os.path.abspath(directory) for directory in exclude]
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = glob.glob(os.path.join(source, '**', '*'), recursive=True)
+        else:
+            matches = glob.glob(source, recursive=True)
+        paths.extend(path for path in matches
+                     if os.path.isfile(path) and os.path.splitext(path)[1].lower() in INPUT_EXTENSIONS
+                     and '.partial' not in os.path.basename(path))
+    paths = set(os.path.abspath(path) for path in paths)
+    return sorted(path for path in paths if not any(_inside(path, directory) for directory in exclude))
+
+
+def output_path(input_path, input_root, output_dir, fmt):
+    """Mirror the input's location below input_root inside output_dir"""
+    relative = os.path.relpath(input_path, input_root)
+    return os.path.join(output_dir, f"{os.path.splitext(relative)[0]}.{fmt}")
+
+
+def rss_bytes():
+    """Resident memory of this process, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class MemoryWatchdog:
+    """Stop the block once this process's resident memory exceeds limit_bytes
+
+    A background thread samples the RSS and interrupts the main thread
+    (KeyboardInterrupt) when it passes the limit; tripped tells that
+    interrupt apart from a real one. Unlike an address-space limit this
+    counts memory actually in use, so thread pools and memory-mapped
+    libraries don't trip it. Work inside a long C call is only stopped
+    once the call returns.
+    """
+
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.tripped = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(MEMORY_POLL_SECONDS):
+            rss = rss_bytes()
+            if rss is not None and rss > self.limit_bytes:
+                self.tripped = True
+                _thread.interrupt_main()
+                return
+
+    def __enter__(self):
+        if self.limit_bytes and threading.current_thread() is threading.main_thread():
+            if rss_bytes() is None:
+                logger.warning("Cannot read process memory; worker memory limit not enforced")
+            else:
+                self._thread = threading.Thread(target=self._watch, name="autoclean-memory-watchdog",
+                                                daemon=True)
+                self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False
+
+
+def process_file(input_path, output, steps, recipe_digest, previous=None, stream=False, memory_limit=None):
+    """Clean one file; runs in a worker process and returns its manifest entry
+
+    With stream=True CSV inputs are cleaned chunk by chunk (see
+    stream_recipe) instead of being loaded whole. A file whose processing
+    takes the worker past memory_limit bytes of resident memory fails.
+    """
+    started = time.perf_counter()
+    entry = {'input': input_path, 'output': output, 'recipe_hash': recipe_digest}
+    watchdog = MemoryWatchdog(memory_limit)
+    try:
+        with watchdog:
+            _process(input_path, output, steps, recipe_digest, previous, stream, entry)
+    except KeyboardInterrupt:
+        if not watchdog.tripped:
+            raise
+        entry.update(status='failed', error="Worker memory limit exceeded")
+    entry['seconds'] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+def _process(input_path, output, steps, recipe_digest, previous, stream, entry):
+    """Body of process_file; fills in entry"""
+    partial = f"{os.path.splitext(output)[0]}.partial{os.path.splitext(output)[1]}"
+    try:
+        entry['input_hash'] = file_hash(input_path)
+        if (previous and previous.get('status') in ('ok', 'skipped')
+                and previous.get('input_hash') == entry['input_hash']
+                and previous.get('recipe_hash') == recipe_digest and os.path.exists(output)):
+            entry.update(status='skipped', rows_in=previous.get('rows_in'),
+                         rows_out=previous.get('rows_out'), changes=previous.get('changes', []))
+        else:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            if stream and os.path.splitext(input_path)[1].lower() in CSV_EXTENSIONS:
+                rows_in, rows_out, changes = stream_recipe(input_path, partial, steps,
+                                                           spill_dir=os.path.dirname(output))
+            else:
+                df = read_dataset(input_path)
+                rows_in = len(df)
+                cleaned, changes = apply_recipe(df, steps)
+                rows_out = len(cleaned)
+                write_dataset(cleaned, partial)
+            os.replace(partial, output)
+            entry.update(status='ok', rows_in=rows_in, rows_out=rows_out, changes=changes)
+    except MemoryError:
+        entry.update(status='failed', error="Out of memory")
+    except Exception as e:
+        entry.update(status='failed', error=f"{type(e).__name__}: {e}")
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def read_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {entry['input']: entry for entry in json.load(f).get('files', [])}
+
+
+def write_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def run_batch(recipe, sources, output_dir, workers=None, memory_limit=None, fmt='parquet', force=False,
+              stream=False):
+    """Apply a recipe to every input file across a process pool
+
+    Files whose content and recipe match the previous run's manifest are
+    skipped unless force is set. stream=True cleans CSV inputs without
+    loading them whole; it needs CSV output and STREAMING_OPERATIONS steps. Returns the manifest, which is also
+    written to output_dir/manifest.json; its counts cover this run, while
+    its file list keeps entries from earlier runs over other inputs.
+    """
+    if stream:
+        if fmt != 'csv':
+            raise ValueError("Streaming writes CSV; use --format csv")
+        unsupported = [step['op'] for step in recipe['steps'] if step['op'] not in STREAMING_OPERATIONS]
+        if unsupported:
+            raise ValueError(f"Cannot stream recipe operations: {', '.join(unsupported)}")
+    inputs = collect_inputs(sources, exclude=[output_dir])
+    if not inputs:
+        raise FileNotFoundError(f"No CSV/Excel/Parquet/Feather files in {', '.join(sources)}")
+    os.makedirs(output_dir, exist_ok=True)
+    input_root = os.path.commonpath([os.path.dirname(path) for path in inputs])
+    previous = read_manifest(output_dir)
+    digest = recipe_hash(recipe)
+
+    started = time.perf_counter()
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_file, path, output_path(path, input_root, output_dir, fmt),
+                        recipe['steps'], digest, None if force else previous.get(path), stream,
+                        memory_limit): path
+            for path in inputs
+        }
+        for future in as_completed(futures):
+            try:
+                entry = future.result()
+            except Exception as e:
+                # The worker itself died, e.g. killed by the system when out of memory
+                entry = {'input': futures[future], 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+            entries.append(entry)
+            logger.info(f"{entry['status']}: {entry['input']}")
+
+    # Files from earlier runs that were not part of this one stay listed
+    processed = {entry['input'] for entry in entries}
+    entries.extend(entry for path, entry in previous.items() if path not in processed)
+    entries.sort(key=lambda entry: entry['input'])
+    manifest = {
+        'recipe_hash': digest,
+        'seconds': round(time.perf_counter() - started, 3),
+        'counts': {status: sum(entry['status'] == status for entry in entries if entry['input'] in processed)
+                   for status in ('ok', 'skipped', 'failed')},
+        'files': entries,
+    }
+    write_manifest(output_dir, manifest)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.cleaner',
+        description="Apply a JSON cleaning recipe to many dataset files"
+    )
+    parser.add_argument('recipe', help="JSON recipe: {\"steps\": [{\"op\": ..., ...}]}")
+    parser.add_argument('inputs', nargs='+', help="files, directories or quoted glob patterns")
+    parser.add_argument('-o', '--output-dir', required=True)
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--memory-limit', type=int, default=None,
+                        help="per-worker resident memory limit in MB; files that exceed it fail")
+    parser.add_argument('--format', choices=('parquet', 'feather', 'csv'), default='parquet')
+    parser.add_argument('--force', action='store_true', help="reprocess unchanged files")
+    parser.add_argument('--stream', action='store_true',
+                        help="clean CSV inputs chunk by chunk instead of loading them (needs --format csv)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manifest = run_batch(
+        load_recipe(args.recipe), args.inputs, args.output_dir,
+        workers=args.workers,
+        memory_limit=args.memory_limit * 1024 * 1024 if args.memory_limit else None,
+        fmt=args.format,
+        force=args.force,
+        stream=args.stream
+    )
+    counts = manifest['counts']
+    print(f"{counts['ok']} cleaned, {counts['skipped']} unchanged, {counts['failed']} failed "
+          f"in {manifest['seconds']:.1f}s; manifest in {os.path.join(args.output_dir, MANIFEST_NAME)}")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,82 +1,382 @@
 import pandas as pd
 import numpy as np
+from modules.cleaning_plan import optimize_plan
+from modules.dedup import duplicate_mask
+from modules.fill import compute_fill_values, fill_spec
+from modules.memory import frame_nbytes, note_path, share_frame, tracked
+from modules.operation_log import OperationLog, operation_hash
+from modules.parallel import ColumnExecutor
+
+# Strings that look like dates, e.g. 2024-01-31, 31/01/2024, 2024.1.31 12:00
+DATE_PATTERN = r'^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}([ T]\d{1,2}:\d{2}(:\d{2})?)?\s*$'
 
 class DataCleaner:
-    def __init__(self, df):
-        self.df = df.copy()
+    """Cleaning operations on a DataFrame
+
+    Every operation returns the cleaner, eager or lazy, so calls can be
+    chained; read the result from .df or get_cleaned_data().
+    """
+
+    def __init__(self, df, lazy=False, copy=True, track_memory=False, stats=None,
+                 checkpoints=None, fingerprint=None, profile=False, metrics_file=None,
+                 executor=None):
+        # copy=False shares the caller's data under copy-on-write, so columns
+        # are only duplicated when an operation actually changes them
+        self._df = share_frame(df, copy=copy)
         self.changes_log = []
+        self.track_memory = track_memory
+        self.memory_log = []
+        # Per-operation timings and shapes (see memory.tracked); profile is
+        # True for every operation or a collection of operation names
+        self.profile = profile
+        self.metrics = []
+        self.metrics_file = metrics_file
+        # Optional DatasetStats for df, kept current as operations run
+        self.stats = stats
+        # In lazy mode operations are only recorded; the optimized plan runs
+        # the first time the data is read
+        self.lazy = lazy
+        self._plan = []
+        # Every operation is logged with a hash chained from the input
+        # fingerprint. With a CheckpointCache, lazy plans save the state
+        # after each step and resume from the longest cached prefix.
+        self.operations = OperationLog(root=fingerprint)
+        self.checkpoints = checkpoints
+        self._replaying = False
+        # Per-column conversions and fills run on this pool for long frames
+        self.executor = executor if executor is not None else ColumnExecutor()
+    
+    @property
+    def df(self):
+        """Current frame, running any pending plan first"""
+        if self._plan:
+            self._execute_plan()
+        return self._df
+    
+    @df.setter
+    def df(self, value):
+        self._df = value
+    
+    def _record(self, name, **kwargs):
+        """Log an operation; add it to the plan and return True if lazy"""
+        if self._replaying:
+            return False
+        self.operations.append(name, kwargs)
+        if not self.lazy:
+            return False
+        self._plan.append((name, kwargs))
+        return True
+    
+    def _run(self, plan):
+        """Run operations eagerly without logging them again"""
+        lazy, self.lazy, self._replaying = self.lazy, False, True
+        try:
+            for name, kwargs in plan:
+                if name == 'fill':
+                    self._apply_fills(kwargs['fills'])
+                else:
+                    getattr(self, name)(**kwargs)
+        finally:
+            self.lazy, self._replaying = lazy, False
+    
+    def _execute_plan(self):
+        """Optimize and run all recorded operations"""
+        recorded, self._plan = self._plan, []
+        plan = optimize_plan(recorded, self._df.columns)
+        if self.checkpoints is None or self.operations.root is None:
+            self._run(plan)
+            return
+        
+        # The recorded plan is the tail of the operation log. Checkpoints are
+        # keyed by hashes chained over the optimized steps from the state
+        # before it; resume from the latest cached step, then checkpoint
+        # each remaining step
+        before = len(self.operations) - len(recorded)
+        parent = self.operations.entries[before - 1]['hash'] if before else self.operations.root
+        keys = []
+        for name, kwargs in plan:
+            parent = operation_hash(parent, name, kwargs)
+            keys.append(parent)
+        start = 0
+        for step in range(len(plan), 0, -1):
+            state = self.checkpoints.get(keys[step - 1])
+            if state is not None:
+                self._df, self.changes_log, stats = state
+                if stats is not None:
+                    stats.attach(self._df)
+                    self.stats = stats
+                start = step
+                break
+        for step in range(start, len(plan)):
+            self._run([plan[step]])
+            self.checkpoints.put(keys[step], self._df, self.changes_log, self.stats)
+    
+    def get_plan(self):
+        """Return the optimized plan for the operations recorded so far"""
+        return optimize_plan(self._plan, self._df.columns)
     
-    def remove_duplicates(self, subset=None, keep='first'):
-        """Remove duplicate rows"""
+    @tracked
+    def remove_duplicates(self, subset=None, keep='first', partitioned=False):
+        """Remove duplicate rows
+        
+        With partitioned=True duplicates are found from 64-bit row
+        fingerprints spilled to hash partitions on disk instead of a full
+        in-memory hash table.
+        """
+        if self._record('remove_duplicates', subset=subset, keep=keep, partitioned=partitioned):
+            return self
         initial_rows = len(self.df)
-        self.df = self.df.drop_duplicates(subset=subset, keep=keep)
+        if partitioned:
+            note_path(self, 'partitioned fingerprints')
+            duplicated = duplicate_mask(self.df, subset=subset, keep=keep)
+        else:
+            note_path(self, 'in-memory hash')
+            duplicated = self.df.duplicated(subset=subset, keep=keep).to_numpy()
+        # With keep='first'/'last' removed rows repeat a kept row on the
+        # compared columns; keep=False removes every copy
+        duplicate_columns = ()
+        if keep in ('first', 'last'):
+            duplicate_columns = self.df.columns if subset is None else subset
+        self._remove_rows(duplicated, duplicate_columns=duplicate_columns)
         removed = initial_rows - len(self.df)
         if removed > 0:
             self.changes_log.append(f"Removed {removed} duplicate rows")
-        return self.df
+        return self
     
+    @tracked
     def drop_columns(self, columns_to_drop):
         """Drop specified columns"""
         if isinstance(columns_to_drop, str):
             columns_to_drop = [columns_to_drop]
+        if self._record('drop_columns', columns_to_drop=columns_to_drop):
+            return self
         
         existing_cols = [col for col in columns_to_drop if col in self.df.columns]
         if existing_cols:
             self.df = self.df.drop(columns=existing_cols)
+            if self.stats is not None:
+                self.stats.on_columns_dropped(self.df, existing_cols)
             self.changes_log.append(f"Dropped columns: {', '.join(existing_cols)}")
-        return self.df
+        return self
     
+    @tracked
     def handle_missing_values(self, strategy='drop', columns=None, fill_value=None):
         """Handle missing values with various strategies"""
+        if self._record('handle_missing_values', strategy=strategy,
+                        columns=columns, fill_value=fill_value):
+            return self
         if columns is None:
             columns = self.df.columns
         
         if strategy == 'drop':
             initial_rows = len(self.df)
-            self.df = self.df.dropna(subset=columns)
+            self._remove_rows(self.df[columns].isna().any(axis=1).to_numpy())
             removed = initial_rows - len(self.df)
             if removed > 0:
                 self.changes_log.append(f"Dropped {removed} rows with missing values")
         
         elif strategy == 'fill':
             if fill_value is not None:
-                self.df[columns] = self.df[columns].fillna(fill_value)
-                self.changes_log.append(f"Filled missing values with {fill_value}")
+                self._apply_fills(fill_spec(columns, 'custom', fill_value))
             else:
-                for col in columns:
-                    if self.df[col].dtype in ['int64', 'float64']:
-                        fill_val = self.df[col].mean()
-                        self.df[col] = self.df[col].fillna(fill_val)
-                        self.changes_log.append(f"Filled missing values in {col} with mean: {fill_val:.2f}")
-                    else:
-                        fill_val = self.df[col].mode()[0]
-                        self.df[col] = self.df[col].fillna(fill_val)
-                        self.changes_log.append(f"Filled missing values in {col} with mode: {fill_val}")
+                self._apply_fills(fill_spec(columns))
+        
+        return self
+    
+    def _remove_rows(self, mask, duplicate_columns=()):
+        """Drop rows where mask is True, keeping stats current"""
+        if not mask.any():
+            return
+        if self.stats is not None:
+            removed = self.df[mask]
+            self.df = self.df[~mask]
+            self.stats.on_rows_removed(self.df, removed, duplicate_columns=set(duplicate_columns))
+        else:
+            self.df = self.df[~mask]
+    
+    @tracked
+    def fill_missing(self, columns, strategy='auto', value=None):
+        """Fill missing values using a per-column strategy
         
+        columns is a name, a list of names or a {column: strategy} dict.
+        Strategies are 'auto', 'mean', 'median', 'mode', 'custom' (uses
+        value) and 'drop rows'. All fills run as a single pass.
+        """
+        if isinstance(columns, dict):
+            strategies = dict(columns)
+        else:
+            strategies = {col: strategy for col in ([columns] if isinstance(columns, str) else columns)}
+        
+        # Drop rows first so fill statistics describe the rows that remain
+        drop_cols = [col for col, s in strategies.items() if s == 'drop rows']
+        if drop_cols:
+            self.handle_missing_values('drop', columns=drop_cols)
+        spec = fill_spec({col: s for col, s in strategies.items() if s != 'drop rows'}, value=value)
+        if spec:
+            if self._record('fill', fills=spec):
+                return self
+            self._apply_fills(spec)
+        return self
+    
+    @tracked(name='fill_missing')
+    def _apply_fills(self, fills):
+        """Fill several columns in a single fillna pass"""
+        missing = [col for col in fills if col not in self.df.columns]
+        if missing:
+            raise KeyError(missing)
+        # Only columns that actually have gaps are filled; checked on the
+        # data itself, which stays right even if statistics have drifted.
+        # Complete columns need no fill value, so none is computed for them
+        gaps = {col: fill for col, fill in fills.items() if self.df[col].hasnans}
+        values, messages = compute_fill_values(self.df, gaps, executor=self.executor) if gaps else ({}, {})
+        self.changes_log.extend(messages[col] for col in values)
+        note_path(self, f"fillna on {len(values)} of {len(fills)} columns"
+                        + (" in parallel" if self.executor.parallel(self.df, len(values)) else ""))
+        if values:
+            self.df, errors = self.executor.apply(
+                self.df, {col: (lambda series, value=value: series.fillna(value)) for col, value in values.items()}
+            )
+            if errors:
+                raise next(iter(errors.values()))
+            if self.stats is not None:
+                self.stats.on_columns_changed(self.df, list(values))
         return self.df
     
+    @tracked
     def rename_columns(self, column_mapping):
         """Rename columns based on provided mapping"""
+        if self._record('rename_columns', column_mapping=column_mapping):
+            return self
         self.df = self.df.rename(columns=column_mapping)
+        if self.stats is not None:
+            self.stats.on_columns_renamed(self.df, column_mapping)
         renamed_cols = [f"{old} → {new}" for old, new in column_mapping.items()]
         self.changes_log.append(f"Renamed columns: {', '.join(renamed_cols)}")
-        return self.df
+        return self
     
+    @tracked
     def change_data_types(self, column_types):
         """Change data types of specified columns"""
+        if self._record('change_data_types', column_types=column_types):
+            return self
+        column_types = {col: dtype for col, dtype in column_types.items() if col in self.df.columns}
+        # Each column converts independently, so one bad column doesn't
+        # block the others and wide frames use every worker
+        note_path(self, 'parallel per-column astype' if self.executor.parallel(self.df, len(column_types))
+                  else 'per-column astype')
+        self.df, errors = self.executor.apply(
+            self.df, {col: (lambda series, dtype=dtype: series.astype(dtype)) for col, dtype in column_types.items()}
+        )
         for col, dtype in column_types.items():
-            if col in self.df.columns:
-                try:
-                    self.df[col] = self.df[col].astype(dtype)
-                    self.changes_log.append(f"Changed {col} to {dtype}")
-                except Exception as e:
-                    self.changes_log.append(f"Failed to convert {col} to {dtype}: {str(e)}")
-        return self.df
+            if col in errors:
+                self.changes_log.append(f"Failed to convert {col} to {dtype}: {str(errors[col])}")
+            else:
+                self.changes_log.append(f"Changed {col} to {dtype}")
+        if self.stats is not None:
+            self.stats.on_columns_changed(self.df, list(column_types))
+        return self
+    
+    @tracked
+    def optimize_memory(self, category_threshold=0.05, parse_dates=True):
+        """Downcast numbers, compress repeated strings and parse date strings
+        
+        Text columns become categories when their distinct values are at
+        most category_threshold of the rows.
+        """
+        if self._record('optimize_memory', category_threshold=category_threshold,
+                        parse_dates=parse_dates):
+            return self
+        before = frame_nbytes(self.df)
+        converted = {}
+        for col in self.df.columns:
+            series = self.df[col]
+            new = self._optimized_column(series, category_threshold, parse_dates)
+            if new is not None and new.dtype != series.dtype:
+                converted[col] = new
+        
+        for col, new in converted.items():
+            self.df[col] = new
+            self.changes_log.append(f"Changed {col} to {new.dtype}")
+        if self.stats is not None:
+            self.stats.on_columns_changed(self.df, list(converted))
+        after = frame_nbytes(self.df)
+        self.changes_log.append(
+            f"Optimized memory: {before / 1024 ** 2:.2f} MB → {after / 1024 ** 2:.2f} MB"
+        )
+        return self
+    
+    @staticmethod
+    def _optimized_column(series, category_threshold, parse_dates):
+        """Smallest lossless representation of a column, or None"""
+        if pd.api.types.is_bool_dtype(series):
+            return None
+        if pd.api.types.is_integer_dtype(series):
+            # Signed columns stay signed: unsigned values wrap around in
+            # arithmetic (uint8 10 - 50 is 216)
+            downcast = 'unsigned' if series.dtype.kind == 'u' else 'integer'
+            return pd.to_numeric(series, downcast=downcast)
+        if pd.api.types.is_float_dtype(series):
+            if series.dtype == np.float32:
+                return None
+            # Only narrow to float32 when every value survives the round trip
+            narrow = series.astype(np.float32)
+            if narrow.astype(series.dtype).equals(series):
+                return narrow
+            return None
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            return None
+        
+        values = series.dropna()
+        if not len(values) or pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            return None
+        if parse_dates and values.head(1000).str.match(DATE_PATTERN).all():
+            try:
+                parsed = pd.to_datetime(series, errors='coerce')
+            except (ValueError, TypeError):
+                parsed = None
+            # Keep strings if some of them were not valid dates
+            if parsed is not None and parsed.isna().sum() == series.isna().sum():
+                return parsed
+        if values.nunique() <= category_threshold * len(series):
+            return series.astype('category')
+        return None
+    
+    def get_operations(self):
+        """Logged operations as JSON-safe records (see OperationLog.records)"""
+        return self.operations.records()
+    
+    @classmethod
+    def from_operations(cls, df, operations, **kwargs):
+        """Replay logged operation records on df and return the cleaner"""
+        cleaner = cls(df, **kwargs)
+        for record in operations:
+            name, params = record['operation'], record['params']
+            if not cleaner._record(name, **params):
+                cleaner._run([(name, params)])
+        return cleaner
     
     def get_changes_log(self):
         """Return list of changes made"""
+        if self._plan:
+            self._execute_plan()
         return self.changes_log
     
+    def get_memory_log(self):
+        """Return bytes allocated by each operation (needs track_memory=True)"""
+        return self.memory_log
+    
+    def get_metrics(self):
+        """Return timing and shape records of profiled operations"""
+        if self._plan:
+            self._execute_plan()
+        return self.metrics
+    
     def get_cleaned_data(self):
         """Return cleaned dataframe"""
-        return self.df
\ No newline at end of file
+        return self.df
+
+if __name__ == '__main__':
+    # Headless batch cleaning: python -m modules.cleaner RECIPE INPUTS... -o DIR
+    import sys
+    from modules.batch import main
+    sys.exit(main())
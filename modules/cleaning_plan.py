@@ -0,0 +1,233 @@
+"""Plan optimizer for lazily recorded DataCleaner operations.
+
+A plan is a list of ``(method_name, kwargs)`` tuples in call order. The
+optimizer rewrites it so that executing the result produces the same frame
+as executing the original plan, but with fewer intermediate frames:
+
+* dropped columns are removed as early as possible,
+* adjacent column-local fills and dtype conversions are fused into one pass,
+* duplicate removal that cannot remove anything is skipped.
+"""
+
+from modules.fill import fill_spec
+
+COLUMN_LOCAL_OPS = ('fill', 'change_data_types')
+
+
+def _as_list(columns):
+    if columns is None:
+        return None
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+def _op_columns(op):
+    """Return the columns an operation reads, or None if it reads all of them"""
+    name, kwargs = op
+    if name == 'remove_duplicates':
+        return _as_list(kwargs.get('subset'))
+    if name == 'handle_missing_values':
+        return _as_list(kwargs.get('columns'))
+    if name == 'fill':
+        return list(kwargs['fills'])
+    if name == 'change_data_types':
+        return list(kwargs['column_types'])
+    if name == 'drop_columns':
+        return _as_list(kwargs['columns_to_drop'])
+    if name == 'rename_columns':
+        return list(kwargs['column_mapping'])
+    return None
+
+
+def _normalize(op):
+    """Turn explicit-column fills into the internal 'fill' operation"""
+    name, kwargs = op
+    if name == 'handle_missing_values' and kwargs.get('strategy') == 'fill':
+        columns = _as_list(kwargs.get('columns'))
+        if columns is not None:
+            fill_value = kwargs.get('fill_value')
+            if fill_value is None:
+                return ('fill', {'fills': fill_spec(columns)})
+            return ('fill', {'fills': fill_spec(columns, 'custom', fill_value)})
+    return op
+
+
+def _drop_op(columns):
+    return ('drop_columns', {'columns_to_drop': sorted(columns, key=str)})
+
+
+def _missing_fill_columns(plan, columns):
+    """For each operation, the columns it fills that don't exist at that point
+
+    columns is the schema before the plan; None if unknown.
+    """
+    if columns is None:
+        return [set() for _ in plan]
+    schema = set(columns)
+    missing = []
+    for name, kwargs in plan:
+        missing.append(set(kwargs['fills']) - schema if name == 'fill' else set())
+        if name == 'drop_columns':
+            schema -= set(_as_list(kwargs['columns_to_drop']))
+        elif name == 'rename_columns':
+            mapping = kwargs['column_mapping']
+            schema = {mapping.get(c, c) for c in schema}
+    return missing
+
+
+def _prune_columns(plan, columns=None):
+    """Move drop_columns as early as the operations before it allow
+
+    With the input schema (columns), fills of columns that don't exist are
+    kept whole, so they fail as they would when run eagerly instead of
+    being pruned away by a later drop.
+    """
+    missing = _missing_fill_columns(plan, columns)
+    dead = set()
+    pruned = []
+    for i, op in reversed(list(enumerate(plan))):
+        name, kwargs = op
+        if missing[i]:
+            # Runs unchanged and raises; drops it names stay after it
+            needed = dead & set(_op_columns(op))
+            if needed:
+                pruned.append(_drop_op(needed))
+                dead -= needed
+            pruned.append(op)
+            continue
+        if name == 'drop_columns':
+            dead |= set(_as_list(kwargs['columns_to_drop']))
+            continue
+        if name == 'rename_columns':
+            # Whether a renamed column exists depends on the schema at that
+            # point, so columns touched by the rename stay after it
+            mapping = kwargs['column_mapping']
+            needed = dead & (set(mapping) | set(mapping.values()))
+            if needed:
+                pruned.append(_drop_op(needed))
+                dead -= needed
+            pruned.append(op)
+            continue
+        if name == 'fill':
+            fills = {c: v for c, v in kwargs['fills'].items() if c not in dead}
+            if fills:
+                pruned.append(('fill', {'fills': fills}))
+            continue
+        if name == 'change_data_types':
+            types = {c: t for c, t in kwargs['column_types'].items() if c not in dead}
+            if types:
+                pruned.append(('change_data_types', {'column_types': types}))
+            continue
+        if name == 'optimize_memory':
+            # Works column by column, so dropped columns need not be optimized
+            pruned.append(op)
+            continue
+
+        # Row-level operations read their columns, so anything they look at
+        # has to be dropped after them rather than before
+        used = _op_columns(op)
+        needed = dead if used is None else dead & set(used)
+        if needed:
+            pruned.append(_drop_op(needed))
+            dead -= needed
+        pruned.append(op)
+
+    if dead:
+        pruned.append(_drop_op(dead))
+    pruned.reverse()
+    return pruned
+
+
+def _merge(target, op):
+    """Merge a column-local operation into an earlier one of the same kind"""
+    name, kwargs = op
+    if name == 'fill':
+        fills = dict(target[1]['fills'])
+        fills.update(kwargs['fills'])
+        return ('fill', {'fills': fills})
+    types = dict(target[1]['column_types'])
+    types.update(kwargs['column_types'])
+    return ('change_data_types', {'column_types': types})
+
+
+def _fuse_column_ops(plan):
+    """Fuse fills and dtype conversions on disjoint columns into single passes"""
+    fused = []
+    for op in plan:
+        if op[0] not in COLUMN_LOCAL_OPS:
+            fused.append(op)
+            continue
+        cols = set(_op_columns(op))
+        merged = False
+        # Walk back over column-local operations this one commutes with
+        for i in range(len(fused) - 1, -1, -1):
+            prev = fused[i]
+            if prev[0] not in COLUMN_LOCAL_OPS or cols & set(_op_columns(prev)):
+                break
+            if prev[0] == op[0]:
+                fused[i] = _merge(prev, op)
+                merged = True
+                break
+        if not merged:
+            fused.append(op)
+    return fused
+
+
+def _skip_redundant_dedup(plan):
+    """Drop remove_duplicates calls that follow an equivalent one"""
+    result = []
+    # Columns the frame is known to be unique on; 'all' means every column
+    unique_on = None
+    for op in plan:
+        name, kwargs = op
+        if name == 'remove_duplicates':
+            subset = _as_list(kwargs.get('subset'))
+            if unique_on is not None and (
+                subset is None or (unique_on != 'all' and unique_on <= set(subset))
+            ):
+                continue
+            unique_on = 'all' if subset is None else set(subset)
+        elif name == 'handle_missing_values' and kwargs.get('strategy') == 'drop':
+            # Removing rows never creates duplicates
+            pass
+        elif name == 'rename_columns':
+            if unique_on not in (None, 'all'):
+                mapping = kwargs['column_mapping']
+                unique_on = {mapping.get(c, c) for c in unique_on}
+        elif name in COLUMN_LOCAL_OPS and unique_on not in (None, 'all'):
+            if unique_on & set(_op_columns(op)):
+                unique_on = None
+        else:
+            # Column drops and value changes can create new duplicates
+            unique_on = None
+        result.append(op)
+    return result
+
+
+def _canonical(op):
+    """Put a column-local operation's columns in a fixed (sorted) order
+
+    Checkpoint keys hash parameters with sorted keys, so the columns have
+    to run in that order too: otherwise a resumed plan could log its fills
+    in a different order than a fresh run of the same key.
+    """
+    name, kwargs = op
+    if name == 'fill':
+        return ('fill', {'fills': dict(sorted(kwargs['fills'].items(), key=lambda item: str(item[0])))})
+    if name == 'change_data_types':
+        types = kwargs['column_types']
+        return ('change_data_types', {'column_types': dict(sorted(types.items(), key=lambda item: str(item[0])))})
+    return op
+
+
+def optimize_plan(plan, columns=None):
+    """Return an equivalent, cheaper plan
+
+    columns is the schema the plan starts from, when known.
+    """
+    plan = [_normalize(op) for op in plan]
+    plan = _prune_columns(plan, columns)
+    plan = _fuse_column_ops(plan)
+    plan = _skip_redundant_dedup(plan)
+    return [_canonical(op) for op in plan]
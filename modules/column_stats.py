@@ -0,0 +1,241 @@
+import copy
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+from modules.dedup import row_fingerprints, value_hashes
+
+
+def _leading_zeros(values):
+    """Count leading zero bits of uint64 values (64 for zero)
+
+    The float64 exponent is the bit length. Rounding can overstate it by
+    one, but only for values within 2**-53 of the next power of two, which
+    does not matter for distinct-count estimates.
+    """
+    _, exponent = np.frexp(values.astype(np.float64))
+    return np.clip(64 - exponent, 0, 64).astype(np.uint8)
+
+
+class HyperLogLog:
+    """Approximate distinct counter over 64-bit hashes"""
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes << p
+        rank = np.minimum(_leading_zeros(rest), 64 - self.precision) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Small-range correction (linear counting)
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+class ColumnStats:
+    """Summary statistics for one column"""
+
+    def __init__(self, series):
+        self.compute(series)
+
+    def compute(self, series):
+        self.dtype = series.dtype
+        self.null_count = int(series.isna().sum())
+        self.count = len(series) - self.null_count
+        self.numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        self._compute_distinct(series)
+        self._compute_min_max(series)
+        self.sum = float(series.sum()) if self.numeric else None
+
+    def _compute_distinct(self, series):
+        self.hll = HyperLogLog()
+        values = series.dropna()
+        if len(values):
+            self.hll.add_hashes(value_hashes(values))
+        self.distinct_stale = False
+
+    def _compute_min_max(self, series):
+        self.min = self.max = None
+        if self.count and (self.numeric or pd.api.types.is_datetime64_any_dtype(series)):
+            self.min, self.max = series.min(), series.max()
+        self.min_max_stale = False
+
+    @property
+    def mean(self):
+        if not self.numeric or not self.count:
+            return None
+        return self.sum / self.count
+
+    def remove_rows(self, removed, duplicates=False):
+        """Account for removed values of this column
+
+        When every removed value is a duplicate of a value that stays, the
+        distinct values and extremes cannot change, so only counts and sums
+        are adjusted.
+        """
+        removed_nulls = int(removed.isna().sum())
+        self.null_count -= removed_nulls
+        self.count -= len(removed) - removed_nulls
+        if self.numeric:
+            self.sum -= float(removed.sum())
+        if not duplicates and len(removed) > removed_nulls:
+            self.distinct_stale = True
+            if self.min is not None and (removed.min() <= self.min or removed.max() >= self.max):
+                self.min_max_stale = True
+
+    def refresh(self, series):
+        """Recompute anything invalidated by earlier removals"""
+        if self.distinct_stale:
+            self._compute_distinct(series)
+        if self.min_max_stale:
+            self._compute_min_max(series)
+
+    @property
+    def approx_distinct(self):
+        return self.hll.count()
+
+
+class DatasetStats:
+    """Per-column statistics for a frame, maintained as the frame changes
+
+    DataCleaner keeps this up to date through the on_* hooks, so the
+    statistics never need a full rebuild after a cleaning step. Values
+    invalidated by row removal are recomputed for the affected column only,
+    the next time they are read.
+    """
+
+    def __init__(self, df, fingerprint=None):
+        self.fingerprint = fingerprint
+        self.n_rows = len(df)
+        self._set_frame(df)
+        self.columns = {col: ColumnStats(df[col]) for col in df.columns}
+
+    def _set_frame(self, df):
+        # Only a weak reference, so cached statistics never keep a frame alive
+        self._df = weakref.ref(df)
+
+    def column(self, name):
+        """Statistics for one column, refreshing values invalidated by removals
+
+        Raises ReferenceError if they need refreshing but the frame they
+        describe no longer exists; attach() a frame with the same data first.
+        """
+        stats = self.columns[name]
+        if stats.distinct_stale or stats.min_max_stale:
+            df = self._df()
+            if df is None:
+                raise ReferenceError(f"Statistics for {name} are out of date and their frame is gone")
+            stats.refresh(df[name])
+        return stats
+
+    def copy(self):
+        """Independent copy that can follow a derived frame"""
+        return copy.deepcopy(self)
+
+    def attach(self, df):
+        """Follow df, a frame holding the data these statistics describe"""
+        self._set_frame(df)
+
+    def __deepcopy__(self, memo):
+        clone = copy.copy(self)
+        clone.columns = copy.deepcopy(self.columns, memo)
+        return clone
+
+    def on_rows_removed(self, df, removed, duplicate_columns=()):
+        """Rows were removed; duplicate_columns still hold every removed value"""
+        self._set_frame(df)
+        self.n_rows = len(df)
+        self.fingerprint = None
+        for col, stats in self.columns.items():
+            stats.remove_rows(removed[col], duplicates=col in duplicate_columns)
+
+    def on_columns_dropped(self, df, columns):
+        self._set_frame(df)
+        self.fingerprint = None
+        for col in columns:
+            self.columns.pop(col, None)
+
+    def on_columns_renamed(self, df, mapping):
+        self._set_frame(df)
+        self.fingerprint = None
+        self.columns = {mapping.get(col, col): stats for col, stats in self.columns.items()}
+
+    def on_columns_changed(self, df, columns):
+        self._set_frame(df)
+        self.fingerprint = None
+        for col in columns:
+            if col in df.columns:
+                self.columns[col] = ColumnStats(df[col])
+
+    @property
+    def total_missing(self):
+        return sum(stats.null_count for stats in self.columns.values())
+
+    def columns_with_missing(self):
+        return [col for col, stats in self.columns.items() if stats.null_count > 0]
+
+    def summary(self):
+        """Column overview table"""
+        rows = []
+        for col in self.columns:
+            stats = self.column(col)
+            rows.append({
+                'Column': col,
+                'Data Type': str(stats.dtype),
+                'Missing Values': stats.null_count,
+                'Unique Values (approx.)': stats.approx_distinct,
+                'Min': stats.min,
+                'Max': stats.max,
+                'Mean': stats.mean,
+            })
+        return pd.DataFrame(rows)
+
+
+def dataset_fingerprint(df):
+    """Content hash of a frame: column names, dtypes and every row"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(row_fingerprints(df).tobytes())
+    return digest.hexdigest()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+MAX_CACHED_DATASETS = 16
+
+
+def get_dataset_stats(df, fingerprint=None):
+    """Statistics for df, shared by every caller with the same content"""
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    with _cache_lock:
+        stats = _cache.get(fingerprint)
+        if stats is not None:
+            _cache.move_to_end(fingerprint)
+            # Same content, possibly a new frame object: follow the live one
+            stats.attach(df)
+            return stats
+    stats = DatasetStats(df, fingerprint)
+    with _cache_lock:
+        # Another session may have built them meanwhile; keep the first
+        stats = _cache.setdefault(fingerprint, stats)
+        stats.attach(df)
+        _cache.move_to_end(fingerprint)
+        if len(_cache) > MAX_CACHED_DATASETS:
+            _cache.popitem(last=False)
+    return stats
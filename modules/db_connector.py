@@ -1,82 +1,182 @@
 import sqlite3
 import os
+import json
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import logging
-from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from modules.migrations import migrate, parse_shape
 
 logger = logging.getLogger(__name__)
 
+class ConnectionPool:
+    """Process-wide SQLite connections: a reader per live thread, one shared writer
+
+    Every connection runs in WAL mode with synchronous=NORMAL, so readers
+    never block the writer or each other. Writes go through a single
+    connection guarded by a lock, which queues them in the process instead
+    of failing with "database is locked". sqlite3 caches the prepared
+    statements of each connection (cached_statements).
+    """
+    
+    def __init__(self, db_path: Path, busy_timeout: float = 30.0, cached_statements: int = 256):
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._readers: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._open()
+        self.initialized = False
+        self._metrics = {
+            'reads': 0,
+            'writes': 0,
+            'write_errors': 0,
+            'write_wait_seconds': 0.0,
+            'max_write_wait_seconds': 0.0,
+        }
+        self._metrics_lock = threading.Lock()
+    
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            detect_types=sqlite3.PARSE_DECLTYPES  # TIMESTAMP columns come back as datetime
+        )
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+    
+    def _count(self, key: str, amount=1):
+        with self._metrics_lock:
+            self._metrics[key] += amount
+    
+    def reader(self) -> sqlite3.Connection:
+        """Read connection owned by the calling thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._readers_lock:
+                # Streamlit runs each rerun on a new thread; close the
+                # connections of threads that have finished
+                for thread in [thread for thread in self._readers if not thread.is_alive()]:
+                    self._readers.pop(thread).close()
+                self._readers[threading.current_thread()] = conn
+        self._count('reads')
+        return conn
+    
+    @contextmanager
+    def writer(self):
+        """Exclusive use of the writer connection; commits on success"""
+        started = time.perf_counter()
+        with self._write_lock:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self._metrics['writes'] += 1
+                self._metrics['write_wait_seconds'] += waited
+                self._metrics['max_write_wait_seconds'] = max(self._metrics['max_write_wait_seconds'], waited)
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                self._count('write_errors')
+                raise
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Counters for monitoring the pool"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        with self._readers_lock:
+            metrics['reader_connections'] = len(self._readers)
+        metrics['writer_busy'] = self._write_lock.locked()
+        return metrics
+    
+    def close(self):
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self._writer.close()
+
+
+_pools: Dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path) -> ConnectionPool:
+    """The shared pool for a database file, created on first use"""
+    key = Path(db_path).resolve()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key)
+            _pools[key] = pool
+        return pool
+
+
 class DBHandler:
-    def __init__(self):
-        self.db_path = Path("autoclean.db")
-        self.conn = None
+    def __init__(self, db_path="autoclean.db"):
+        self.db_path = Path(db_path)
+        self.pool = None
         self._connect()
     
     def _connect(self):
-        """Connect to SQLite database"""
+        """Attach to the shared connection pool, creating tables on first use"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            self._initialize_db()
-            logger.info("SQLite connection established")
+            self.pool = get_pool(self.db_path)
+            if not self.pool.initialized:
+                with self.pool.writer() as conn:
+                    self._initialize_db(conn)
+                self.pool.initialized = True
+                logger.info("SQLite connection pool established")
         except Exception as e:
             logger.error(f"SQLite connection failed: {e}")
             raise
     
-    def _initialize_db(self):
-        """Create tables if they don't exist"""
-        cursor = self.conn.cursor()
-        
-        # Enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Users table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # File history table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS file_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            original_shape TEXT NOT NULL,
-            cleaned_shape TEXT NOT NULL,
-            cleaning_instructions TEXT NOT NULL,
-            cleaned_file_path TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (user_id)
-        )
-        """)
-        
-        self.conn.commit()
+    def _initialize_db(self, conn):
+        """Create or upgrade the schema"""
+        version = migrate(conn)
+        logger.info(f"Database schema at version {version}")
     
     def execute_query(self, query: str, params=(), fetch: bool = False, commit: bool = False):
-        """Generic query execution method"""
-        cursor = None
+        """Generic query execution method
+        
+        Queries with commit=True run on the serialized writer connection,
+        everything else on the calling thread's reader.
+        """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            
             if commit:
-                self.conn.commit()
-            
-            if fetch:
-                return cursor.fetchall()
-            return None
+                with self.pool.writer() as conn:
+                    cursor = conn.execute(query, params)
+                    return cursor.fetchall() if fetch else None
+            cursor = self.pool.reader().execute(query, params)
+            try:
+                return cursor.fetchall() if fetch else None
+            finally:
+                cursor.close()
         except Exception as e:
             logger.error(f"Error executing query: {e}")
-            if self.conn:
-                self.conn.rollback()
             raise
-        finally:
-            if cursor:
-                cursor.close()
+    
+    def execute_write(self, query: str, params=()) -> int:
+        """Run one write statement and return the new row id"""
+        with self.pool.writer() as conn:
+            return conn.execute(query, params).lastrowid
+    
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Connection pool counters (reads, writes, write lock waits)"""
+        return self.pool.metrics()
     
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Get user by email"""
@@ -92,12 +192,50 @@ class DBHandler:
         """Create new user"""
         query = "INSERT INTO users (email, password_hash) VALUES (?, ?)"
         try:
-            self.execute_query(query, (email, password_hash), commit=True)
-            return self.conn.cursor().lastrowid
+            return self.execute_write(query, (email, password_hash))
         except Exception as e:
             logger.error(f"Error creating user: {e}")
             raise
     
+    def create_session(self, session_id: str, user_id: int, expires_at: int):
+        """Record a login session, dropping sessions that have expired"""
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM user_sessions WHERE expires_at < ?", (int(time.time()),))
+            conn.execute(
+                "INSERT INTO user_sessions (session_id, user_id, expires_at) VALUES (?, ?, ?)",
+                (session_id, user_id, expires_at)
+            )
+    
+    def get_session_user(self, session_id: str) -> Optional[Dict]:
+        """user_id and email of a live session, else None"""
+        query = """
+        SELECT u.user_id, u.email
+        FROM user_sessions s JOIN users u ON u.user_id = s.user_id
+        WHERE s.session_id = ? AND s.expires_at >= ?
+        """
+        try:
+            result = self.execute_query(query, (session_id, int(time.time())), fetch=True)
+            return dict(result[0]) if result else None
+        except Exception as e:
+            logger.error(f"Error getting session: {e}")
+            return None
+    
+    def revoke_session(self, session_id: str):
+        """End a login session; its token stops working at once"""
+        self.execute_write("DELETE FROM user_sessions WHERE session_id = ?", (session_id,))
+    
+    HISTORY_INSERT = """
+    INSERT INTO file_history 
+    (user_id, original_shape, cleaned_shape, cleaning_instructions, cleaned_file_path,
+     original_rows, original_cols, cleaned_rows, cleaned_cols)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _history_params(user_id, original_shape, cleaned_shape, cleaning_notes, cleaned_file_path):
+        return (user_id, original_shape, cleaned_shape, cleaning_notes, cleaned_file_path,
+                *parse_shape(original_shape), *parse_shape(cleaned_shape))
+    
     def save_cleaning_history(
         self,
         user_id: int,
@@ -107,15 +245,10 @@ class DBHandler:
         cleaned_file_path: str
     ) -> bool:
         """Save cleaning history"""
-        query = """
-        INSERT INTO file_history 
-        (user_id, original_shape, cleaned_shape, cleaning_instructions, cleaned_file_path)
-        VALUES (?, ?, ?, ?, ?)
-        """
         try:
             self.execute_query(
-                query,
-                (user_id, original_shape, cleaned_shape, cleaning_notes, cleaned_file_path),
+                self.HISTORY_INSERT,
+                self._history_params(user_id, original_shape, cleaned_shape, cleaning_notes, cleaned_file_path),
                 commit=True
             )
             return True
@@ -123,9 +256,104 @@ class DBHandler:
             logger.error(f"Error saving cleaning history: {e}")
             return False
     
-    def get_user_history(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get user's cleaning history"""
+    def save_cleaning_history_batch(self, records: List[Dict[str, Any]]) -> bool:
+        """Save several history records in one transaction
+        
+        Each record holds the keyword arguments of save_cleaning_history,
+        plus optionally 'operations': the session's operation log records.
+        """
+        try:
+            with self.pool.writer() as conn:
+                for record in records:
+                    record = dict(record)
+                    operations = record.pop('operations', None) or []
+                    history_id = conn.execute(self.HISTORY_INSERT, self._history_params(**record)).lastrowid
+                    self._insert_operations(conn, history_id, operations)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving cleaning history: {e}")
+            return False
+    
+    @staticmethod
+    def _insert_operations(conn, history_id: int, operations: List[Dict[str, Any]]):
+        conn.executemany(
+            """
+            INSERT INTO cleaning_operations
+            (history_id, step, operation_type, operation_details, operation_hash)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(history_id, op['step'], op['operation'], json.dumps(op['params']), op['hash'])
+             for op in operations]
+        )
+    
+    def get_operations(self, history_id: int) -> List[Dict[str, Any]]:
+        """Operation log of a history record, in step order"""
         query = """
+        SELECT step, operation_type, operation_details, operation_hash
+        FROM cleaning_operations
+        WHERE history_id = ?
+        ORDER BY step
+        """
+        try:
+            result = self.execute_query(query, (history_id,), fetch=True)
+        except Exception as e:
+            logger.error(f"Error getting cleaning operations: {e}")
+            return []
+        return [
+            {
+                'step': row['step'],
+                'operation': row['operation_type'],
+                'params': json.loads(row['operation_details'] or '{}'),
+                'hash': row['operation_hash'],
+            }
+            for row in result
+        ] if result else []
+    
+    def get_history_page(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: Optional[Tuple[str, int]] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        min_rows: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        min_cols: Optional[int] = None,
+        max_cols: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """One page of a user's cleaning history, newest first
+        
+        Pages are addressed by the (created_at, id) of the last record seen
+        rather than an offset, so every page costs the same however deep it
+        is. date_from/date_to bound created_at (date_to is inclusive of the
+        whole day for dates); the row and column limits apply to the
+        original dataset shape. Returns {'records': [...], 'next_cursor':
+        cursor for the following page, or None on the last page}.
+        """
+        conditions = ["user_id = ?"]
+        params: List[Any] = [user_id]
+        if cursor is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(cursor)
+        if date_from is not None:
+            conditions.append("created_at >= ?")
+            params.append(str(date_from))
+        if date_to is not None:
+            if isinstance(date_to, date) and not isinstance(date_to, datetime):
+                date_to = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+                conditions.append("created_at < ?")
+            else:
+                conditions.append("created_at <= ?")
+            params.append(str(date_to))
+        for column, op, value in (
+            ('original_rows', '>=', min_rows), ('original_rows', '<=', max_rows),
+            ('original_cols', '>=', min_cols), ('original_cols', '<=', max_cols)
+        ):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        
+        query = f"""
         SELECT 
             id,
             user_id,
@@ -135,19 +363,35 @@ class DBHandler:
             cleaned_file_path as file_path,
             created_at as timestamp
         FROM file_history 
-        WHERE user_id = ?
-        ORDER BY created_at DESC
-        LIMIT 10
+        WHERE {' AND '.join(conditions)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
         """
         try:
-            result = self.execute_query(query, (user_id,), fetch=True)
-            return [dict(row) for row in result] if result else []
+            # One extra row tells whether another page follows
+            result = self.execute_query(query, (*params, limit + 1), fetch=True)
+            records = [dict(row) for row in result] if result else []
         except Exception as e:
             logger.error(f"Error getting user history: {e}")
-            return []
+            return {'records': [], 'next_cursor': None}
+        
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            next_cursor = (str(last['timestamp']), last['id'])
+        return {'records': records, 'next_cursor': next_cursor}
     
-    def __del__(self):
-        """Clean up connection when object is destroyed"""
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
\ No newline at end of file
+    def get_user_history(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get user's 10 most recent cleaning sessions"""
+        return self.get_history_page(user_id, limit=10)['records']
+    
+    def get_file_reference_counts(self) -> Dict[str, int]:
+        """Number of history records pointing at each stored result file"""
+        query = """
+        SELECT cleaned_file_path, COUNT(*) AS refs
+        FROM file_history
+        GROUP BY cleaned_file_path
+        """
+        result = self.execute_query(query, fetch=True)
+        return {row['cleaned_file_path']: row['refs'] for row in result} if result else {}
@@ -0,0 +1,221 @@
+import os
+import shutil
+import tempfile
+import pandas as pd
+import numpy as np
+
+# Fingerprint and original row position for every spilled row
+RECORD_DTYPE = np.dtype([('fp', '<u8'), ('pos', '<u8')])
+
+
+def value_hashes(values):
+    """64-bit hashes of a Series' values
+
+    Unhashable objects (lists, dicts, ...) are hashed by their text.
+    """
+    try:
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+    except TypeError:
+        return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+
+
+def _hashable(df):
+    """df with columns of unhashable objects converted to their text"""
+    unhashable = []
+    for col in df.select_dtypes(include='object').columns:
+        try:
+            pd.util.hash_pandas_object(df[col], index=False)
+        except TypeError:
+            unhashable.append(col)
+    return df.astype({col: str for col in unhashable})
+
+
+def _row_hashes(df):
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        return pd.util.hash_pandas_object(_hashable(df), index=False).to_numpy()
+
+
+def row_fingerprints(df, subset=None, normalize=False, batch_rows=1_000_000):
+    """Hash each row (or subset of columns) to a 64-bit fingerprint
+
+    With normalize, integer columns are hashed as float64 so that chunks
+    read separately from a CSV agree even when missing values turned a
+    column into floats in some chunks and not in others.
+    """
+    if subset is not None:
+        df = df[[subset] if isinstance(subset, str) else list(subset)]
+    if normalize:
+        int_cols = df.select_dtypes(include='integer').columns
+        if len(int_cols):
+            df = df.astype({col: 'float64' for col in int_cols})
+    # Hash in row batches so the per-column hash arrays stay bounded
+    parts = [
+        _row_hashes(df.iloc[start:start + batch_rows])
+        for start in range(0, len(df), batch_rows)
+    ]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint64)
+
+
+class HashPartitionedDeduplicator:
+    """Out-of-core duplicate detection over 64-bit row fingerprints
+
+    Rows are fed in order with update(). Each row is reduced to a fingerprint
+    and routed, together with its original position, to one of
+    num_partitions hash partitions. Partitions are buffered in memory and
+    spilled to disk once the buffer holds more than buffer_rows records, so
+    only one partition has to fit in memory when duplicates are resolved.
+    """
+
+    def __init__(self, subset=None, keep='first', num_partitions=64,
+                 buffer_rows=1_000_000, spill_dir=None, normalize=False):
+        if keep not in ('first', 'last', False):
+            raise ValueError("keep must be 'first', 'last' or False")
+        self.subset = subset
+        self.keep = keep
+        self.num_partitions = num_partitions
+        self.buffer_rows = buffer_rows
+        self.spill_dir = spill_dir
+        self.normalize = normalize
+        self._tmpdir = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Drop all collected fingerprints"""
+        self.close()
+        self.rows = 0
+        self.duplicate_count = None
+        self._buffers = [[] for _ in range(self.num_partitions)]
+        self._buffered = 0
+        self._spilled = False
+        self._mask = None
+        self._cursor = 0
+
+    def update(self, chunk):
+        """Add the next rows of the data"""
+        fps = row_fingerprints(chunk, self.subset, self.normalize)
+        records = np.empty(len(fps), dtype=RECORD_DTYPE)
+        records['fp'] = fps
+        records['pos'] = np.arange(self.rows, self.rows + len(fps), dtype=np.uint64)
+        self.rows += len(fps)
+
+        partitions = fps % np.uint64(self.num_partitions)
+        order = np.argsort(partitions, kind='stable')
+        bounds = np.searchsorted(partitions[order], np.arange(self.num_partitions + 1))
+        for p in range(self.num_partitions):
+            if bounds[p] < bounds[p + 1]:
+                self._buffers[p].append(records[order[bounds[p]:bounds[p + 1]]])
+        self._buffered += len(records)
+        if self._buffered > self.buffer_rows:
+            self._spill()
+
+    def _partition_path(self, p):
+        return os.path.join(self._tmpdir, f"part_{p:04d}.bin")
+
+    def _spill(self):
+        """Append buffered records to the partition files on disk"""
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='autoclean_dedup_', dir=self.spill_dir)
+        for p, buffer in enumerate(self._buffers):
+            if buffer:
+                with open(self._partition_path(p), 'ab') as f:
+                    for records in buffer:
+                        records.tofile(f)
+        self._buffers = [[] for _ in range(self.num_partitions)]
+        self._buffered = 0
+        self._spilled = True
+
+    def _partitions(self):
+        """Yield the records of each partition, one partition at a time"""
+        for p in range(self.num_partitions):
+            parts = list(self._buffers[p])
+            if self._spilled and os.path.exists(self._partition_path(p)):
+                parts.insert(0, np.fromfile(self._partition_path(p), dtype=RECORD_DTYPE))
+            if parts:
+                yield np.concatenate(parts)
+
+    def count(self):
+        """Number of rows duplicated.sum() would report for keep='first'"""
+        if self.duplicate_count is None:
+            self.duplicate_count = sum(
+                len(records) - len(np.unique(records['fp'])) for records in self._partitions()
+            )
+        return self.duplicate_count
+
+    def finalize(self, mask_path=None):
+        """Resolve duplicates and build the keep mask in original row order
+
+        With mask_path the mask is a disk-backed memmap, so it costs one byte
+        per row of disk rather than memory.
+        """
+        if mask_path is not None:
+            mask = np.lib.format.open_memmap(mask_path, mode='w+', dtype=np.bool_, shape=(self.rows,))
+            mask[:] = True
+        else:
+            mask = np.ones(self.rows, dtype=np.bool_)
+
+        removed = duplicates = 0
+        for records in self._partitions():
+            records = records[np.lexsort((records['pos'], records['fp']))]
+            same_as_prev = np.zeros(len(records), dtype=np.bool_)
+            same_as_prev[1:] = records['fp'][1:] == records['fp'][:-1]
+            same_as_next = np.zeros(len(records), dtype=np.bool_)
+            same_as_next[:-1] = same_as_prev[1:]
+            if self.keep == 'first':
+                dup = same_as_prev
+            elif self.keep == 'last':
+                dup = same_as_next
+            else:
+                dup = same_as_prev | same_as_next
+            mask[records['pos'][dup].astype(np.int64)] = False
+            removed += int(dup.sum())
+            duplicates += int(same_as_prev.sum())
+
+        self._mask = mask
+        self._cursor = 0
+        self.removed = removed
+        self.duplicate_count = duplicates
+        self._buffers = [[] for _ in range(self.num_partitions)]
+        self.close()
+        return mask
+
+    def reset(self):
+        """Rewind filter() to the first row"""
+        self._cursor = 0
+
+    def filter(self, chunk):
+        """Return the rows of the next chunk that survive deduplication"""
+        if self._mask is None:
+            self.finalize()
+        keep = np.asarray(self._mask[self._cursor:self._cursor + len(chunk)])
+        self._cursor += len(chunk)
+        return chunk[keep]
+
+    def close(self):
+        """Remove spilled partition files"""
+        if getattr(self, '_tmpdir', None):
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+            self._spilled = False
+
+    def __del__(self):
+        self.close()
+
+
+def duplicate_mask(df, subset=None, keep='first', chunk_rows=1_000_000, **kwargs):
+    """Boolean array marking duplicate rows, like DataFrame.duplicated()"""
+    dedup = HashPartitionedDeduplicator(subset=subset, keep=keep, **kwargs)
+    for start in range(0, len(df), chunk_rows):
+        dedup.update(df.iloc[start:start + chunk_rows])
+    return ~dedup.finalize()
+
+
+def count_duplicates(df, subset=None, chunk_rows=1_000_000, **kwargs):
+    """Number of duplicate rows, computed from fingerprints only"""
+    dedup = HashPartitionedDeduplicator(subset=subset, **kwargs)
+    for start in range(0, len(df), chunk_rows):
+        dedup.update(df.iloc[start:start + chunk_rows])
+    count = dedup.count()
+    dedup.close()
+    return count
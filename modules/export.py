@@ -0,0 +1,220 @@
+import io
+import os
+import gzip
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from modules.column_stats import dataset_fingerprint
+from modules.storage import _arrow_safe, columnar_available
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow export and zstd CSV need pyarrow
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': ('.parquet', 'application/octet-stream'),
+    'arrow': ('.arrow', 'application/octet-stream'),
+}
+CSV_COMPRESSION = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+EXCEL_MAX_ROWS = 1_048_575  # per sheet, below the header row
+CHUNK_ROWS = 100_000
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _require_arrow(what):
+    if not columnar_available():
+        raise ImportError(f"{what} requires pyarrow")
+
+
+def write_csv(df, path, compression=None, chunk_rows=CHUNK_ROWS):
+    """Write CSV a chunk of rows at a time, optionally gzip or zstd compressed"""
+    if compression not in CSV_COMPRESSION:
+        raise ValueError(f"Unknown CSV compression: {compression}")
+    if compression == 'zstd':
+        _require_arrow("zstd compression")
+        raw = pa.CompressedOutputStream(path, 'zstd')
+    elif compression == 'gzip':
+        raw = gzip.open(path, 'wb', compresslevel=6)
+    else:
+        raw = open(path, 'wb')
+    with raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as out:
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            chunk.to_csv(out, index=False, header=i == 0)
+    return path
+
+
+def _arrow_batches(df, chunk_rows):
+    """Arrow schema of df and its record batches, converted a chunk at a time"""
+    df = _arrow_safe(df)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    batches = (pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+               for chunk in _chunks(df, chunk_rows))
+    return schema, batches
+
+
+def write_parquet(df, path, compression='zstd', chunk_rows=CHUNK_ROWS):
+    """Write Parquet one row group per chunk"""
+    _require_arrow("Parquet export")
+    schema, batches = _arrow_batches(df, chunk_rows)
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return path
+
+
+def write_arrow(df, path, compression='zstd', chunk_rows=CHUNK_ROWS):
+    """Write an Arrow IPC (Feather v2) file one record batch per chunk"""
+    _require_arrow("Arrow export")
+    schema, batches = _arrow_batches(df, chunk_rows)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return path
+
+
+def _excel_value(value):
+    # None, NaN, NaT and pd.NA (gaps in nullable columns) are empty cells
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_excel(df, path, chunk_rows=CHUNK_ROWS):
+    """Write an .xlsx file with openpyxl's constant-memory write-only mode
+
+    Rows beyond Excel's sheet limit continue on further sheets.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    header = [str(col) for col in df.columns]
+    sheet, written = None, EXCEL_MAX_ROWS
+    for chunk in _chunks(df, chunk_rows):
+        for row in chunk.itertuples(index=False, name=None):
+            if written == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Sheet{len(workbook.worksheets) + 1}")
+                sheet.append(header)
+                written = 0
+            sheet.append([_excel_value(value) for value in row])
+            written += 1
+    if sheet is None:
+        workbook.create_sheet("Sheet1").append(header)
+    workbook.save(path)
+    return path
+
+
+def export_name(stem, fmt, compression=None):
+    """File name for an export, e.g. cleaned_data.csv.gz"""
+    extension = EXPORT_FORMATS[fmt][0]
+    if fmt == 'csv':
+        extension += CSV_COMPRESSION[compression]
+    return f"{stem}{extension}"
+
+
+def write_export(df, path, fmt, compression=None):
+    """Serialize df to path in one of EXPORT_FORMATS"""
+    if fmt == 'csv':
+        return write_csv(df, path, compression=compression)
+    if fmt == 'parquet':
+        return write_parquet(df, path)
+    if fmt == 'arrow':
+        return write_arrow(df, path)
+    if fmt == 'excel':
+        return write_excel(df, path)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+class ExportCache:
+    """Serialized downloads on disk, one file per dataset version and format
+
+    Every format is written straight to a file in chunks, so exporting
+    needs little memory beyond the frame itself, and a version that was
+    already serialized in a format is never serialized again. Files are
+    evicted least recently used first once they exceed max_bytes.
+    """
+
+    def __init__(self, root=os.path.join("data", "exports"), max_bytes=8 << 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, version, fmt, compression=None):
+        return os.path.join(self.root, export_name(version, fmt, compression))
+
+    def export(self, df, fmt, version=None, compression=None):
+        """Path of df serialized in fmt, writing it on first request"""
+        path = self.path_for(version or dataset_fingerprint(df), fmt, compression)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+        stem, ext = os.path.splitext(path)
+        partial = f"{stem}.{threading.get_ident()}.partial{ext}"
+        try:
+            write_export(df, partial, fmt, compression=compression)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self.enforce_quota(keep=path)
+        return path
+
+    def enforce_quota(self, keep=None):
+        """Evict least recently used exports beyond max_bytes; returns bytes freed"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if '.partial' in name or path == keep:
+                    continue
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            if keep is not None and os.path.exists(keep):
+                total += os.path.getsize(keep)
+            freed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                freed += size
+            if freed:
+                logger.info(f"Export cache freed {freed / 1024**2:.1f} MB")
+            return freed
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_export_cache(**kwargs):
+    """Process-wide export cache (created on first use)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ExportCache(**kwargs)
+        return _default_cache
@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+
+# 'auto' uses the mean for numeric (non-boolean) columns and the mode otherwise
+FILL_STRATEGIES = ('auto', 'mean', 'median', 'mode', 'custom')
+
+
+def fill_spec(columns, strategy='auto', value=None):
+    """Build a {column: (strategy, value)} fill spec
+
+    columns may be a single name, a list of names, or a dict mapping each
+    column to its own strategy. value is the custom fill value, either a
+    scalar or a dict keyed by column.
+    """
+    if isinstance(columns, dict):
+        strategies = dict(columns)
+    else:
+        if isinstance(columns, str):
+            columns = [columns]
+        strategies = {col: strategy for col in columns}
+
+    spec = {}
+    for col, col_strategy in strategies.items():
+        if col_strategy not in FILL_STRATEGIES:
+            raise ValueError(f"Unknown fill strategy for {col}: {col_strategy}")
+        col_value = value.get(col) if isinstance(value, dict) else value
+        spec[col] = (col_strategy, col_value if col_strategy == 'custom' else None)
+    return spec
+
+
+def _resolve_strategy(series, strategy):
+    # Any width (downcast int8, float32, nullable Int64), but not booleans
+    numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    if strategy == 'auto':
+        return 'mean' if numeric else 'mode'
+    if strategy in ('mean', 'median') and not numeric:
+        # Averages are meaningless for text; fall back to the most common value
+        return 'mode'
+    return strategy
+
+
+def _coerce(series, value):
+    """Parse custom values typed as text into numbers for numeric columns"""
+    if isinstance(value, str) and pd.api.types.is_numeric_dtype(series):
+        try:
+            return pd.to_numeric(value)
+        except ValueError:
+            pass
+    return value
+
+
+def column_mode(series):
+    """Most frequent value, ties broken like Series.mode()[0]
+
+    Values are counted through integer codes (the categorical codes, or
+    factorized codes in sorted order), so only the distinct values are
+    sorted rather than the whole column.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series, sort=True)
+    codes = codes[codes >= 0]
+    if not len(codes):
+        raise IndexError(f"Column {series.name} has no values to take the mode of")
+    return uniques[np.argmax(np.bincount(codes, minlength=len(uniques)))]
+
+
+def compute_fill_values(df, spec, executor=None):
+    """Resolve a fill spec into concrete values and per-column log messages
+
+    Means and medians for all columns are computed with one vectorized
+    reduction each. Modes are counted column by column, on the executor's
+    workers when a ColumnExecutor is given.
+    """
+    resolved = {col: _resolve_strategy(df[col], strategy) for col, (strategy, _) in spec.items()}
+    values = {}
+    for strategy in ('mean', 'median'):
+        cols = [col for col, resolved_strategy in resolved.items() if resolved_strategy == strategy]
+        if cols:
+            values.update(getattr(df[cols], strategy)().to_dict())
+    for col, resolved_strategy in resolved.items():
+        if (resolved_strategy in ('mean', 'median') and pd.api.types.is_integer_dtype(df[col])
+                and pd.notna(values[col])):
+            # Nullable integer columns can only hold whole numbers
+            values[col] = round(values[col])
+    mode_cols = [col for col, resolved_strategy in resolved.items() if resolved_strategy == 'mode']
+    if executor is not None and mode_cols:
+        modes, errors = executor.map(df, {col: column_mode for col in mode_cols})
+        if errors:
+            raise next(iter(errors.values()))
+        values.update(modes)
+    else:
+        values.update({col: column_mode(df[col]) for col in mode_cols})
+    for col, resolved_strategy in resolved.items():
+        if resolved_strategy == 'custom':
+            values[col] = _coerce(df[col], spec[col][1])
+
+    messages = {}
+    for col in spec:
+        strategy, value = resolved[col], values[col]
+        if strategy in ('mean', 'median'):
+            messages[col] = f"Filled missing values in {col} with {strategy}: {value:.2f}"
+        elif strategy == 'mode':
+            messages[col] = f"Filled missing values in {col} with mode: {value}"
+        else:
+            messages[col] = f"Filled missing values in {col} with {value}"
+    # Keep the column order of the spec
+    return {col: values[col] for col in spec}, messages
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.neighbors import KDTree
+from modules.fill import column_mode
+
+
+def _query_block(tree, points, k):
+    """Neighbor indices for one block of rows (runs in a worker)"""
+    return tree.query(points, k=k, return_distance=False)
+
+
+def _majority(codes):
+    """Most common code in each row; ties go to the nearest neighbor"""
+    counts = np.stack([(codes == codes[:, [j]]).sum(axis=1) for j in range(codes.shape[1])], axis=1)
+    return codes[np.arange(len(codes)), counts.argmax(axis=1)]
+
+
+class KNNImputationEngine:
+    """Blockwise k-nearest-neighbor imputation for large frames
+
+    Each column is imputed on its own, like scikit-learn's KNNImputer:
+    donors for a column are the rows where that column is present, so
+    sparse frames with no fully complete rows still get imputed. Rows
+    missing the column are grouped by which other numeric columns (the
+    distance features) they have; for each group a KD-tree is built over
+    donors that have those features too, leaving out features too few
+    donors have (at most max_donors donors, sampled, and scaled by their
+    standard deviation) and queried in blocks
+    of block_size rows across a process pool. Donors are restricted to rows
+    sharing the same block_key value, if given. Numeric gaps get the
+    neighbor mean, categorical gaps the neighbor majority value.
+    """
+
+    def __init__(self, n_neighbors=5, max_donors=50_000, block_key=None,
+                 block_size=10_000, n_jobs=-1, backend='loky', random_state=42):
+        self.n_neighbors = n_neighbors
+        self.max_donors = max_donors
+        self.block_key = block_key
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.random_state = random_state
+
+    def impute(self, df, numeric_cols, categorical_cols=()):
+        """Return {column: (row positions, imputed values)} for the gaps"""
+        numeric_cols, categorical_cols = list(numeric_cols), list(categorical_cols)
+        missing = df[numeric_cols + categorical_cols].isna()
+        if not missing.to_numpy().any():
+            return {}
+        # Distance features for every row, as floats with NaN for gaps
+        features = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        feature_missing = np.isnan(features)
+
+        if self.block_key is None:
+            groups = [np.arange(len(df))]
+        else:
+            codes, _ = pd.factorize(df[self.block_key])
+            groups = [np.flatnonzero(codes == code) for code in np.unique(codes)]
+
+        filled = {}
+        for col in numeric_cols + categorical_cols:
+            col_missing = missing[col].to_numpy()
+            if not col_missing.any():
+                continue
+            present_all = np.flatnonzero(~col_missing)
+            feature_idx = np.array([i for i, name in enumerate(numeric_cols) if name != col], dtype=np.intp)
+            parts = []
+            for rows in groups:
+                recipients = rows[col_missing[rows]]
+                if not len(recipients):
+                    continue
+                donors = rows[~col_missing[rows]]
+                if len(donors) < self.n_neighbors:
+                    # Too few donors in this block; borrow from the whole frame
+                    donors = present_all
+                parts.extend(self._impute_column(df, col, col in numeric_cols, recipients, donors,
+                                                 features, feature_missing, feature_idx))
+            if parts:
+                filled[col] = (np.concatenate([pos for pos, _ in parts]),
+                               np.concatenate([values for _, values in parts]))
+        return filled
+
+    def _sample(self, donors):
+        if len(donors) <= self.max_donors:
+            return donors
+        rng = np.random.default_rng(self.random_state)
+        return np.sort(rng.choice(donors, self.max_donors, replace=False))
+
+    def _impute_column(self, df, col, numeric, recipients, donors, features, feature_missing, feature_idx):
+        """[(row positions, values)] for the recipients' gaps in col
+
+        feature_idx selects col's distance features from the columns of
+        features (every numeric column, col itself excluded).
+        """
+        if not len(donors):
+            return []
+        target = df[col]
+        if not len(feature_idx):
+            return [(recipients, self._fallback(target, self._sample(donors), numeric, len(recipients)))]
+        # Group recipients by which distance features they have
+        observed = ~feature_missing[np.ix_(recipients, feature_idx)]
+        patterns, pattern_ids = np.unique(observed, axis=0, return_inverse=True)
+        pattern_ids = pattern_ids.ravel()
+        parts = []
+        for pattern_id, pattern in enumerate(patterns):
+            rows = recipients[pattern_ids == pattern_id]
+            columns, candidates = self._shared_features(donors, feature_idx[pattern], feature_missing)
+            candidates = self._sample(candidates)
+            if not len(columns) or not len(candidates):
+                parts.append((rows, self._fallback(target, self._sample(donors), numeric, len(rows))))
+                continue
+
+            donor_points = features[np.ix_(candidates, columns)]
+            scale = donor_points.std(axis=0)
+            scale[scale == 0] = 1.0
+            tree = KDTree(donor_points / scale)
+            points = features[np.ix_(rows, columns)] / scale
+            k = min(self.n_neighbors, len(candidates))
+            if len(points) <= self.block_size:
+                neighbors = _query_block(tree, points, k)
+            else:
+                blocks = Parallel(n_jobs=self.n_jobs, backend=self.backend)(
+                    delayed(_query_block)(tree, points[start:start + self.block_size], k)
+                    for start in range(0, len(points), self.block_size)
+                )
+                neighbors = np.vstack(blocks)
+
+            donor_values = target.iloc[candidates]
+            if numeric:
+                values = donor_values.to_numpy(dtype=np.float64, na_value=np.nan)[neighbors].mean(axis=1)
+            else:
+                codes, uniques = pd.factorize(donor_values)
+                values = np.asarray(uniques)[_majority(codes[neighbors])]
+            parts.append((rows, values))
+        return parts
+
+    def _shared_features(self, donors, columns, feature_missing):
+        """Distance features and the donors that have all of them
+
+        Starts from the recipients' features and, while fewer than
+        n_neighbors donors have them all, leaves out the one donors lack
+        most often (keeping at least one).
+        """
+        if not len(columns):
+            return columns, donors
+        has = ~feature_missing[np.ix_(donors, columns)]
+        keep = np.ones(len(columns), dtype=bool)
+        usable = has.all(axis=1)
+        for j in np.argsort(has.sum(axis=0), kind='stable'):
+            if usable.sum() >= self.n_neighbors or keep.sum() == 1:
+                break
+            keep[j] = False
+            usable = has[:, keep].all(axis=1)
+        return columns[keep], donors[usable]
+
+    @staticmethod
+    def _fallback(target, donors, numeric, n):
+        """Column statistics over the donors, for rows without usable features"""
+        pool = target.iloc[donors]
+        if numeric:
+            return np.full(n, pool.mean(), dtype=np.float64)
+        return np.full(n, column_mode(pool), dtype=object)
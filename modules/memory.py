@@ -0,0 +1,188 @@
+import json
+import time
+import functools
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+PANDAS_MAJOR = int(pd.__version__.split('.')[0])
+
+
+def enable_copy_on_write():
+    """Turn on pandas copy-on-write for the whole process
+
+    This is a global pandas setting, so it is left to the application to
+    call at startup; return False if this pandas lacks it.
+    """
+    if PANDAS_MAJOR >= 3:
+        # Always on, and the option is deprecated
+        return True
+    try:
+        pd.set_option('mode.copy_on_write', True)
+        return True
+    except Exception:
+        return False
+
+
+def copy_on_write_enabled():
+    """Whether pandas copy-on-write is in effect"""
+    if PANDAS_MAJOR >= 3:
+        return True
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except Exception:
+        return False
+
+
+def share_frame(df, copy=True):
+    """Return a frame the caller may own
+
+    With copy=False and copy-on-write in effect this is a shallow copy:
+    no data is duplicated until a column is actually modified. Without
+    copy-on-write a shallow copy could be changed through the original,
+    so the frame is copied.
+    """
+    if not copy and copy_on_write_enabled():
+        return df.copy(deep=False)
+    return df.copy()
+
+
+def frame_nbytes(df):
+    """Deep memory usage of a frame in bytes"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# [highest traced memory seen, whether tracing was started by us] for each
+# open track_allocations block, innermost last
+_open_blocks = []
+
+
+@contextmanager
+def track_allocations():
+    """Measure bytes allocated inside the block with tracemalloc
+
+    Yields a dict that is filled with 'allocated_bytes' (net bytes still
+    held at the end) and 'peak_bytes' (highest point above the start) once
+    the block exits. Nested blocks reset tracemalloc's peak and hand it
+    back to the enclosing block. A tracer started elsewhere keeps its peak:
+    then 'peak_bytes' is exact only when the block sets a new peak and is a
+    lower bound otherwise.
+    """
+    stats = {'allocated_bytes': 0, 'peak_bytes': 0}
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    owned = started or (bool(_open_blocks) and _open_blocks[0][1])
+    start, outer_peak = tracemalloc.get_traced_memory()
+    if owned and not started:
+        tracemalloc.reset_peak()
+    block = [0, owned]
+    _open_blocks.append(block)
+    try:
+        yield stats
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, block[0])
+        if not owned and peak <= outer_peak:
+            # The foreign tracer's peak predates this block
+            peak = current
+        stats['allocated_bytes'] = current - start
+        stats['peak_bytes'] = max(peak - start, 0)
+    finally:
+        _open_blocks.pop()
+        if owned and not started:
+            # Give the enclosing block the peak it would have seen
+            _, peak = tracemalloc.get_traced_memory()
+            _open_blocks[-1][0] = max(_open_blocks[-1][0], outer_peak, peak, block[0])
+        if started:
+            tracemalloc.stop()
+
+
+def note_path(cleaner, path):
+    """Record which code path an instrumented operation took"""
+    paths = getattr(cleaner, '_code_paths', None)
+    if paths is not None:
+        paths.append(path)
+
+
+def _profiled(cleaner, name):
+    profile = getattr(cleaner, 'profile', False)
+    if isinstance(profile, bool):
+        return profile
+    return name in profile
+
+
+def _shape(cleaner):
+    # The underlying frame, so a lazy cleaner's plan is not run just to look
+    df = getattr(cleaner, '_df', None)
+    if df is None:
+        df = cleaner.df
+    return df.shape
+
+
+def export_metrics(records, path):
+    """Append operation metrics to a JSON lines file"""
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+def tracked(method=None, *, name=None):
+    """Instrument a cleaner method
+
+    With track_memory, allocations go to self.memory_log. When profiling is
+    on for the operation (self.profile is True or a collection holding its
+    name), self.metrics gets its wall and CPU time, peak allocated bytes
+    (with track_memory), rows/columns in and out and the code paths noted
+    with note_path(); records are also appended to self.metrics_file if
+    set. Calls made from inside another tracked method are counted towards
+    the outer one only. name overrides the operation name recorded and
+    matched against self.profile, e.g. for private steps a public
+    operation runs lazily.
+    """
+    if method is None:
+        return functools.partial(tracked, name=name)
+    operation = name or method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        name = operation
+        track = self.track_memory
+        profile = _profiled(self, name)
+        if ((not track and not profile) or getattr(self, 'lazy', False)
+                or getattr(self, '_tracking', False)):
+            return method(self, *args, **kwargs)
+        self._tracking = True
+        self._code_paths = []
+        rows_in, cols_in = _shape(self)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            if track:
+                with track_allocations() as stats:
+                    result = method(self, *args, **kwargs)
+            else:
+                result = method(self, *args, **kwargs)
+        finally:
+            self._tracking = False
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        paths, self._code_paths = self._code_paths, None
+        if track:
+            self.memory_log.append({'operation': name, **stats})
+        if profile:
+            rows_out, cols_out = _shape(self)
+            record = {
+                'operation': name,
+                'wall_seconds': wall,
+                'cpu_seconds': cpu,
+                'peak_bytes': stats['peak_bytes'] if track else None,
+                'rows_in': rows_in,
+                'cols_in': cols_in,
+                'rows_out': rows_out,
+                'cols_out': cols_out,
+                'code_path': ', '.join(paths),
+                'timestamp': time.time(),
+            }
+            self.metrics.append(record)
+            if getattr(self, 'metrics_file', None):
+                export_metrics([record], self.metrics_file)
+        return result
+    return wrapper
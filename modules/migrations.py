@@ -0,0 +1,149 @@
+import re
+import sqlite3
+import logging
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHAPE_PATTERN = re.compile(r"\(?\s*(\d+)\s*,\s*(\d+)\s*\)?")
+
+
+def parse_shape(shape: str) -> Tuple[Optional[int], Optional[int]]:
+    """Rows and columns from a stored shape string like '(1000, 12)'"""
+    match = SHAPE_PATTERN.fullmatch(str(shape).strip())
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def _create_base_tables(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS file_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        original_shape TEXT NOT NULL,
+        cleaned_shape TEXT NOT NULL,
+        cleaning_instructions TEXT NOT NULL,
+        cleaned_file_path TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+    """)
+
+
+def _index_history(conn: sqlite3.Connection):
+    # Numeric shapes so history can be filtered by size in SQL
+    for column in ('original_rows', 'original_cols', 'cleaned_rows', 'cleaned_cols'):
+        conn.execute(f"ALTER TABLE file_history ADD COLUMN {column} INTEGER")
+    rows = conn.execute("SELECT id, original_shape, cleaned_shape FROM file_history").fetchall()
+    conn.executemany(
+        "UPDATE file_history SET original_rows = ?, original_cols = ?, cleaned_rows = ?, cleaned_cols = ? WHERE id = ?",
+        [(*parse_shape(original), *parse_shape(cleaned), row_id) for row_id, original, cleaned in rows]
+    )
+    # Serves the newest-first history listing and its keyset cursor
+    # (created_at, id) straight from the index, with no sort step
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_file_history_user_created
+    ON file_history (user_id, created_at, id)
+    """)
+
+
+def _create_operation_log(conn: sqlite3.Connection):
+    # Mirrors cleaning_operations in database/db_setup.sql, keyed by history
+    # record; operation_details holds the parameters as JSON
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS cleaning_operations (
+        operation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        history_id INTEGER NOT NULL,
+        step INTEGER NOT NULL,
+        operation_type TEXT NOT NULL,
+        operation_details TEXT,
+        operation_hash TEXT NOT NULL,
+        operation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (history_id) REFERENCES file_history (id) ON DELETE CASCADE
+    )
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_cleaning_operations_history
+    ON cleaning_operations (history_id, step)
+    """)
+
+
+def _create_sessions(conn: sqlite3.Connection):
+    # Login sessions; a session id is only valid while its row exists,
+    # so logging out revokes it before it expires
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        session_id TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        expires_at INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+    )
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_user_sessions_expires
+    ON user_sessions (expires_at)
+    """)
+
+
+def _cover_history_queries(conn: sqlite3.Connection):
+    # Covering indexes: the history listing (filters, cursor and every
+    # selected column) and the per-record operation log are answered from
+    # the index alone, without a lookup into the table for each row
+    conn.execute("DROP INDEX IF EXISTS idx_file_history_user_created")
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_file_history_user_listing
+    ON file_history (user_id, created_at, id, original_rows, original_cols,
+                     original_shape, cleaned_shape, cleaned_file_path, cleaning_instructions)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_cleaning_operations_history")
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_cleaning_operations_log
+    ON cleaning_operations (history_id, step, operation_type, operation_hash, operation_details)
+    """)
+
+
+# (version, description, step); append new migrations, never edit old ones
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "Create users and file_history", _create_base_tables),
+    (2, "Numeric shape columns and history index", _index_history),
+    (3, "Per-session cleaning operation log", _create_operation_log),
+    (4, "Revocable login sessions", _create_sessions),
+    (5, "Covering indexes for history and operation logs", _cover_history_queries),
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations, each in its own transaction
+
+    The schema version is kept in SQLite's user_version header, so a
+    database is only ever upgraded once per migration.
+    """
+    version = schema_version(conn)
+    for target, description, step in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"Applied migration {target}: {description}")
+        version = target
+    return version
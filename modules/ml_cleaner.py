@@ -1,38 +1,63 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.impute import KNNImputer
-from sklearn.preprocessing import LabelEncoder
+from modules.imputation import KNNImputationEngine
+from modules.memory import note_path, share_frame, tracked
+from modules.outliers import outlier_scores, threshold_for
+from modules.suggestions import SuggestionEngine
 
 class MLCleaner:
-    def __init__(self, df):
-        self.df = df.copy()
+    def __init__(self, df, copy=True, track_memory=False, profile=False, metrics_file=None):
+        self.df = share_frame(df, copy=copy)
         self.changes_log = []
+        self.track_memory = track_memory
+        self.memory_log = []
+        self.profile = profile
+        self.metrics = []
+        self.metrics_file = metrics_file
     
-    def detect_outliers(self, columns=None, contamination=0.05):
-        """Detect outliers using Isolation Forest"""
+    def _numeric_columns(self, columns=None):
+        """Numeric columns of any width (e.g. downcast by optimize_memory), booleans excluded"""
         if columns is None:
-            numeric_cols = self.df.select_dtypes(include=['int64', 'float64']).columns
-            columns = numeric_cols
+            columns = self.df.columns
+        return [col for col in columns
+                if pd.api.types.is_numeric_dtype(self.df[col]) and not pd.api.types.is_bool_dtype(self.df[col])]
+    
+    @tracked
+    def outlier_scores(self, columns=None, **detector_kwargs):
+        """Isolation Forest anomaly scores per row (higher is more unusual)
         
-        # Only process numeric columns
-        numeric_cols = [col for col in columns if self.df[col].dtype in ['int64', 'float64']]
+        The forest is fitted on a bounded sample, scored in parallel chunks
+        and cached by data fingerprint and columns, so repeated calls and
+        different contamination levels reuse the same fit.
+        """
+        numeric_cols = self._numeric_columns(columns)
         if not numeric_cols:
-            return self.df, []
-        
-        # Initialize and fit the model
-        clf = IsolationForest(contamination=contamination, random_state=42)
-        clf.fit(self.df[numeric_cols])
+            return pd.Series(0.0, index=self.df.index, name='anomaly_score')
+        return outlier_scores(self.df, numeric_cols, **detector_kwargs)
+    
+    @tracked
+    def detect_outliers(self, columns=None, contamination=0.05, threshold=None, n_jobs=-1):
+        """Detect outliers using Isolation Forest
         
-        # Predict outliers
-        outliers = clf.predict(self.df[numeric_cols]) == -1
+        Rows scoring above threshold are outliers; without a threshold the
+        top `contamination` fraction of rows is flagged. Scoring uses
+        n_jobs threads on large frames.
+        """
+        numeric_cols = self._numeric_columns(columns)
+        if not numeric_cols:
+            return np.zeros(len(self.df), dtype=bool)
+        scores = outlier_scores(self.df, numeric_cols, n_jobs=n_jobs)
+        if threshold is None:
+            threshold = threshold_for(scores, contamination)
+        outliers = (scores > threshold).to_numpy()
         self.changes_log.append(f"Detected {outliers.sum()} potential outliers using Isolation Forest")
         
         return outliers
     
-    def remove_outliers(self, columns=None, contamination=0.05):
+    @tracked
+    def remove_outliers(self, columns=None, contamination=0.05, threshold=None, n_jobs=-1):
         """Remove detected outliers"""
-        outliers = self.detect_outliers(columns, contamination)
+        outliers = self.detect_outliers(columns, contamination, threshold, n_jobs=n_jobs)
         initial_rows = len(self.df)
         self.df = self.df[~outliers]
         removed = initial_rows - len(self.df)
@@ -40,78 +65,81 @@ class MLCleaner:
             self.changes_log.append(f"Removed {removed} outliers")
         return self.df
     
-    def smart_impute(self, columns=None):
-        """Use KNN imputation for missing values"""
+    @tracked
+    def smart_impute(self, columns=None, n_neighbors=5, max_donors=50_000, block_key=None, n_jobs=-1):
+        """Use KNN imputation for missing values
+        
+        Each column's neighbors are searched among at most max_donors rows
+        that have the column (within the same block_key value, if given),
+        and only rows with missing values are processed. Low-cardinality
+        text columns are filled with the most common value among the
+        neighbors.
+        """
         if columns is None:
             columns = self.df.columns
         
         # Only process numeric columns
-        numeric_cols = [col for col in columns if self.df[col].dtype in ['int64', 'float64']]
+        numeric_cols = self._numeric_columns(columns)
         if not numeric_cols:
             return self.df
         
-        # Encode categorical columns if needed
-        categorical_cols = [col for col in columns if self.df[col].dtype == 'object']
-        encoders = {}
-        df_encoded = self.df.copy()
+        # Text columns with a reasonable number of categories are imputed too
+        categorical_cols = [
+            col for col in columns
+            if (pd.api.types.is_object_dtype(self.df[col]) or pd.api.types.is_string_dtype(self.df[col]))
+            and col != block_key and self.df[col].nunique() < 50
+        ]
         
-        for col in categorical_cols:
-            if df_encoded[col].nunique() < 50:  # Only encode if reasonable number of categories
-                encoders[col] = LabelEncoder()
-                df_encoded[col] = encoders[col].fit_transform(df_encoded[col].astype(str))
-        
-        # Apply KNN imputation
-        imputer = KNNImputer(n_neighbors=5)
-        df_imputed = df_encoded.copy()
-        df_imputed[numeric_cols + categorical_cols] = imputer.fit_transform(
-            df_imputed[numeric_cols + categorical_cols]
+        note_path(self, f"kd-tree per {block_key} block" if block_key else "kd-tree")
+        engine = KNNImputationEngine(
+            n_neighbors=n_neighbors, max_donors=max_donors, block_key=block_key, n_jobs=n_jobs
         )
+        imputed = engine.impute(self.df, numeric_cols, categorical_cols)
         
-        # Decode categorical columns
-        for col in categorical_cols:
-            if col in encoders:
-                df_imputed[col] = encoders[col].inverse_transform(df_imputed[col].astype(int))
+        # Write back only the gaps, column by column
+        total = 0
+        for col, (positions, values) in imputed.items():
+            series = self.df[col].copy()
+            if col in numeric_cols:
+                # Keep the column's type (float32, nullable Int64, ...)
+                if pd.api.types.is_integer_dtype(series):
+                    values = np.round(values)
+                values = values.astype(getattr(series.dtype, 'numpy_dtype', series.dtype))
+            series.iloc[positions] = values
+            self.df[col] = series
+            total += len(positions)
         
-        self.df = df_imputed
-        self.changes_log.append("Applied KNN imputation for missing values")
+        if total:
+            self.changes_log.append(
+                f"Imputed {total} missing values in {len(imputed)} columns with KNN"
+            )
         return self.df
     
-    def suggest_cleaning(self):
-        """Suggest cleaning operations based on data analysis"""
-        suggestions = []
-        
-        # Check for missing values
-        missing_values = self.df.isnull().sum()
-        if missing_values.sum() > 0:
-            cols_with_missing = missing_values[missing_values > 0].index.tolist()
-            suggestions.append({
-                'action': 'handle_missing',
-                'columns': cols_with_missing,
-                'message': f"{len(cols_with_missing)} columns have missing values"
-            })
-        
-        # Check for duplicates
-        if self.df.duplicated().sum() > 0:
-            suggestions.append({
-                'action': 'remove_duplicates',
-                'message': f"{self.df.duplicated().sum()} duplicate rows found"
-            })
+    @tracked
+    def suggest_cleaning(self, time_budget=1.0, sample_threshold=1_000_000, sample_size=200_000):
+        """Suggest cleaning operations based on data analysis
         
-        # Check for outliers in numeric columns
-        numeric_cols = self.df.select_dtypes(include=['int64', 'float64']).columns
-        if len(numeric_cols) > 0:
-            suggestions.append({
-                'action': 'check_outliers',
-                'columns': numeric_cols.tolist(),
-                'message': f"Potential outliers in {len(numeric_cols)} numeric columns"
-            })
-        
-        return suggestions
+        Nulls, duplicates, cardinality, type hints and outlier counts come
+        from one pass over the columns. Frames above sample_threshold rows
+        are profiled on a stratified sample of sample_size rows, and
+        analysis stops after time_budget seconds.
+        """
+        engine = SuggestionEngine(sample_threshold=sample_threshold, sample_size=sample_size,
+                                  time_budget=time_budget)
+        return engine.suggest(self.df)
     
     def get_changes_log(self):
         """Return list of changes made"""
         return self.changes_log
     
+    def get_memory_log(self):
+        """Return bytes allocated by each operation (needs track_memory=True)"""
+        return self.memory_log
+    
+    def get_metrics(self):
+        """Return timing and shape records of profiled operations"""
+        return self.metrics
+    
     def get_cleaned_data(self):
         """Return cleaned dataframe"""
         return self.df
\ No newline at end of file
@@ -0,0 +1,128 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from modules.memory import frame_nbytes, share_frame
+
+
+def _json_default(value):
+    """JSON form of the non-standard values operation parameters carry"""
+    if isinstance(value, (pd.Index, pd.Series, np.ndarray, set, frozenset)):
+        return list(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def to_json(params):
+    return json.dumps(params, sort_keys=True, default=_json_default)
+
+
+def operation_hash(parent, name, params):
+    """Hash identifying the data after applying an operation to parent's state
+
+    The parent hash chains every step to the input data and all steps
+    before it, so equal hashes mean equal results.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update((parent or '').encode('utf-8'))
+    digest.update(name.encode('utf-8'))
+    digest.update(to_json(params).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class OperationLog:
+    """Ordered record of the operations applied to a dataset
+
+    root is the fingerprint of the input data. Each entry holds the step
+    number, operation name, parameters and the chained operation hash.
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+        self.entries = []
+
+    @property
+    def head(self):
+        """Hash of the current state (the root before any operation)"""
+        return self.entries[-1]['hash'] if self.entries else self.root
+
+    def append(self, name, params):
+        entry = {
+            'step': len(self.entries) + 1,
+            'operation': name,
+            'params': params,
+            'hash': operation_hash(self.head, name, params),
+        }
+        self.entries.append(entry)
+        return entry
+
+    def records(self):
+        """JSON-safe copies of the entries, for storage and replay"""
+        return [dict(entry, params=json.loads(to_json(entry['params']))) for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CheckpointCache:
+    """LRU cache of intermediate cleaning states, capped by frame memory
+
+    Keys are operation hashes. A state is the frame (a copy-on-write
+    view), the changes log up to that step and the column statistics.
+    """
+
+    def __init__(self, max_bytes=1 << 30):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # hash -> (frame, changes, stats, nbytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        df, changes, stats, _ = entry
+        return share_frame(df, copy=False), list(changes), stats.copy() if stats is not None else None
+
+    def put(self, key, df, changes, stats=None):
+        nbytes = frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            return
+        entry = (share_frame(df, copy=False), tuple(changes),
+                 stats.copy() if stats is not None else None, nbytes)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[3]
+            self._entries[key] = entry
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted[3]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_checkpoint_cache(max_bytes=1 << 30):
+    """Process-wide checkpoint cache (created on first use)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = CheckpointCache(max_bytes=max_bytes)
+        return _default_cache
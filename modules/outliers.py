@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+from modules.column_stats import dataset_fingerprint
+
+# Fitted detectors and their per-row scores, keyed by (data fingerprint,
+# columns, settings); capped by entry count and by the bytes the scores use
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+MAX_CACHED_MODELS = 8
+MAX_CACHED_SCORE_BYTES = 256 << 20
+
+
+class OutlierDetector:
+    """Isolation Forest fitted on a bounded sample and scored in parallel
+
+    The forest is fitted on at most fit_sample_size rows. Scoring runs over
+    chunk_size row blocks on n_jobs threads. Scores are anomaly scores
+    (higher means more unusual), so any contamination level is just a
+    threshold on them and never needs a refit.
+    """
+
+    def __init__(self, fit_sample_size=100_000, chunk_size=100_000, n_jobs=-1, random_state=42):
+        self.fit_sample_size = fit_sample_size
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.model = None
+
+    def fit(self, X):
+        X = np.asarray(X)
+        if len(X) > self.fit_sample_size:
+            rng = np.random.default_rng(self.random_state)
+            X = X[rng.choice(len(X), self.fit_sample_size, replace=False)]
+        self.model = IsolationForest(random_state=self.random_state)
+        self.model.fit(X)
+        return self
+
+    def score(self, X):
+        """Anomaly score for every row of X"""
+        X = np.asarray(X)
+        if len(X) <= self.chunk_size:
+            return -self.model.score_samples(X)
+        # Tree traversal releases the GIL, so threads avoid copying X
+        parts = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(self.model.score_samples)(X[start:start + self.chunk_size])
+            for start in range(0, len(X), self.chunk_size)
+        )
+        return -np.concatenate(parts)
+
+
+def threshold_for(scores, contamination):
+    """Score above which the given fraction of rows counts as outliers"""
+    return np.quantile(scores, 1 - contamination)
+
+
+def clear_cache():
+    """Forget cached fits, e.g. to time a cold run"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cached_bytes():
+    return sum(scores.nbytes for _, scores in _cache.values())
+
+
+def outlier_scores(df, columns, fingerprint=None, **detector_kwargs):
+    """Anomaly scores for df[columns], reusing a cached fit when possible"""
+    X = df[columns]
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(X)
+    # n_jobs changes how fast scores are computed, not what they are
+    settings = {name: value for name, value in detector_kwargs.items() if name != 'n_jobs'}
+    key = (fingerprint, tuple(columns), tuple(sorted(settings.items())))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    if cached is not None:
+        return pd.Series(cached[1], index=df.index, name='anomaly_score')
+
+    values = X.to_numpy(dtype=np.float64)
+    detector = OutlierDetector(**detector_kwargs).fit(values)
+    scores = detector.score(values)
+    # Shared with later callers through the cache
+    scores.flags.writeable = False
+    if scores.nbytes <= MAX_CACHED_SCORE_BYTES:
+        with _cache_lock:
+            _cache[key] = (detector, scores)
+            _cache.move_to_end(key)
+            while len(_cache) > MAX_CACHED_MODELS or _cached_bytes() > MAX_CACHED_SCORE_BYTES:
+                _cache.popitem(last=False)
+    return pd.Series(scores, index=df.index, name='anomaly_score')
@@ -0,0 +1,72 @@
+import os
+from joblib import Parallel, delayed
+
+
+def _apply(func, series):
+    """Run func on one column, returning (result, error) instead of raising"""
+    try:
+        return func(series), None
+    except Exception as e:
+        return None, e
+
+
+class ColumnExecutor:
+    """Runs independent per-column transformations across a worker pool
+
+    The default threading backend shares the frame's memory with the
+    workers and suits work that releases the GIL (numeric casts, fills,
+    hashing). backend='loky' uses processes for GIL-bound work such as
+    parsing text into dates, at the cost of sending each column to its
+    worker. Frames shorter than min_rows, or with a single column to
+    process, are handled in the calling thread.
+    """
+
+    def __init__(self, n_jobs=-1, backend='threading', min_rows=50_000):
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.min_rows = min_rows
+
+    @property
+    def workers(self):
+        if self.n_jobs is None or self.n_jobs < 0:
+            return os.cpu_count() or 1
+        return max(1, self.n_jobs)
+
+    def parallel(self, df, n_columns):
+        """Whether work on n_columns columns of df would use the pool"""
+        return self.workers > 1 and n_columns > 1 and len(df) >= self.min_rows
+
+    def map(self, df, funcs):
+        """Run {column: func(series)} and return ({column: result}, {column: error})
+
+        Every column is attempted; a failing column is reported in the
+        errors instead of stopping the others.
+        """
+        columns = list(funcs)
+        if self.parallel(df, len(columns)):
+            outcomes = Parallel(n_jobs=min(self.workers, len(columns)), backend=self.backend)(
+                delayed(_apply)(funcs[col], df[col]) for col in columns
+            )
+        else:
+            outcomes = [_apply(funcs[col], df[col]) for col in columns]
+        results, errors = {}, {}
+        for col, (result, error) in zip(columns, outcomes):
+            if error is None:
+                results[col] = result
+            else:
+                errors[col] = error
+        return results, errors
+
+    def apply(self, df, funcs):
+        """Replace columns of df with func(series); returns (new frame, errors)
+
+        The new frame shares every untouched column with df (no copy);
+        only successfully transformed columns are swapped in.
+        """
+        results, errors = self.map(df, funcs)
+        if not results:
+            return df, errors
+        out = df.copy(deep=False)
+        for col, series in results.items():
+            out[col] = series
+        return out, errors
@@ -0,0 +1,212 @@
+import os
+import json
+import uuid
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from modules.storage import write_dataset
+
+logger = logging.getLogger(__name__)
+
+# Job states reported by PersistenceQueue.status
+QUEUED, WRITING, SAVED, FAILED = 'queued', 'writing', 'saved', 'failed'
+MAX_TRACKED_JOBS = 1000
+
+
+class PersistenceQueue:
+    """Write-behind saving of cleaning results
+
+    submit() journals the job and returns at once; a worker thread writes
+    the result file and inserts the history rows of every job finished in
+    the same round in one transaction. The queue holds at most max_pending
+    jobs, so submit() blocks when the worker falls that far behind.
+
+    With an ArtifactStore, jobs submitted without a file path are saved
+    in the store under their content hash, and the store's quota is
+    checked after every round (see ArtifactStore.maybe_enforce_quota).
+
+    Each job has a journal entry in journal_dir until its history row is
+    stored. After a restart, recover() inserts the rows of jobs whose file
+    was fully written and marks the rest failed, since their data was
+    only in memory.
+    """
+
+    def __init__(self, db, journal_dir=os.path.join("data", "pending"), max_pending=8, batch_size=32,
+                 store=None):
+        self.db = db
+        self.store = store
+        self.journal_dir = journal_dir
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._status = OrderedDict()
+        self._status_lock = threading.Lock()
+        os.makedirs(journal_dir, exist_ok=True)
+        self.recover()
+        self._worker = threading.Thread(target=self._run, name="autoclean-persistence", daemon=True)
+        self._worker.start()
+
+    def submit(self, df, user_id, original_shape, cleaning_notes, cleaned_file_path=None, operations=None):
+        """Queue a result for saving and return its job id
+        
+        operations are the session's operation log records, stored with
+        the history row.
+        """
+        if cleaned_file_path is None and self.store is None:
+            raise ValueError("A file path is required without an artifact store")
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'user_id': user_id,
+            'original_shape': original_shape,
+            'cleaned_shape': str(df.shape),
+            'cleaning_notes': cleaning_notes,
+            'cleaned_file_path': cleaned_file_path,
+            'operations': operations or [],
+        }
+        self._journal(job)
+        self._set_status(job['job_id'], QUEUED)
+        self._queue.put((job, df))
+        return job['job_id']
+
+    def status(self, job_id):
+        """{'state': queued/writing/saved/failed, 'error': message or None}"""
+        with self._status_lock:
+            return self._status.get(job_id, {'state': FAILED, 'error': "Unknown job"})
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def wait(self, timeout=None):
+        """Block until every queued job has been processed"""
+        with self._queue.all_tasks_done:
+            if self._queue.unfinished_tasks:
+                self._queue.all_tasks_done.wait(timeout)
+        return self._queue.unfinished_tasks == 0
+
+    def recover(self):
+        """Finish or fail the jobs journaled before a restart"""
+        jobs = []
+        for name in os.listdir(self.journal_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.journal_dir, name)) as f:
+                    jobs.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable persistence journal entry {name}: {e}")
+        if not jobs:
+            return 0
+        written = [job for job in jobs if job.get('written')]
+        for job in jobs:
+            if not job.get('written'):
+                if job['cleaned_file_path'] is not None:
+                    self._remove(_partial_path(job['cleaned_file_path']))
+                self._finish(job, FAILED, "Interrupted before the result file was written")
+        if written and not self._store(written):
+            return 0
+        logger.info(f"Recovered {len(written)} of {len(jobs)} pending result saves")
+        return len(written)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                written = [job for job, df in batch if self._write(job, df)]
+                if written:
+                    self._store(written)
+                if self.store is not None:
+                    self.store.maybe_enforce_quota()
+            except Exception as e:
+                logger.error(f"Persistence worker error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, job, df):
+        """Write the result file via a temporary name; False on failure"""
+        self._set_status(job['job_id'], WRITING)
+        path = job['cleaned_file_path']
+        try:
+            if path is None:
+                job['cleaned_file_path'] = self.store.put(df)
+            else:
+                partial = _partial_path(path)
+                try:
+                    write_dataset(df, partial)
+                    os.replace(partial, path)
+                finally:
+                    self._remove(partial)
+        except Exception as e:
+            logger.error(f"Error writing {path or 'artifact'}: {e}")
+            self._finish(job, FAILED, str(e))
+            return False
+        job['written'] = True
+        self._journal(job)
+        return True
+
+    def _store(self, jobs):
+        """Insert the history rows of written jobs in one transaction"""
+        records = [
+            {key: job.get(key) for key in ('user_id', 'original_shape', 'cleaned_shape',
+                                          'cleaning_notes', 'cleaned_file_path', 'operations')}
+            for job in jobs
+        ]
+        saved = self.db.save_cleaning_history_batch(records)
+        for job in jobs:
+            if saved:
+                self._finish(job, SAVED)
+            else:
+                # Keep the journal entry so the next start retries the insert
+                self._set_status(job['job_id'], FAILED, "Could not save cleaning history")
+        return saved
+
+    def _finish(self, job, state, error=None):
+        self._set_status(job['job_id'], state, error)
+        self._remove(self._journal_path(job['job_id']))
+
+    def _set_status(self, job_id, state, error=None):
+        with self._status_lock:
+            self._status[job_id] = {'state': state, 'error': error}
+            self._status.move_to_end(job_id)
+            while len(self._status) > MAX_TRACKED_JOBS:
+                self._status.popitem(last=False)
+
+    def _journal_path(self, job_id):
+        return os.path.join(self.journal_dir, f"{job_id}.json")
+
+    def _journal(self, job):
+        path = self._journal_path(job['job_id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(job, f)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _partial_path(path):
+    # Keep the extension last so write_dataset still picks the format from it
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.partial{ext}"
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_persistence_queue(db, **kwargs):
+    """Process-wide persistence queue (created, and recovered, on first use)"""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = PersistenceQueue(db, **kwargs)
+        return _default_queue
@@ -0,0 +1,171 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from modules.column_stats import dataset_fingerprint
+from modules.memory import frame_nbytes
+from modules.suggestions import stratified_sample
+
+COMPARISON = re.compile(r"\s*(>=|<=|!=|>|<|=)\s*(-?[\d.]+(?:e-?\d+)?)\s*", re.IGNORECASE)
+OPERATORS = {
+    '>': np.greater, '>=': np.greater_equal, '<': np.less,
+    '<=': np.less_equal, '=': np.equal, '!=': np.not_equal,
+}
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return frame_nbytes(value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 0
+
+
+def filter_mask(series, query):
+    """Rows of series matching query, as a boolean array
+
+    Numeric columns accept a comparison such as '> 10' or '!= 0'; anything
+    else is a case-insensitive substring match on the displayed value.
+    Raises ValueError for a comparison with a malformed number ('> 1.2.3').
+    """
+    match = COMPARISON.fullmatch(query) if pd.api.types.is_numeric_dtype(series) else None
+    if match:
+        try:
+            bound = float(match.group(2))
+        except ValueError:
+            raise ValueError(f"'{match.group(2)}' is not a number") from None
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            return OPERATORS[match.group(1)](values, bound)
+    text = series.astype(str).str.contains(query, case=False, regex=False)
+    return text.fillna(False).to_numpy(dtype=bool)
+
+
+class PageCache:
+    """LRU cache of preview row orders, filter results and pages
+
+    Entries are keyed by dataset version first, so views of the same data
+    are shared across reruns and sessions; the cache is capped by the
+    memory its arrays and page frames use.
+    """
+
+    def __init__(self, max_bytes=256 << 20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        nbytes = _nbytes(value)
+        if nbytes > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+class FramePreview:
+    """Paginated, server-side window over a frame
+
+    Only the rows of the requested page are taken out of the frame. A sort
+    is kept as the row positions in sorted order (computed once per column
+    and direction) and a filter as the positions it matches, so paging
+    through a sorted or filtered view never sorts or copies the frame
+    again. version identifies the data (e.g. an upload key or operation
+    hash); without it the content is hashed.
+    """
+
+    def __init__(self, df, version=None, cache=None):
+        self.df = df
+        self.version = version or dataset_fingerprint(df)
+        self.cache = cache if cache is not None else get_page_cache()
+
+    def _cached(self, key, compute):
+        key = (self.version,) + key
+        value = self.cache.get(key)
+        if value is None:
+            value = self.cache.put(key, compute())
+        return value
+
+    def _order(self, column, ascending):
+        def compute():
+            series = self.df[column].reset_index(drop=True)
+            return series.sort_values(ascending=ascending, kind='stable',
+                                      na_position='last').index.to_numpy()
+        return self._cached(('order', column, ascending), compute)
+
+    def _matches(self, column, query):
+        return self._cached(('filter', column, query), lambda: filter_mask(self.df[column], query))
+
+    def positions(self, sort_by=None, ascending=True, filter_column=None, query=None):
+        """Row positions of the view in display order (None: all rows as stored)"""
+        filtered = filter_column is not None and bool(query)
+        if sort_by is None and not filtered:
+            return None
+
+        def compute():
+            order = self._order(sort_by, ascending) if sort_by is not None else None
+            if not filtered:
+                return order
+            mask = self._matches(filter_column, query)
+            return order[mask[order]] if order is not None else np.flatnonzero(mask)
+        return self._cached(('view', sort_by, ascending, filter_column, query), compute)
+
+    def row_count(self, **view):
+        positions = self.positions(**view)
+        return len(self.df) if positions is None else len(positions)
+
+    def page_count(self, page_size=100, **view):
+        return max(1, -(-self.row_count(**view) // page_size))
+
+    def page(self, number, page_size=100, **view):
+        """Rows of page `number` (from 0) of the view, with their original index"""
+        def compute():
+            start = number * page_size
+            positions = self.positions(**view)
+            if positions is None:
+                # A copy, so the cached page does not pin the whole frame
+                return self.df.iloc[start:start + page_size].copy()
+            return self.df.iloc[positions[start:start + page_size]]
+        key = tuple(sorted(view.items()))
+        return self._cached(('page', number, page_size, key), compute)
+
+    def sample(self, size=1000):
+        """Stratified sample across the whole frame, in stored order"""
+        if len(self.df) <= size:
+            return self.df
+        return self._cached(('sample', size), lambda: stratified_sample(self.df, size))
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_page_cache(max_bytes=256 << 20):
+    """Process-wide preview cache (created on first use)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PageCache(max_bytes=max_bytes)
+        return _default_cache
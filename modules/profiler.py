@@ -0,0 +1,364 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from modules.column_stats import HyperLogLog, dataset_fingerprint
+from modules.dedup import value_hashes
+from modules.suggestions import stratified_sample
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+CHUNK_ROWS = 1_000_000
+
+
+class QuantileSketch:
+    """Mergeable approximate quantiles (a KLL-style compactor stack)
+
+    Each level holds at most k values, each standing for 2**level original
+    ones. A full level is sorted and every other value (from a random
+    offset) moves up one level, so memory stays around k * log(n / k)
+    values and rank error around 1 / k.
+    """
+
+    def __init__(self, k=4096, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def merge(self, other):
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.count += other.count
+        self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self.k:
+                values = np.sort(values)
+                # An odd value out stays behind so weights stay exact
+                even = len(values) - len(values) % 2
+                kept, values = values[even:], values[:even]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                promoted = values[self._rng.integers(2)::2]
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs):
+        if not self.count:
+            return [np.nan for _ in qs]
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_values), 1 << level, dtype=np.int64)
+                                  for level, level_values in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, ranks = values[order], np.cumsum(weights[order])
+        positions = np.searchsorted(ranks, np.asarray(qs) * ranks[-1], side='left')
+        return values[np.minimum(positions, len(values) - 1)].tolist()
+
+
+class CountMinSketch:
+    """Approximate counts of 64-bit hashes in depth x width counters
+
+    Each row indexes its counters with a different 16-bit slice of the
+    hash; estimates never undercount and overcount by about n / width.
+    """
+
+    def __init__(self, width=1 << 14, depth=4):
+        if width > 1 << 16 or depth > 4:
+            raise ValueError("CountMinSketch supports up to 4 rows of 65536 counters")
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _indexes(self, hashes):
+        return [((hashes >> np.uint64(16 * row)) % np.uint64(self.width)).astype(np.int64)
+                for row in range(self.depth)]
+
+    def add(self, hashes, counts):
+        for row, index in enumerate(self._indexes(hashes)):
+            np.add.at(self.table[row], index, counts)
+
+    def estimate(self, hashes):
+        return np.min([self.table[row][index] for row, index in enumerate(self._indexes(hashes))], axis=0)
+
+
+class TopK:
+    """Most frequent values of a column, counted with a count-min sketch
+
+    Each chunk's distinct values are counted exactly and added to the
+    sketch; the k * 2 best candidates by estimated count are carried to
+    the next chunk, so memory stays bounded however many distinct values
+    the column has.
+    """
+
+    def __init__(self, k=10, width=1 << 14):
+        self.k = k
+        self.sketch = CountMinSketch(width=width)
+        self.candidates = {}  # hash -> value
+
+    def update(self, values, hashes):
+        """Count a chunk (a Series) given its hashes; returns the distinct hashes"""
+        # Factorizing the carried candidates along with the chunk numbers
+        # the chunk's values first (in order of appearance) and appends
+        # the candidates it does not contain
+        carried = np.fromiter(self.candidates, dtype=np.uint64, count=len(self.candidates))
+        codes, pool = pd.factorize(np.concatenate([hashes, carried]))
+        codes = codes[:len(hashes)]
+        seen = int(codes.max()) + 1 if len(codes) else 0
+        counts = np.bincount(codes, minlength=seen)
+        first = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+        uniques = pool[:seen]
+        self.sketch.add(uniques, counts)
+
+        estimates = self.sketch.estimate(pool)
+        keep = min(len(pool), self.k * 2)
+        best = np.argpartition(-estimates, keep - 1)[:keep] if keep else []
+        # Only values new to the candidates are taken out of the chunk
+        new = [i for i in best if i < seen and int(pool[i]) not in self.candidates]
+        picked = dict(zip(new, values.iloc[first[new]].tolist())) if new else {}
+        candidates = {}
+        for i in best:
+            key = int(pool[i])
+            candidates[key] = picked[i] if i in picked else self.candidates[key]
+        self.candidates = candidates
+        return uniques
+
+    def top(self):
+        """[(value, estimated count)] for the k most frequent values"""
+        if not self.candidates:
+            return []
+        hashes = np.fromiter(self.candidates, dtype=np.uint64, count=len(self.candidates))
+        estimates = self.sketch.estimate(hashes)
+        order = np.argsort(-estimates, kind='stable')[:self.k]
+        return [(self.candidates[int(hashes[i])], int(estimates[i])) for i in order]
+
+
+def _histogram(values, lo, hi, bins):
+    """Counts in `bins` equal-width bins spanning [lo, hi]"""
+    if hi == lo:
+        counts = np.zeros(bins, dtype=np.int64)
+        counts[0] = len(values)
+        return counts
+    index = ((values - lo) * (bins / (hi - lo))).astype(np.int64)
+    return np.bincount(np.minimum(index, bins - 1), minlength=bins)
+
+
+def _kind(series):
+    if pd.api.types.is_bool_dtype(series):
+        return 'boolean'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    return 'text'
+
+
+def profile_column(series, bins=30, top_k=10, chunk_rows=CHUNK_ROWS):
+    """Profile of one column as a plain dict (see DatasetProfile)"""
+    kind = _kind(series)
+    missing = int(series.isna().sum())
+    profile = {
+        'column': series.name,
+        'dtype': str(series.dtype),
+        'kind': kind,
+        'count': len(series) - missing,
+        'missing': missing,
+        'missing_pct': 100 * missing / len(series) if len(series) else 0.0,
+    }
+    values = series.dropna() if missing else series
+    if kind == 'datetime':
+        # Integer ticks in the column's own unit (UTC for aware columns)
+        unit = values.dt.unit
+        numbers = values.array.asi8.astype(np.float64)
+    elif kind == 'numeric':
+        numbers = values.to_numpy(dtype=np.float64)
+        numbers = numbers[np.isfinite(numbers)]
+    else:
+        numbers = None
+
+    distinct = HyperLogLog()
+    top = TopK(k=top_k) if kind != 'numeric' or pd.api.types.is_integer_dtype(series) else None
+    sketch = QuantileSketch() if numbers is not None else None
+    for start in range(0, len(values), chunk_rows):
+        chunk = values.iloc[start:start + chunk_rows]
+        hashes = value_hashes(chunk)
+        if top is not None:
+            # Repeated hashes don't change a HyperLogLog, so only the
+            # chunk's distinct values are added
+            distinct.add_hashes(top.update(chunk, hashes))
+        else:
+            distinct.add_hashes(hashes)
+        if sketch is not None:
+            sketch.update(numbers[start:start + chunk_rows])
+    profile['distinct'] = distinct.count()
+    profile['top_values'] = top.top() if top is not None else []
+
+    if numbers is not None and len(numbers):
+        lo, hi = float(numbers.min()), float(numbers.max())
+        counts = _histogram(numbers, lo, hi, bins)
+        edges = np.linspace(lo, hi, bins + 1)
+        quantiles = sketch.quantiles(QUANTILES)
+        if kind == 'datetime':
+            as_time = lambda value: pd.Timestamp(int(value), unit=unit, tz=values.dt.tz)
+            edges = [as_time(edge) for edge in edges]
+            profile.update(min=as_time(lo), max=as_time(hi),
+                           quantiles={q: as_time(value) for q, value in zip(QUANTILES, quantiles)})
+        else:
+            profile.update(
+                min=lo, max=hi,
+                mean=float(numbers.mean()),
+                std=float(numbers.std(ddof=1)) if len(numbers) > 1 else np.nan,
+                zeros=int(np.count_nonzero(numbers == 0)),
+                quantiles=dict(zip(QUANTILES, quantiles)),
+            )
+        profile['histogram'] = (counts, list(edges))
+    return profile
+
+
+class DatasetProfile:
+    """Profiling report for a frame, built without leaving pandas/numpy
+
+    columns maps each column name to its profile dict: counts, missing
+    values, approximate distinct count and top values for every column;
+    min/max, approximate quantiles and an equal-width histogram for
+    numeric and datetime ones, plus mean, std and zeros for numbers.
+    correlations is the Pearson matrix of numeric columns on a sample.
+    """
+
+    def __init__(self, columns, correlations, n_rows, sample_rows, seconds):
+        self.columns = columns
+        self.correlations = correlations
+        self.n_rows = n_rows
+        self.sample_rows = sample_rows
+        self.seconds = seconds
+
+    def summary(self):
+        """One row per column, for display"""
+        rows = []
+        for profile in self.columns.values():
+            quantiles = profile.get('quantiles', {})
+            rows.append({
+                'Column': profile['column'],
+                'Type': profile['dtype'],
+                'Missing': profile['missing'],
+                'Missing %': round(profile['missing_pct'], 2),
+                'Distinct (approx.)': profile['distinct'],
+                'Min': profile.get('min'),
+                'Median (approx.)': quantiles.get(0.5),
+                'Max': profile.get('max'),
+                'Mean': profile.get('mean'),
+            })
+        return pd.DataFrame(rows)
+
+    def histogram(self, column):
+        return histogram_frame(self.columns[column])
+
+    def top_values(self, column):
+        return top_values_frame(self.columns[column])
+
+
+def histogram_frame(profile):
+    """A column profile's histogram as counts indexed by bin start"""
+    counts, edges = profile['histogram']
+    return pd.DataFrame({'count': counts}, index=pd.Index(edges[:-1], name=f"{profile['column']} (bin start)"))
+
+
+def top_values_frame(profile):
+    return pd.DataFrame(profile['top_values'], columns=['value', 'count (approx.)'])
+
+
+def _correlations(df):
+    """Pearson correlations; one matrix product when nothing is missing"""
+    values = df.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.isnan(values).any():
+        return df.corr()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.corrcoef(values, rowvar=False)
+    return pd.DataFrame(matrix, index=df.columns, columns=df.columns)
+
+
+def build_profile(df, bins=30, top_k=10, correlation_sample=100_000, n_jobs=None):
+    """Profile every column of df in parallel threads
+
+    Numpy releases the GIL for the heavy per-column work (hashing numeric
+    data, binning, sorting sketch levels), so columns run concurrently.
+    Correlations use a stratified sample of correlation_sample rows.
+    """
+    started = time.perf_counter()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        profiles = list(pool.map(lambda col: profile_column(df[col], bins=bins, top_k=top_k), df.columns))
+
+    numeric = [col for col in df.columns if _kind(df[col]) == 'numeric']
+    sample = df if len(df) <= correlation_sample else stratified_sample(df, correlation_sample)
+    correlations = _correlations(sample[numeric]) if len(numeric) > 1 else pd.DataFrame()
+    return DatasetProfile(
+        columns=dict(zip(df.columns, profiles)),
+        correlations=correlations,
+        n_rows=len(df),
+        sample_rows=len(sample),
+        seconds=time.perf_counter() - started,
+    )
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+MAX_CACHED_PROFILES = 8
+
+
+def get_profile(df, fingerprint=None, **kwargs):
+    """Profile of df, built once per content and options"""
+    key = (fingerprint or dataset_fingerprint(df), tuple(sorted(kwargs.items())))
+    with _cache_lock:
+        profile = _cache.get(key)
+        if profile is not None:
+            _cache.move_to_end(key)
+            return profile
+    profile = build_profile(df, **kwargs)
+    with _cache_lock:
+        _cache[key] = profile
+        if len(_cache) > MAX_CACHED_PROFILES:
+            _cache.popitem(last=False)
+    return profile
+
+
+_column_cache = OrderedDict()
+MAX_CACHED_COLUMN_PROFILES = 64
+
+
+def get_column_profile(df, column, fingerprint=None, **kwargs):
+    """Profile of one column of df, built once per content, column and options
+
+    Taken from the full profile when get_profile() already built it.
+    """
+    fingerprint = fingerprint or dataset_fingerprint(df)
+    options = tuple(sorted(kwargs.items()))
+    key = (fingerprint, column, options)
+    with _cache_lock:
+        report = _cache.get((fingerprint, options))
+        if report is not None:
+            return report.columns[column]
+        profile = _column_cache.get(key)
+        if profile is not None:
+            _column_cache.move_to_end(key)
+            return profile
+    profile = profile_column(df[column], **kwargs)
+    with _cache_lock:
+        _column_cache[key] = profile
+        if len(_column_cache) > MAX_CACHED_COLUMN_PROFILES:
+            _column_cache.popitem(last=False)
+    return profile
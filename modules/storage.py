@@ -0,0 +1,108 @@
+import os
+import io
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar formats need pyarrow
+    pa = None
+
+# Extensions accepted by the uploader and the loaders below
+CSV_EXTENSIONS = ('.csv',)
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+UPLOAD_TYPES = ['csv', 'xlsx', 'parquet', 'feather', 'arrow']
+
+
+def columnar_available():
+    """Whether Parquet/Arrow support (pyarrow) is installed"""
+    return pa is not None
+
+
+def _extension(name):
+    ext = os.path.splitext(str(name))[1].lower()
+    if ext in PARQUET_EXTENSIONS + FEATHER_EXTENSIONS and not columnar_available():
+        raise ImportError(f"Reading and writing {ext} files requires pyarrow")
+    return ext
+
+
+def read_dataset(source, name=None, columns=None):
+    """Load a dataset from a path or uploaded file object
+
+    The format is picked from the file extension (of name, if given).
+    Parquet and Feather files on disk are memory-mapped and only the
+    requested columns are read.
+    """
+    ext = _extension(name if name is not None else getattr(source, 'name', source))
+    if ext in PARQUET_EXTENSIONS:
+        if isinstance(source, (str, os.PathLike)):
+            table = pq.read_table(source, columns=columns, memory_map=True)
+        else:
+            table = pq.read_table(source, columns=columns)
+        return table.to_pandas()
+    if ext in FEATHER_EXTENSIONS:
+        if isinstance(source, (str, os.PathLike)):
+            table = feather.read_table(source, columns=columns, memory_map=True)
+        else:
+            table = feather.read_table(source, columns=columns)
+        return table.to_pandas()
+    if ext in EXCEL_EXTENSIONS:
+        return pd.read_excel(source, usecols=columns)
+    return pd.read_csv(source, usecols=columns)
+
+
+def _arrow_safe(df):
+    """Store mixed-type object columns as strings so Arrow can encode them"""
+    mixed = [
+        col for col in df.select_dtypes(include='object').columns
+        if df[col].dropna().map(type).nunique() > 1
+    ]
+    if mixed:
+        df = df.astype({col: 'string' for col in mixed})
+    return df
+
+
+def write_dataset(df, path, compression='zstd'):
+    """Write a dataset; the format follows the extension of path"""
+    ext = _extension(path)
+    if ext in PARQUET_EXTENSIONS:
+        _arrow_safe(df).to_parquet(path, index=False, compression=compression)
+    elif ext in FEATHER_EXTENSIONS:
+        _arrow_safe(df).reset_index(drop=True).to_feather(path, compression=compression)
+    elif ext in EXCEL_EXTENSIONS:
+        df.to_excel(path, index=False, engine='openpyxl')
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def result_path(directory, stem):
+    """Path for a stored cleaning result, columnar when pyarrow is available"""
+    ext = '.parquet' if columnar_available() else '.csv'
+    return os.path.join(directory, f"{stem}{ext}")
+
+
+def read_schema(path):
+    """Column names of a stored dataset without reading its data"""
+    ext = _extension(path)
+    if ext in PARQUET_EXTENSIONS:
+        return pq.read_schema(path).names
+    if ext in FEATHER_EXTENSIONS:
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).schema.names
+    if ext in EXCEL_EXTENSIONS:
+        return list(pd.read_excel(path, nrows=0).columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def to_bytes(df, fmt):
+    """Serialize a dataset for download; fmt is 'parquet' or 'feather'"""
+    buffer = io.BytesIO()
+    if fmt == 'parquet':
+        _arrow_safe(df).to_parquet(buffer, index=False, compression='zstd')
+    else:
+        _arrow_safe(df).reset_index(drop=True).to_feather(buffer, compression='zstd')
+    return buffer.getvalue()
@@ -0,0 +1,285 @@
+import os
+import shutil
+import tempfile
+import pandas as pd
+import numpy as np
+from modules.cleaner import DataCleaner
+from modules.cleaning_plan import optimize_plan
+from modules.dedup import HashPartitionedDeduplicator
+from modules.fill import fill_spec
+
+
+def _numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class _FillStats:
+    """Running mean/mode statistics for the columns of a fill spec
+
+    Chunks are typed independently, so a column's dtype is only known once
+    every chunk has been seen: chunks without values (all-NaN reads as
+    float64) don't count, and a mean fill whose column turns out not to be
+    numeric becomes a mode fill. Counts from the numeric chunks seen before
+    that are not kept, so such columns are listed in retry() for a second
+    pass with the mode strategy.
+    """
+
+    def __init__(self, fills):
+        self.fills = fills
+        self.strategies = {}
+        self.sums = {}
+        self.counts = {}
+        self.value_counts = {}
+        self.switched = set()
+
+    def _start(self, col, strategy):
+        self.strategies[col] = strategy
+        if strategy == 'mean':
+            self.sums[col], self.counts[col] = 0.0, 0
+        else:
+            self.value_counts[col] = pd.Series(dtype='int64')
+
+    def update(self, chunk):
+        for col, (strategy, _) in self.fills.items():
+            if strategy == 'custom':
+                continue
+            if strategy == 'median':
+                raise ValueError("Median fills need the whole column and are not supported when streaming")
+            series = chunk[col]
+            if col not in self.strategies:
+                self._start(col, 'mode' if strategy == 'mode' else 'mean')
+            if self.strategies[col] == 'mean' and series.count() and not _numeric(series):
+                # Earlier chunks were summed, not counted; see retry()
+                if self.counts[col]:
+                    self.switched.add(col)
+                self._start(col, 'mode')
+            if self.strategies[col] == 'mean':
+                self.sums[col] += series.sum()
+                self.counts[col] += series.count()
+            else:
+                # Kept in order of first appearance in the file, for ties
+                counts = series.value_counts(sort=False)
+                self.value_counts[col] = pd.concat([self.value_counts[col], counts]).groupby(
+                    level=0, sort=False).sum()
+
+    def retry(self):
+        """Fill spec for another pass if some mean fills became mode fills, else None"""
+        if not self.switched:
+            return None
+        return {col: ('mode', None) if col in self.switched else spec
+                for col, spec in self.fills.items()}
+
+    def values(self):
+        """Resolve the fill value for every column that has one
+
+        Columns without a single value have no mean or mode and are left out.
+        """
+        values = {}
+        for col, (strategy, value) in self.fills.items():
+            if strategy == 'custom':
+                values[col] = value
+            elif self.strategies.get(col) == 'mean':
+                if self.counts[col]:
+                    values[col] = self.sums[col] / self.counts[col]
+            else:
+                counts = self.value_counts.get(col)
+                if counts is not None and len(counts):
+                    # Ties go to the value seen first; sorting them fails
+                    # on columns that mix types (e.g. str and int)
+                    values[col] = counts.idxmax()
+        return values
+
+    def messages(self, values):
+        """Changes log entries in the same wording as DataCleaner"""
+        messages = []
+        for col, value in values.items():
+            strategy = self.strategies.get(col, 'custom')
+            if strategy == 'mean':
+                messages.append(f"Filled missing values in {col} with mean: {value:.2f}")
+            elif strategy == 'mode':
+                messages.append(f"Filled missing values in {col} with mode: {value}")
+            else:
+                messages.append(f"Filled missing values in {col} with {value}")
+        return messages
+
+
+class StreamingCleaner:
+    """Clean a CSV file chunk by chunk without loading it into memory
+
+    Operations are recorded with the same signatures as DataCleaner and run
+    by run(). Row-local operations are applied to each chunk independently;
+    mean/mode fills and duplicate removal first collect their statistics in
+    an extra pass over the file. Duplicate removal spills row fingerprints
+    to hash partitions under spill_dir, so memory stays flat for any keep.
+    """
+
+    def __init__(self, input_path, chunksize=100_000, spill_dir=None, **read_kwargs):
+        self.input_path = input_path
+        self.chunksize = chunksize
+        self.spill_dir = spill_dir
+        self.read_kwargs = read_kwargs
+        self.changes_log = []
+        self._plan = []
+
+    def remove_duplicates(self, subset=None, keep='first'):
+        """Record duplicate row removal"""
+        self._plan.append(('remove_duplicates', {'subset': subset, 'keep': keep}))
+        return self
+
+    def drop_columns(self, columns_to_drop):
+        """Record dropping of columns"""
+        if isinstance(columns_to_drop, str):
+            columns_to_drop = [columns_to_drop]
+        self._plan.append(('drop_columns', {'columns_to_drop': columns_to_drop}))
+        return self
+
+    def handle_missing_values(self, strategy='drop', columns=None, fill_value=None):
+        """Record missing value handling"""
+        self._plan.append(('handle_missing_values', {
+            'strategy': strategy, 'columns': columns, 'fill_value': fill_value
+        }))
+        return self
+
+    def rename_columns(self, column_mapping):
+        """Record column renaming"""
+        self._plan.append(('rename_columns', {'column_mapping': column_mapping}))
+        return self
+
+    def fill_missing(self, columns, strategy='auto', value=None):
+        """Record per-column missing value filling (median is not supported)"""
+        spec = fill_spec(columns, strategy, value)
+        self._plan.append(('fill', {'fills': spec}))
+        return self
+
+    def change_data_types(self, column_types):
+        """Record data type conversion"""
+        self._plan.append(('change_data_types', {'column_types': column_types}))
+        return self
+
+    def _chunks(self):
+        try:
+            yield from pd.read_csv(self.input_path, chunksize=self.chunksize, **self.read_kwargs)
+        except pd.errors.EmptyDataError:
+            # A zero-byte file has no header and no rows
+            return
+
+    def _header(self):
+        """The input's columns as an empty frame, or None for an empty file"""
+        try:
+            return pd.read_csv(self.input_path, nrows=0, **self.read_kwargs)
+        except pd.errors.EmptyDataError:
+            return None
+
+    def _apply(self, chunk, ops, tally=None):
+        """Run resolved operations on a single chunk"""
+        cleaner = DataCleaner(chunk)
+        for i, (name, arg) in enumerate(ops):
+            rows_before = len(cleaner.df)
+            log_start = len(cleaner.changes_log)
+            if name == 'dedup':
+                cleaner.df = arg.filter(cleaner.df)
+            elif name == 'fill':
+                cleaner._apply_fills(arg['fills'])
+            else:
+                getattr(cleaner, name)(**arg)
+            if tally is not None:
+                tally[i]['removed'] += rows_before - len(cleaner.df)
+                tally[i]['messages'].update(dict.fromkeys(cleaner.changes_log[log_start:]))
+        return cleaner.df
+
+    def _collect(self, ops, stats):
+        """Statistics pass: stream chunks through ops and feed stats"""
+        for name, arg in ops:
+            if name == 'dedup':
+                arg.reset()
+        for chunk in self._chunks():
+            stats.update(self._apply(chunk, ops))
+
+    def _resolve(self, plan, workdir):
+        """Turn operations that need global state into chunk-local ones"""
+        ops = []
+        for name, kwargs in plan:
+            if name == 'handle_missing_values' and kwargs['strategy'] == 'fill':
+                # Fill over all columns; resolve the column list from the data
+                columns = []
+                for chunk in self._chunks():
+                    columns = list(self._apply(chunk.head(0), ops).columns)
+                    break
+                if kwargs['fill_value'] is None:
+                    name, kwargs = 'fill', {'fills': fill_spec(columns)}
+                else:
+                    name, kwargs = 'fill', {'fills': fill_spec(columns, 'custom', kwargs['fill_value'])}
+
+            if name == 'fill' and any(s != 'custom' for s, _ in kwargs['fills'].values()):
+                stats = _FillStats(kwargs['fills'])
+                self._collect(ops, stats)
+                if stats.retry() is not None:
+                    stats = _FillStats(stats.retry())
+                    self._collect(ops, stats)
+                values = stats.values()
+                ops.append(('fill', {
+                    'fills': fill_spec(list(values), 'custom', values),
+                    'messages': stats.messages(values),
+                }))
+            elif name == 'remove_duplicates':
+                dedup = HashPartitionedDeduplicator(
+                    kwargs['subset'], kwargs['keep'], spill_dir=workdir, normalize=True
+                )
+                self._collect(ops, dedup)
+                # Keep the row mask on disk as well
+                dedup.finalize(mask_path=os.path.join(workdir, f"dedup_{len(ops)}.npy"))
+                ops.append(('dedup', dedup))
+            else:
+                ops.append((name, kwargs))
+        return ops
+
+    def run(self, output_path):
+        """Clean the input and write the result to output_path as CSV"""
+        workdir = tempfile.mkdtemp(prefix='autoclean_stream_', dir=self.spill_dir)
+        try:
+            return self._run(output_path, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _run(self, output_path, workdir):
+        ops = self._resolve(optimize_plan(self._plan), workdir)
+        for name, arg in ops:
+            if name == 'dedup':
+                arg.reset()
+
+        tally = [{'removed': 0, 'messages': {}} for _ in ops]
+        rows_in = rows_out = 0
+        header = True
+        for chunk in self._chunks():
+            rows_in += len(chunk)
+            cleaned = self._apply(chunk, ops, tally)
+            cleaned.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+            rows_out += len(cleaned)
+        if header:
+            # No chunks were read: keep the (cleaned) header, if there is one
+            empty = self._header()
+            if empty is None:
+                open(output_path, 'w').close()
+            else:
+                self._apply(empty, ops).to_csv(output_path, index=False)
+
+        self.changes_log = []
+        for (name, arg), counts in zip(ops, tally):
+            removed = counts['removed']
+            if name == 'dedup':
+                if removed > 0:
+                    self.changes_log.append(f"Removed {removed} duplicate rows")
+            elif name == 'handle_missing_values' and arg['strategy'] == 'drop':
+                if removed > 0:
+                    self.changes_log.append(f"Dropped {removed} rows with missing values")
+            elif name == 'fill' and 'messages' in arg:
+                self.changes_log.extend(arg['messages'])
+            else:
+                self.changes_log.extend(counts['messages'])
+
+        return {'rows_in': rows_in, 'rows_out': rows_out, 'output_path': output_path}
+
+    def get_changes_log(self):
+        """Return list of changes made"""
+        return self.changes_log
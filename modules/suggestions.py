@@ -0,0 +1,206 @@
+import time
+import numpy as np
+import pandas as pd
+from modules.cleaner import DATE_PATTERN
+from modules.dedup import value_hashes
+
+# z value for 95% confidence intervals
+Z_95 = 1.96
+
+
+def wilson_interval(hits, n, z=Z_95):
+    """Confidence interval for a proportion estimated from a sample"""
+    if n == 0:
+        return 0.0, 1.0
+    p = hits / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    margin = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def stratified_sample(df, sample_size, strata=100, random_state=42):
+    """Equal-share random sample from each of `strata` contiguous row blocks
+
+    Sampling every block keeps files sorted by time or source represented.
+    """
+    rng = np.random.default_rng(random_state)
+    bounds = np.linspace(0, len(df), strata + 1, dtype=np.int64)
+    per_stratum = max(1, sample_size // strata)
+    positions = [
+        np.sort(rng.choice(np.arange(start, stop), min(per_stratum, stop - start), replace=False))
+        for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+    ]
+    return df.iloc[np.concatenate(positions)]
+
+
+class SuggestionEngine:
+    """Cleaning suggestions from a single, time-budgeted pass over the data
+
+    Each column is visited once to collect its null count, cardinality,
+    type hints and IQR outlier count, while its hash is folded into a
+    running row fingerprint used for duplicate detection. Frames larger
+    than sample_threshold rows are analyzed on a stratified sample, and
+    counts are reported with 95% confidence bounds. Columns still pending
+    when time_budget seconds have passed are skipped and listed in the
+    'incomplete' suggestion.
+    """
+
+    def __init__(self, sample_threshold=1_000_000, sample_size=200_000, time_budget=1.0,
+                 category_ratio=0.05, random_state=42):
+        self.sample_threshold = sample_threshold
+        self.sample_size = sample_size
+        self.time_budget = time_budget
+        self.category_ratio = category_ratio
+        self.random_state = random_state
+
+    def profile(self, df):
+        """Collect per-column statistics and the duplicate count"""
+        start = time.perf_counter()
+        total_rows = len(df)
+        sampled = total_rows > self.sample_threshold
+        data = stratified_sample(df, self.sample_size, random_state=self.random_state) if sampled else df
+        n = len(data)
+
+        columns = {}
+        skipped = []
+        row_hash = np.zeros(n, dtype=np.uint64)
+        for col in data.columns:
+            if time.perf_counter() - start > self.time_budget:
+                skipped.append(col)
+                continue
+            series = data[col]
+            hashes = value_hashes(series)
+            # Fold the column hash into the row fingerprint
+            row_hash = (row_hash * np.uint64(0x100000001B3)) ^ hashes
+            columns[col] = self._profile_column(series, hashes)
+
+        duplicates = None
+        if not skipped:
+            duplicates = n - len(pd.unique(row_hash))
+
+        return {
+            'rows': total_rows,
+            'analyzed_rows': n,
+            'sampled': sampled,
+            'columns': columns,
+            'duplicates': duplicates,
+            'skipped': skipped,
+            'elapsed': time.perf_counter() - start,
+        }
+
+    def _profile_column(self, series, hashes):
+        nulls = int(series.isna().sum())
+        non_null = hashes[series.notna().to_numpy()]
+        info = {
+            'dtype': series.dtype,
+            'nulls': nulls,
+            'distinct': len(pd.unique(non_null)),
+            'type_hint': None,
+            'outliers': 0,
+        }
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.dropna().to_numpy(dtype=np.float64)
+            if len(values):
+                q1, q3 = np.percentile(values, [25, 75])
+                spread = 1.5 * (q3 - q1)
+                info['outliers'] = int(((values < q1 - spread) | (values > q3 + spread)).sum())
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            info['type_hint'] = self._type_hint(series.dropna(), info['distinct'], len(series))
+        return info
+
+    def _type_hint(self, values, distinct, rows):
+        """Suggest a better dtype for a text column, if any"""
+        if not len(values):
+            return None
+        probe = values.head(1000)
+        if probe.map(lambda value: isinstance(value, (list, dict, set))).any():
+            # Containers can't become numbers, dates or categories
+            return None
+        probe = probe.astype(str)
+        if pd.to_numeric(probe, errors='coerce').notna().mean() >= 0.95:
+            return 'numeric'
+        if probe.str.match(DATE_PATTERN).mean() >= 0.95:
+            return 'datetime'
+        if distinct <= self.category_ratio * rows:
+            return 'category'
+        return None
+
+    def _scaled(self, hits, profile):
+        """Estimate and 95% bounds for a count seen in the analyzed rows"""
+        if not profile['sampled']:
+            return hits, (hits, hits)
+        n, total = profile['analyzed_rows'], profile['rows']
+        low, high = wilson_interval(hits, n)
+        return int(round(hits / n * total)), (int(low * total), int(np.ceil(high * total)))
+
+    def suggest(self, df):
+        """Suggestions as {'action', 'columns', 'message'} dicts
+
+        Counts from a sample also carry 'estimated': True and, for missing
+        values, per-column (low, high) bounds under 'confidence'.
+        """
+        profile = self.profile(df)
+        columns = profile['columns']
+        suggestions = []
+        estimated = profile['sampled']
+
+        cols_with_missing = [col for col, info in columns.items() if info['nulls'] > 0]
+        if cols_with_missing:
+            suggestions.append({
+                'action': 'handle_missing',
+                'columns': cols_with_missing,
+                'counts': {col: self._scaled(columns[col]['nulls'], profile)[0] for col in cols_with_missing},
+                'confidence': {col: self._scaled(columns[col]['nulls'], profile)[1] for col in cols_with_missing},
+                'estimated': estimated,
+                'message': f"{len(cols_with_missing)} columns have missing values"
+            })
+
+        if profile['duplicates']:
+            if estimated:
+                # Pairs are less likely to both land in the sample, so the
+                # scaled sample count understates the true number
+                message = f"At least ~{self._scaled(profile['duplicates'], profile)[0]} duplicate rows (estimated from a sample)"
+            else:
+                message = f"{profile['duplicates']} duplicate rows found"
+            suggestions.append({
+                'action': 'remove_duplicates',
+                'estimated': estimated,
+                'message': message
+            })
+
+        outlier_cols = [col for col, info in columns.items() if info['outliers'] > 0]
+        if outlier_cols:
+            suggestions.append({
+                'action': 'check_outliers',
+                'columns': outlier_cols,
+                'counts': {col: self._scaled(columns[col]['outliers'], profile)[0] for col in outlier_cols},
+                'estimated': estimated,
+                'message': f"Potential outliers in {len(outlier_cols)} numeric columns (outside 1.5×IQR)"
+            })
+
+        constant_cols = [col for col, info in columns.items() if info['distinct'] <= 1]
+        if constant_cols:
+            suggestions.append({
+                'action': 'drop_columns',
+                'columns': constant_cols,
+                'message': f"{len(constant_cols)} columns hold a single value"
+            })
+
+        type_hints = {col: info['type_hint'] for col, info in columns.items() if info['type_hint']}
+        if type_hints:
+            suggestions.append({
+                'action': 'convert_types',
+                'columns': list(type_hints),
+                'types': type_hints,
+                'message': f"{len(type_hints)} text columns could use a better type"
+            })
+
+        if profile['skipped']:
+            suggestions.append({
+                'action': 'incomplete',
+                'columns': profile['skipped'],
+                'message': f"Time budget reached; {len(profile['skipped'])} columns not analyzed"
+            })
+
+        return suggestions
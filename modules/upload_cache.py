@@ -0,0 +1,168 @@
+import os
+import io
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from modules.memory import frame_nbytes, share_frame
+from modules.storage import read_dataset
+
+
+def upload_key(data, name, **options):
+    """Cache key for an upload: hash of its bytes, its extension and parse options"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(memoryview(data))
+    digest.update(os.path.splitext(str(name))[1].lower().encode('utf-8'))
+    digest.update(repr(sorted(options.items())).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ParsedDatasetCache:
+    """LRU cache of parsed uploads, capped by the memory the frames use
+
+    Frames evicted from memory are pickled to spill_dir (when given), up to
+    max_spill_bytes on disk, and loaded back on their next use instead of
+    re-parsing the upload. Spill files left by an earlier process are
+    adopted on startup, since keys are content hashes. Frames larger than
+    max_bytes are not cached at all. Cached frames are shared between
+    callers, who get copy-on-write views and must not modify them in place.
+    """
+
+    def __init__(self, max_bytes=1 << 30, spill_dir=None, max_spill_bytes=4 << 30):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self._frames = OrderedDict()  # key -> (frame, nbytes)
+        self._spilled = OrderedDict()  # key -> (path, file size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._adopt_spilled()
+
+    @property
+    def nbytes(self):
+        return sum(nbytes for _, nbytes in self._frames.values())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return share_frame(entry[0], copy=False)
+            spilled = self._spilled.pop(key, None)
+        if spilled is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            df = pd.read_pickle(spilled[0])
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        finally:
+            self._remove_file(spilled[0])
+        with self._lock:
+            self.hits += 1
+        self.put(key, df)
+        return share_frame(df, copy=False)
+
+    def put(self, key, df):
+        nbytes = frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            # Would evict everything else and still not fit; spilling it
+            # instead would re-pickle the whole frame on every use
+            return
+        with self._lock:
+            self._frames[key] = (df, nbytes)
+            self._frames.move_to_end(key)
+            evicted = []
+            while self.nbytes > self.max_bytes:
+                evicted.append(self._frames.popitem(last=False))
+        for old_key, (old_df, _) in evicted:
+            self._spill(old_key, old_df)
+
+    def load(self, source, name=None, **options):
+        """Parse an uploaded file, reusing the cached frame for identical bytes
+
+        Returns (frame, key).
+        """
+        name = name if name is not None else getattr(source, 'name', '')
+        data = source.getvalue() if hasattr(source, 'getvalue') else source
+        key = upload_key(data, name, **options)
+        df = self.get(key)
+        if df is None:
+            df = read_dataset(io.BytesIO(data), name=name, **options)
+            self.put(key, df)
+            df = share_frame(df, copy=False)
+        return df, key
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            spilled = list(self._spilled.values())
+            self._spilled.clear()
+        for path, _ in spilled:
+            self._remove_file(path)
+
+    def _adopt_spilled(self):
+        """Register spill files from an earlier process, oldest first"""
+        found = []
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            if name.endswith('.partial'):
+                # Interrupted while spilling
+                self._remove_file(path)
+                continue
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            found.append((info.st_mtime, name[:-len('.pkl')], path, info.st_size))
+        with self._lock:
+            for _, key, path, size in sorted(found):
+                self._spilled[key] = (path, size)
+        self._enforce_spill_quota()
+
+    def _spill(self, key, df):
+        if self.spill_dir is None:
+            return
+        path = os.path.join(self.spill_dir, f"{key}.pkl")
+        partial = f"{path}.{threading.get_ident()}.partial"
+        df.to_pickle(partial)
+        os.replace(partial, path)
+        with self._lock:
+            self._spilled[key] = (path, os.path.getsize(path))
+        self._enforce_spill_quota()
+
+    def _enforce_spill_quota(self):
+        with self._lock:
+            dropped = []
+            while sum(size for _, size in self._spilled.values()) > self.max_spill_bytes:
+                dropped.append(self._spilled.popitem(last=False)[1][0])
+        for old_path in dropped:
+            self._remove_file(old_path)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_upload_cache(max_bytes=1 << 30, spill_dir=None):
+    """Process-wide upload cache, shared by every session (created on first use)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ParsedDatasetCache(max_bytes=max_bytes, spill_dir=spill_dir)
+        return _default_cache
@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pandas as pd
+from modules.artifacts import ArtifactStore
+
+
+class FakeDB:
+    """Reference counts as file_history would report them"""
+
+    def __init__(self):
+        self.refs = {}
+        self.queries = 0
+
+    def get_file_reference_counts(self):
+        self.queries += 1
+        return dict(self.refs)
+
+
+def frame(seed):
+    return pd.DataFrame({'a': np.random.default_rng(seed).normal(size=2000)})
+
+
+def store_files(store, seeds):
+    paths = [store.put(frame(seed)) for seed in seeds]
+    for age, path in enumerate(reversed(paths)):
+        # Oldest first: the first path was used longest ago
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+    return paths
+
+
+def test_unreferenced_files_are_evicted_least_recently_used_first(tmp_path):
+    db = FakeDB()
+    store = ArtifactStore(root=tmp_path, db=db)
+    paths = store_files(store, range(3))
+    store.quota_bytes = os.path.getsize(paths[2]) + 1
+    store.enforce_quota()
+    assert [os.path.exists(path) for path in paths] == [False, False, True]
+
+
+def test_referenced_files_are_never_evicted(tmp_path):
+    db = FakeDB()
+    store = ArtifactStore(root=tmp_path, db=db, quota_bytes=0)
+    paths = store_files(store, range(3))
+    db.refs = {paths[0]: 1, paths[1]: 2}
+    store.enforce_quota()
+    assert [os.path.exists(path) for path in paths] == [True, True, False]
+
+
+def test_quota_check_skips_the_history_scan_when_nothing_changed(tmp_path):
+    db = FakeDB()
+    store = ArtifactStore(root=tmp_path, db=db, quota_bytes=0)
+    paths = store_files(store, range(2))
+    db.refs = {path: 1 for path in paths}
+    store.maybe_enforce_quota()
+    assert db.queries == 1
+    # Still over quota, but nothing new was stored
+    store.maybe_enforce_quota()
+    assert db.queries == 1
+    store.put(frame(5))
+    store.maybe_enforce_quota()
+    assert db.queries == 2
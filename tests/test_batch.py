@@ -0,0 +1,86 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import batch
+from modules.batch import collect_inputs, main, process_file, rss_bytes, run_batch
+
+RECIPE = {'steps': [{'op': 'remove_duplicates'}, {'op': 'fill_missing', 'columns': ['a'], 'strategy': 'mean'}]}
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    root = tmp_path / 'in'
+    (root / 'nested').mkdir(parents=True)
+    for i, path in enumerate([root / 'one.csv', root / 'two.csv', root / 'nested' / 'three.csv']):
+        pd.DataFrame({'a': [1.0, 1.0, np.nan, i], 'b': ['x', 'x', 'y', 'z']}).to_csv(path, index=False)
+    return root
+
+
+def test_pool_cleans_every_file_and_skips_unchanged_ones(inputs, tmp_path):
+    out = tmp_path / 'out'
+    manifest = run_batch(RECIPE, [str(inputs)], str(out), workers=2, fmt='csv')
+    assert manifest['counts'] == {'ok': 3, 'skipped': 0, 'failed': 0}
+    cleaned = pd.read_csv(out / 'nested' / 'three.csv')
+    assert len(cleaned) == 3 and not cleaned['a'].isna().any()
+    assert json.loads((out / 'manifest.json').read_text())['counts'] == manifest['counts']
+
+    assert run_batch(RECIPE, [str(inputs)], str(out), workers=2, fmt='csv')['counts']['skipped'] == 3
+    pd.DataFrame({'a': [5.0], 'b': ['q']}).to_csv(inputs / 'two.csv', index=False)
+    counts = run_batch(RECIPE, [str(inputs)], str(out), workers=2, fmt='csv')['counts']
+    assert counts == {'ok': 1, 'skipped': 2, 'failed': 0}
+    assert run_batch(RECIPE, [str(inputs)], str(out), workers=2, fmt='csv', force=True)['counts']['ok'] == 3
+
+
+def test_failing_file_does_not_stop_the_others(inputs, tmp_path):
+    (inputs / 'broken.parquet').write_bytes(b'not parquet')
+    recipe_path = tmp_path / 'recipe.json'
+    recipe_path.write_text(json.dumps(RECIPE))
+    out = tmp_path / 'out'
+    assert main([str(recipe_path), str(inputs), '-o', str(out), '-w', '2', '--format', 'csv']) == 1
+    files = {os.path.basename(entry['input']): entry for entry in json.loads((out / 'manifest.json').read_text())['files']}
+    assert files['broken.parquet']['status'] == 'failed'
+    assert [files[name]['status'] for name in ('one.csv', 'two.csv', 'three.csv')] == ['ok'] * 3
+    assert not [name for name in os.listdir(out) if '.partial' in name]
+
+
+def test_output_inside_the_inputs_is_not_picked_up(inputs):
+    out = inputs / 'cleaned'
+    run_batch(RECIPE, [str(inputs)], str(out), workers=1, fmt='csv')
+    (inputs / 'stale.partial.csv').write_text('a\n1\n')
+    assert [os.path.relpath(path, inputs) for path in collect_inputs([str(inputs)], exclude=[str(out)])] == \
+        [os.path.join('nested', 'three.csv'), 'one.csv', 'two.csv']
+
+
+def test_streaming_matches_in_memory(inputs, tmp_path):
+    streamed = run_batch(RECIPE, [str(inputs)], str(tmp_path / 's'), workers=2, fmt='csv', stream=True)
+    loaded = run_batch(RECIPE, [str(inputs)], str(tmp_path / 'l'), workers=2, fmt='csv')
+    assert streamed['counts']['ok'] == loaded['counts']['ok'] == 3
+    for name in ('one.csv', 'two.csv', os.path.join('nested', 'three.csv')):
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 's' / name), pd.read_csv(tmp_path / 'l' / name))
+
+
+def test_memory_limit_fails_the_file_not_the_worker(tmp_path, monkeypatch):
+    assert rss_bytes() > 0
+    monkeypatch.setattr(batch, 'MEMORY_POLL_SECONDS', 0.01)
+    rng = np.random.default_rng(0)
+    source = tmp_path / 'big.csv'
+    pd.DataFrame({'a': rng.integers(0, 1000, 300_000), 'b': rng.normal(size=300_000)}).to_csv(source, index=False)
+    steps = RECIPE['steps'] * 3
+
+    entry = process_file(str(source), str(tmp_path / 'out' / 'big.csv'), steps, 'digest', memory_limit=1)
+    assert entry['status'] == 'failed' and entry['error'] == "Worker memory limit exceeded"
+    assert not list(tmp_path.glob('out/*'))
+
+    entry = process_file(str(source), str(tmp_path / 'out' / 'big.csv'), steps, 'digest',
+                         memory_limit=rss_bytes() + (1 << 30))
+    assert entry['status'] == 'ok'
+
+    # Through the process pool: the worker reports the failure and survives
+    manifest = run_batch({'steps': steps}, [str(source)], str(tmp_path / 'pooled'), workers=1,
+                         memory_limit=1, fmt='csv')
+    assert manifest['counts'] == {'ok': 0, 'skipped': 0, 'failed': 1}
+    assert manifest['files'][0]['error'] == "Worker memory limit exceeded"
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+from modules.cleaner import DataCleaner
+from modules.cleaning_plan import optimize_plan
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'a': rng.integers(0, 5, 200).astype(float),
+        'b': rng.choice(['x', 'y', None], 200),
+        'c': rng.integers(0, 3, 200),
+        'd': rng.normal(size=200),
+    })
+    df.loc[::7, 'a'] = np.nan
+    return df
+
+
+def run(df, lazy):
+    cleaner = DataCleaner(df, lazy=lazy)
+    (cleaner.fill_missing('a', 'mean')
+        .drop_columns('d')
+        .fill_missing('b', 'mode')
+        .change_data_types({'c': 'float64'})
+        .remove_duplicates()
+        .remove_duplicates()
+        .rename_columns({'c': 'z'}))
+    return cleaner
+
+
+def test_lazy_matches_eager(frame):
+    eager, lazy = run(frame, False), run(frame, True)
+    tm.assert_frame_equal(lazy.df, eager.df)
+    # The optimizer reorders steps, so only the set of changes must agree
+    assert sorted(lazy.get_changes_log()) == sorted(eager.get_changes_log())
+
+
+def test_every_operation_returns_the_cleaner(frame):
+    for lazy in (False, True):
+        cleaner = DataCleaner(frame, lazy=lazy)
+        assert cleaner.remove_duplicates() is cleaner
+        assert cleaner.fill_missing('a', 'mean') is cleaner
+        assert cleaner.handle_missing_values('drop', columns=['b']) is cleaner
+        assert cleaner.change_data_types({'c': 'float64'}) is cleaner
+        assert cleaner.rename_columns({'c': 'z'}) is cleaner
+        assert cleaner.drop_columns('d') is cleaner
+        assert cleaner.optimize_memory() is cleaner
+
+
+def test_drop_moves_before_column_ops():
+    plan = optimize_plan([
+        ('fill', {'fills': {'a': ('mean', None), 'd': ('mean', None)}}),
+        ('change_data_types', {'column_types': {'d': 'float32'}}),
+        ('drop_columns', {'columns_to_drop': ['d']}),
+    ])
+    assert plan == [
+        ('drop_columns', {'columns_to_drop': ['d']}),
+        ('fill', {'fills': {'a': ('mean', None)}}),
+    ]
+
+
+def test_drop_stays_after_rows_read_by_dedup():
+    plan = optimize_plan([
+        ('remove_duplicates', {'subset': None, 'keep': 'first', 'partitioned': False}),
+        ('drop_columns', {'columns_to_drop': ['d']}),
+    ])
+    assert [name for name, _ in plan] == ['remove_duplicates', 'drop_columns']
+
+
+def test_disjoint_column_ops_fuse():
+    plan = optimize_plan([
+        ('fill', {'fills': {'a': ('mean', None)}}),
+        ('change_data_types', {'column_types': {'c': 'float64'}}),
+        ('fill', {'fills': {'b': ('mode', None)}}),
+        ('change_data_types', {'column_types': {'d': 'float32'}}),
+    ])
+    assert plan == [
+        ('fill', {'fills': {'a': ('mean', None), 'b': ('mode', None)}}),
+        ('change_data_types', {'column_types': {'c': 'float64', 'd': 'float32'}}),
+    ]
+
+
+def test_overlapping_column_ops_keep_order():
+    plan = [
+        ('fill', {'fills': {'a': ('mean', None)}}),
+        ('change_data_types', {'column_types': {'a': 'int64'}}),
+        ('fill', {'fills': {'a': ('custom', 0)}}),
+    ]
+    assert optimize_plan(plan) == plan
+
+
+def test_repeated_dedup_is_skipped():
+    dedup = ('remove_duplicates', {'subset': None, 'keep': 'first', 'partitioned': False})
+    assert optimize_plan([dedup, dedup]) == [dedup]
+
+
+def test_dedup_after_value_change_is_kept():
+    dedup = ('remove_duplicates', {'subset': ['a'], 'keep': 'first', 'partitioned': False})
+    plan = [dedup, ('fill', {'fills': {'a': ('mean', None)}}), dedup]
+    assert optimize_plan(plan) == plan
+
+
+def test_checkpointed_plan_runs_optimized_and_resumes(frame, monkeypatch):
+    from modules.operation_log import CheckpointCache
+
+    runs = []
+    original = DataCleaner._run
+    monkeypatch.setattr(DataCleaner, '_run', lambda self, plan: runs.append(plan) or original(self, plan))
+
+    def lazy_with(checkpoints):
+        cleaner = DataCleaner(frame, lazy=True, checkpoints=checkpoints, fingerprint='input')
+        (cleaner.fill_missing('a', 'mean').drop_columns('d')
+            .fill_missing('b', 'mode').remove_duplicates().remove_duplicates())
+        return cleaner
+
+    checkpoints = CheckpointCache()
+    first = lazy_with(checkpoints)
+    tm.assert_frame_equal(first.df, DataCleaner(frame).fill_missing('a', 'mean').drop_columns('d')
+                          .fill_missing('b', 'mode').remove_duplicates().df)
+    # One run per optimized step: drop, fused fill, a single dedup
+    assert [step for plan in runs for step, _ in plan] == ['drop_columns', 'fill', 'remove_duplicates']
+
+    runs.clear()
+    second = lazy_with(checkpoints)
+    tm.assert_frame_equal(second.df, first.df)
+    assert runs == []
+
+
+
+def test_resumed_fills_log_in_the_same_order(frame):
+    from modules.operation_log import CheckpointCache
+
+    def lazy_with(checkpoints, first, second):
+        cleaner = DataCleaner(frame, lazy=True, checkpoints=checkpoints, fingerprint='input')
+        cleaner.fill_missing(first, 'mode').fill_missing(second, 'mode')
+        cleaner.df
+        return cleaner
+
+    checkpoints = CheckpointCache()
+    fresh = lazy_with(checkpoints, 'b', 'a')
+    # The same fused step recorded in the other order resumes from the
+    # checkpoint, and must log what a fresh run in that order logs
+    resumed = lazy_with(checkpoints, 'a', 'b')
+    uncached = lazy_with(None, 'a', 'b')
+    tm.assert_frame_equal(resumed.df, uncached.df)
+    assert resumed.get_changes_log() == uncached.get_changes_log() == fresh.get_changes_log()
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_fill_of_missing_column_fails_even_if_dropped_later(frame, lazy):
+    cleaner = DataCleaner(frame, lazy=lazy)
+    with pytest.raises(KeyError):
+        cleaner.fill_missing(['a', 'ghost'], 'mode').drop_columns(['ghost', 'd']).df
+
+
+def test_fill_of_dropped_column_is_pruned_with_schema():
+    plan = [('fill', {'fills': {'a': ('mode', None), 'ghost': ('mode', None)}}),
+            ('drop_columns', {'columns_to_drop': ['a', 'ghost']})]
+    assert optimize_plan(plan) == [('drop_columns', {'columns_to_drop': ['a', 'ghost']})]
+    assert optimize_plan(plan, columns=['a', 'b']) == plan
+    assert optimize_plan(plan[:1] + [('drop_columns', {'columns_to_drop': ['a']})], columns=['a', 'b', 'ghost']) == [
+        ('drop_columns', {'columns_to_drop': ['a']}), ('fill', {'fills': {'ghost': ('mode', None)}})]
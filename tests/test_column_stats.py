@@ -0,0 +1,90 @@
+import gc
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from modules.cleaner import DataCleaner
+from modules.column_stats import DatasetStats, dataset_fingerprint, get_dataset_stats
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        'a': rng.integers(0, 50, 500).astype(float),
+        'b': rng.choice(['x', 'y', 'z', None], 500),
+    })
+    df.loc[::11, 'a'] = np.nan
+    # A value that only occurs duplicated, and the extremes
+    df.loc[[0, 1], ['a', 'b']] = [[-1.0, 'only'], [-1.0, 'only']]
+    return df
+
+
+def assert_matches_fresh(stats, df):
+    fresh = DatasetStats(df)
+    assert list(stats.columns) == list(fresh.columns)
+    for col in df.columns:
+        kept, expected = stats.column(col), fresh.column(col)
+        assert kept.null_count == expected.null_count
+        assert kept.count == expected.count
+        assert kept.approx_distinct == expected.approx_distinct
+        assert kept.min == expected.min and kept.max == expected.max
+        if expected.sum is not None:
+            assert kept.sum == pytest.approx(expected.sum)
+
+
+@pytest.mark.parametrize('keep', ['first', 'last', False])
+@pytest.mark.parametrize('subset', [None, ['a']])
+def test_dedup_keeps_stats_current(frame, keep, subset):
+    cleaner = DataCleaner(frame, stats=DatasetStats(frame))
+    cleaner.remove_duplicates(subset=subset, keep=keep)
+    assert_matches_fresh(cleaner.stats, cleaner.df)
+
+
+def test_operation_sequence_keeps_stats_current(frame):
+    cleaner = DataCleaner(frame, stats=DatasetStats(frame))
+    (cleaner.handle_missing_values('drop', columns=['b'])
+        .fill_missing('a', 'median')
+        .rename_columns({'b': 'c'})
+        .remove_duplicates())
+    assert_matches_fresh(cleaner.stats, cleaner.df)
+
+
+def test_stale_stats_without_frame_raise(frame):
+    df = frame.copy()
+    stats = DatasetStats(df)
+    df = df[df['a'] != -1.0]
+    stats.on_rows_removed(df, frame[frame['a'] == -1.0])
+    del df
+    gc.collect()
+    with pytest.raises(ReferenceError):
+        stats.column('a')
+
+
+def test_cached_stats_follow_the_live_frame(frame):
+    stats = get_dataset_stats(frame.copy(), 'fingerprint-for-test')
+    gc.collect()
+    df = frame.copy()
+    assert get_dataset_stats(df, 'fingerprint-for-test') is stats
+    assert stats._df() is df
+
+
+def test_unhashable_values_are_counted_by_their_text():
+    df = pd.DataFrame({'tags': [[1, 2], [1, 2], {'a': 1}, None], 'n': [1, 2, 3, 4]})
+    stats = DatasetStats(df)
+    assert stats.column('tags').approx_distinct == 2
+    assert stats.column('tags').null_count == 1
+    assert dataset_fingerprint(df) == dataset_fingerprint(df.copy())
+    assert dataset_fingerprint(df) != dataset_fingerprint(df.assign(tags=[[1], [1, 2], {}, None]))
+
+
+def test_concurrent_sessions_share_one_stats_object():
+    df = pd.DataFrame({'a': range(1000)})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_dataset_stats(df, 'concurrent-test')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(stats) for stats in results}) == 1
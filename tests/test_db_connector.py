@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from modules.db_connector import DBHandler, get_pool
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBHandler(tmp_path / 'pool.db')
+    yield db
+    db.pool.close()
+
+
+def _in_thread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_handlers_share_one_pool_per_file(db, tmp_path):
+    other = DBHandler(tmp_path / 'pool.db')
+    assert other.pool is db.pool is get_pool(tmp_path / '.' / 'pool.db')
+    mode = db.execute_query("PRAGMA journal_mode", fetch=True)[0][0]
+    assert mode == 'wal'
+
+
+def test_each_thread_reads_on_its_own_connection(db):
+    mine = db.pool.reader()
+    assert db.pool.reader() is mine
+    theirs = _in_thread(db.pool.reader)
+    assert theirs is not mine
+    # Connections of finished threads are closed when a new reader opens
+    _in_thread(db.pool.reader)
+    assert db.pool_metrics()['reader_connections'] == 2
+
+
+def test_concurrent_writers_are_serialized(db):
+    errors = []
+
+    def register(worker):
+        try:
+            for i in range(25):
+                db.create_user(f"user{worker}-{i}@example.com", 'x')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=register, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert db.execute_query("SELECT COUNT(*) FROM users", fetch=True)[0][0] == 200
+    metrics = db.pool_metrics()
+    assert metrics['writes'] >= 200 and metrics['write_errors'] == 0
+    assert not metrics['writer_busy']
+
+
+def test_readers_see_committed_writes(db):
+    user_id = db.create_user('a@b.c', 'x')
+    found = _in_thread(lambda: db.get_user_by_email('a@b.c'))
+    assert found['user_id'] == user_id
+
+
+def test_failed_write_rolls_back(db):
+    with pytest.raises(RuntimeError):
+        with db.pool.writer() as conn:
+            conn.execute("INSERT INTO users (email, password_hash) VALUES ('gone@b.c', 'x')")
+            raise RuntimeError("abort")
+    assert db.get_user_by_email('gone@b.c') is None
+    assert db.pool_metrics()['write_errors'] == 1
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.export import _excel_value, write_csv, write_excel
+
+
+def _frame():
+    return pd.DataFrame({
+        'count': pd.array([1, None, 3], dtype='Int64'),
+        'name': pd.array(['a', None, 'c'], dtype='string'),
+        'when': pd.to_datetime(['2024-01-01', None, '2024-01-03']),
+        'score': [1.5, np.nan, 2.5],
+    })
+
+
+def test_excel_values_turn_gaps_into_empty_cells():
+    for row in _frame().itertuples(index=False, name=None):
+        values = [_excel_value(value) for value in row]
+        if row[0] is pd.NA:
+            assert values == [None, None, None, None]
+        else:
+            assert all(value is not None for value in values)
+    assert _excel_value(np.int64(3)) == 3 and type(_excel_value(np.int64(3))) is int
+    assert _excel_value([1, 2]) == [1, 2]
+
+
+def test_write_excel_with_nullable_columns(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    path = write_excel(_frame(), tmp_path / 'out.xlsx')
+    rows = list(openpyxl.load_workbook(path).active.values)
+    assert rows[0] == ('count', 'name', 'when', 'score')
+    assert rows[2] == (None, None, None, None)
+    assert rows[1][:2] == (1, 'a')
+
+
+def test_write_csv_with_nullable_columns(tmp_path):
+    path = write_csv(_frame(), tmp_path / 'out.csv', chunk_rows=2)
+    back = pd.read_csv(path)
+    assert back['count'].isna().tolist() == [False, True, False]
+    assert back['name'].tolist()[::2] == ['a', 'c']
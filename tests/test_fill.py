@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+
+from modules.cleaner import DataCleaner
+from modules import fill
+
+
+def test_complete_columns_get_no_fill_value(monkeypatch):
+    df = pd.DataFrame({'a': [1.0, np.nan, 3.0], 'name': ['x', 'y', 'z']})
+    resolved = []
+    real = fill._resolve_strategy
+    monkeypatch.setattr(fill, '_resolve_strategy',
+                        lambda series, strategy: resolved.append(series.name) or real(series, strategy))
+    # A mean of the text column would fail, but it has nothing to fill
+    cleaner = DataCleaner(df).fill_missing({'a': 'mean', 'name': 'mean'})
+    assert resolved == ['a']
+    assert cleaner.df['a'].tolist() == [1.0, 2.0, 3.0]
+    assert cleaner.get_changes_log() == ["Filled missing values in a with mean: 2.00"]
@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+import pytest
+
+from modules.db_connector import DBHandler
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBHandler(tmp_path / 'history.db')
+    user_id = db.create_user('a@b.c', 'x')
+    other = db.create_user('d@e.f', 'x')
+    with db.pool.writer() as conn:
+        # Several records share a timestamp, so the cursor needs the id too
+        conn.executemany(
+            "INSERT INTO file_history (user_id, original_shape, cleaned_shape, cleaning_instructions,"
+            " cleaned_file_path, original_rows, original_cols, created_at) VALUES (?, ?, '', '', ?, ?, ?, ?)",
+            [(user_id, f"({rows}, {cols})", f"f{i}", rows, cols, f"2024-01-{1 + i // 3:02d} 12:00:00")
+             for i, (rows, cols) in enumerate((100 * (i + 1), i % 4 + 1) for i in range(25))]
+            + [(other, "(1, 1)", "other", 1, 1, "2024-01-05 12:00:00")]
+        )
+    db.user_id = user_id
+    yield db
+    db.pool.close()
+
+
+def _all_pages(db, **filters):
+    pages, cursor = [], None
+    while True:
+        page = db.get_history_page(db.user_id, limit=4, cursor=cursor, **filters)
+        pages.append(page['records'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_record_once_newest_first(db):
+    pages = _all_pages(db)
+    records = [record for page in pages for record in page]
+    assert all(len(page) == 4 for page in pages[:-1]) and len(pages[-1]) == 1
+    assert [record['file_path'] for record in records] == [f"f{i}" for i in reversed(range(25))]
+    assert {record['user_id'] for record in records} == {db.user_id}
+
+
+def test_filters_apply_to_every_page(db):
+    records = [r for page in _all_pages(db, min_rows=500, max_cols=2) for r in page]
+    expected = [f"f{i}" for i in reversed(range(25)) if 100 * (i + 1) >= 500 and i % 4 + 1 <= 2]
+    assert [record['file_path'] for record in records] == expected
+
+
+def test_date_range_includes_the_whole_last_day(db):
+    records = [r for page in _all_pages(db, date_from='2024-01-02', date_to=date(2024, 1, 3)) for r in page]
+    assert [record['file_path'] for record in records] == ['f8', 'f7', 'f6', 'f5', 'f4', 'f3']
+    assert db.get_history_page(db.user_id, date_to=date(2024, 1, 1) - timedelta(days=1))['records'] == []
+
+
+def test_recent_history_is_the_first_page(db):
+    assert [r['file_path'] for r in db.get_user_history(db.user_id)] == [f"f{i}" for i in range(24, 14, -1)]
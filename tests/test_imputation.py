@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from modules.imputation import KNNImputationEngine
+from modules.ml_cleaner import MLCleaner
+
+
+def sparse_frame(rows=400, seed=3):
+    """a = 2 * b and c = b + 10, with every row missing one of the three"""
+    rng = np.random.default_rng(seed)
+    b = rng.uniform(0, 100, rows)
+    df = pd.DataFrame({'a': 2 * b, 'b': b, 'c': b + 10})
+    for i in range(rows):
+        df.iat[i, i % 3] = np.nan
+    return df
+
+
+def test_rows_without_complete_donors_are_imputed():
+    df = sparse_frame()
+    assert not df.notna().all(axis=1).any()
+    cleaner = MLCleaner(df, copy=True)
+    cleaner.smart_impute(n_jobs=1)
+    assert not cleaner.df.isna().any().any()
+    assert cleaner.get_changes_log() == [f"Imputed {df.isna().sum().sum()} missing values in 3 columns with KNN"]
+
+
+def test_neighbors_come_from_rows_sharing_the_features():
+    df = sparse_frame()
+    imputed = KNNImputationEngine(n_neighbors=3, n_jobs=1).impute(df, ['a', 'b', 'c'])
+    positions, values = imputed['a']
+    expected = 2 * df['c'].to_numpy()[positions] - 20
+    # Neighbors are close in b or c, so their mean a is close to the truth
+    # (a spans 0-200; the column mean would be off by 50 on average)
+    errors = np.abs(values - expected)
+    assert errors.mean() < 3 and errors.max() < 10
+
+
+def test_donors_per_column_within_block():
+    df = pd.DataFrame({
+        'group': ['x'] * 6 + ['y'] * 6,
+        'v': [1.0, 1.0, 1.0, np.nan, 1.0, 1.0, 9.0, 9.0, np.nan, 9.0, 9.0, 9.0],
+        'w': [np.nan, 2.0, 3.0, 4.0, 5.0, 6.0, 1.0, 2.0, 3.0, np.nan, 5.0, 6.0],
+    })
+    imputed = KNNImputationEngine(n_neighbors=2, block_key='group', n_jobs=1).impute(df, ['v', 'w'])
+    positions, values = imputed['v']
+    assert dict(zip(positions, values)) == {3: 1.0, 8: 9.0}
+
+
+def test_categorical_gaps_take_neighbor_majority():
+    df = pd.DataFrame({
+        'x': [0.0, 0.1, 0.2, 10.0, 10.1, 10.2, 0.05, 10.05],
+        'label': ['low', 'low', 'low', 'high', 'high', 'high', None, None],
+    })
+    imputed = KNNImputationEngine(n_neighbors=3, n_jobs=1).impute(df, ['x'], ['label'])
+    positions, values = imputed['label']
+    assert dict(zip(positions, values)) == {6: 'low', 7: 'high'}
+
+
+def test_nothing_to_impute_logs_nothing():
+    cleaner = MLCleaner(pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]}))
+    cleaner.smart_impute(n_jobs=1)
+    assert cleaner.get_changes_log() == []
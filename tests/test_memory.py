@@ -0,0 +1,38 @@
+import tracemalloc
+import numpy as np
+import pandas as pd
+from modules.cleaner import DataCleaner
+from modules.memory import track_allocations
+
+
+def test_nested_block_keeps_the_outer_peak():
+    with track_allocations() as outer:
+        data = bytearray(20_000_000)
+        del data
+        with track_allocations() as inner:
+            data = bytearray(1_000_000)
+            del data
+    assert inner['peak_bytes'] < 2_000_000
+    assert outer['peak_bytes'] >= 20_000_000
+
+
+def test_foreign_tracer_peak_is_not_reset():
+    tracemalloc.start()
+    try:
+        data = bytearray(20_000_000)
+        del data
+        with track_allocations():
+            pass
+        assert tracemalloc.get_traced_memory()[1] >= 20_000_000
+    finally:
+        tracemalloc.stop()
+
+
+def test_lazy_fills_are_profiled_as_fill_missing():
+    df = pd.DataFrame({'a': [1.0, np.nan, 3.0], 'b': ['x', None, 'x']})
+    cleaner = DataCleaner(df, lazy=True, profile={'fill_missing'}, track_memory=True)
+    cleaner.fill_missing(['a', 'b']).remove_duplicates()
+    cleaner.df
+    metrics = cleaner.get_metrics()
+    assert [record['operation'] for record in metrics] == ['fill_missing']
+    assert metrics[0]['peak_bytes'] is not None
@@ -0,0 +1,71 @@
+import sqlite3
+
+from modules import migrations
+from modules.migrations import MIGRATIONS, migrate, parse_shape, schema_version
+
+
+def _plan(conn, query, params=()):
+    return ' '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+
+def test_fresh_database_reaches_the_latest_version(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'db.sqlite', isolation_level=None)
+    assert migrate(conn) == MIGRATIONS[-1][0]
+    # Applying again is a no-op
+    assert migrate(conn) == MIGRATIONS[-1][0]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'users', 'file_history', 'cleaning_operations', 'user_sessions'} <= tables
+
+
+def test_upgrade_backfills_shapes(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / 'db.sqlite', isolation_level=None)
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS[:1])
+    assert migrate(conn) == 1
+    conn.execute("INSERT INTO users (email, password_hash) VALUES ('a@b.c', 'x')")
+    conn.executemany(
+        "INSERT INTO file_history (user_id, original_shape, cleaned_shape, cleaning_instructions, cleaned_file_path)"
+        " VALUES (1, ?, ?, '', '')",
+        [('(100, 5)', '(90, 4)'), ('garbled', '(1, 1)')]
+    )
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS)
+    assert migrate(conn) == MIGRATIONS[-1][0]
+    rows = conn.execute("SELECT original_rows, original_cols, cleaned_rows, cleaned_cols FROM file_history "
+                        "ORDER BY id").fetchall()
+    assert rows == [(100, 5, 90, 4), (None, None, 1, 1)]
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / 'db.sqlite', isolation_level=None)
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (x INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS[:1] + [(2, "broken", broken)])
+    try:
+        migrate(conn)
+    except RuntimeError:
+        pass
+    assert schema_version(conn) == 1
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+
+
+def test_history_queries_use_covering_indexes(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'db.sqlite', isolation_level=None)
+    migrate(conn)
+    listing = _plan(conn, """
+        SELECT id, user_id, original_shape, cleaned_shape, cleaning_instructions, cleaned_file_path, created_at
+        FROM file_history
+        WHERE user_id = ? AND (created_at, id) < (?, ?) AND original_rows >= ? AND original_cols <= ?
+        ORDER BY created_at DESC, id DESC LIMIT ?""", (1, '2024-01-01', 5, 10, 3, 20))
+    assert 'COVERING INDEX' in listing and 'TEMP B-TREE' not in listing
+    operations = _plan(conn, """
+        SELECT step, operation_type, operation_details, operation_hash
+        FROM cleaning_operations WHERE history_id = ? ORDER BY step""", (1,))
+    assert 'COVERING INDEX' in operations and 'TEMP B-TREE' not in operations
+
+
+def test_parse_shape():
+    assert parse_shape('(1000, 12)') == (1000, 12)
+    assert parse_shape(' 3,4 ') == (3, 4)
+    assert parse_shape('n/a') == (None, None)
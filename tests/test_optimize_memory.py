@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from modules.cleaner import DataCleaner
+
+
+def test_signed_integers_stay_signed():
+    df = pd.DataFrame({
+        'age': np.array([10, 20, 30], dtype=np.int64),
+        'count': pd.array([1, None, 3], dtype='Int64'),
+        'size': np.array([1, 2, 300], dtype=np.uint64),
+    })
+    out = DataCleaner(df).optimize_memory().df
+    assert out['age'].dtype == np.int8
+    assert (out['age'] - 50).tolist() == [-40, -30, -20]
+    assert out['count'].dtype == 'Int8'
+    assert out['size'].dtype == np.uint16
+
+
+def test_floats_narrow_only_when_lossless():
+    df = pd.DataFrame({'exact': [0.5, 1.25, 2.0], 'precise': [0.1, 0.2, 0.3]})
+    out = DataCleaner(df).optimize_memory().df
+    assert out['exact'].dtype == np.float32
+    assert out['precise'].dtype == np.float64
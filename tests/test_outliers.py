@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from modules import outliers
+from modules.outliers import clear_cache, outlier_scores
+
+
+def _frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'a': rng.normal(size=rows), 'b': rng.normal(size=rows)})
+
+
+def test_scores_are_cached_and_reused():
+    clear_cache()
+    df = _frame(500)
+    first = outlier_scores(df, ['a', 'b'])
+    again = outlier_scores(df, ['a', 'b'], n_jobs=1)
+    pd.testing.assert_series_equal(first, again)
+    assert len(outliers._cache) == 1
+
+
+def test_cache_is_capped_by_score_bytes(monkeypatch):
+    clear_cache()
+    monkeypatch.setattr(outliers, 'MAX_CACHED_SCORE_BYTES', 1000 * 8 * 2)
+    for seed in range(4):
+        outlier_scores(_frame(1000, seed), ['a', 'b'])
+    assert len(outliers._cache) == 2
+    # Too large to cache at all
+    outlier_scores(_frame(5000), ['a', 'b'])
+    assert len(outliers._cache) == 2
+    clear_cache()
+
+
+def test_concurrent_callers():
+    clear_cache()
+    frames = [_frame(300, seed) for seed in range(6)]
+    errors = []
+
+    def score(df):
+        try:
+            outlier_scores(df, ['a', 'b'])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=score, args=(df,)) for df in frames * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(outliers._cache) == 6
+    clear_cache()
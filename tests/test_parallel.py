@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.parallel import ColumnExecutor
+
+
+def _frame():
+    return pd.DataFrame({
+        'a': np.arange(1000, dtype=np.int64),
+        'b': np.linspace(0, 1, 1000),
+        'c': ['x', 'y'] * 500,
+    })
+
+
+def _fail(series):
+    raise ValueError("bad column")
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_map_reports_failing_columns(n_jobs):
+    executor = ColumnExecutor(n_jobs=n_jobs, min_rows=0)
+    df = _frame()
+    results, errors = executor.map(df, {'a': lambda s: s * 2, 'c': _fail, 'b': lambda s: s + 1})
+    assert set(results) == {'a', 'b'}
+    assert list(errors) == ['c'] and isinstance(errors['c'], ValueError)
+    pd.testing.assert_series_equal(results['a'], df['a'] * 2)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_apply_swaps_only_converted_columns(n_jobs):
+    executor = ColumnExecutor(n_jobs=n_jobs, min_rows=0)
+    df = _frame()
+    out, errors = executor.apply(df, {'a': lambda s: s.astype('float64'), 'c': _fail})
+    assert list(errors) == ['c']
+    assert out['a'].dtype == np.float64
+    # The input is unchanged and untouched columns are shared, not copied
+    assert df['a'].dtype == np.int64
+    assert np.shares_memory(out['b'].to_numpy(), df['b'].to_numpy())
+    pd.testing.assert_series_equal(out['c'], df['c'])
+
+
+def test_apply_without_results_returns_the_input():
+    df = _frame()
+    out, errors = ColumnExecutor(n_jobs=2, min_rows=0).apply(df, {'a': _fail, 'b': _fail})
+    assert out is df
+    assert set(errors) == {'a', 'b'}
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from modules.db_connector import DBHandler
+from modules.persistence import FAILED, SAVED, PersistenceQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBHandler(tmp_path / 'persist.db')
+    db.user_id = db.create_user('a@b.c', 'x')
+    yield db
+    db.pool.close()
+
+
+def _history(db):
+    rows = db.execute_query("SELECT cleaned_file_path, cleaned_shape FROM file_history ORDER BY id", fetch=True)
+    return [tuple(row) for row in rows]
+
+
+def _journal(journal_dir, job_id, path, written):
+    job = {'job_id': job_id, 'user_id': 1, 'original_shape': '(3, 1)', 'cleaned_shape': '(2, 1)',
+           'cleaning_notes': 'notes', 'cleaned_file_path': str(path), 'operations': [],
+           'written': written}
+    with open(os.path.join(journal_dir, f"{job_id}.json"), 'w') as f:
+        json.dump(job, f)
+
+
+def test_submitted_results_are_written_and_recorded(db, tmp_path):
+    journal = tmp_path / 'pending'
+    queue = PersistenceQueue(db, journal_dir=str(journal))
+    operations = [{'step': 1, 'operation': 'drop_columns', 'params': {'columns_to_drop': ['b']}, 'hash': 'h'}]
+    job_ids = [queue.submit(pd.DataFrame({'a': range(i + 1)}), db.user_id, '(9, 2)', 'notes',
+                            str(tmp_path / f"out{i}.csv"), operations=operations) for i in range(5)]
+    assert queue.wait(timeout=10)
+    assert [queue.status(job_id)['state'] for job_id in job_ids] == [SAVED] * 5
+    assert sorted(_history(db)) == [(str(tmp_path / f"out{i}.csv"), f"({i + 1}, 1)") for i in range(5)]
+    assert pd.read_csv(tmp_path / 'out4.csv')['a'].tolist() == list(range(5))
+    history_id = db.get_history_page(db.user_id)['records'][0]['id']
+    assert [op['operation'] for op in db.get_operations(history_id)] == ['drop_columns']
+    assert os.listdir(journal) == []
+
+
+def test_failed_write_is_reported_and_not_recorded(db, tmp_path):
+    queue = PersistenceQueue(db, journal_dir=str(tmp_path / 'pending'))
+    job_id = queue.submit(pd.DataFrame({'a': [1]}), db.user_id, '(1, 1)', '', str(tmp_path / 'missing' / 'out.csv'))
+    assert queue.wait(timeout=10)
+    assert queue.status(job_id)['state'] == FAILED
+    assert _history(db) == []
+    assert os.listdir(tmp_path / 'pending') == []
+
+
+def test_recover_replays_written_jobs_and_fails_the_rest(db, tmp_path):
+    journal = tmp_path / 'pending'
+    journal.mkdir()
+    done = tmp_path / 'done.csv'
+    done.write_text('a\n1\n2\n')
+    interrupted = tmp_path / 'interrupted.csv'
+    (tmp_path / 'interrupted.partial.csv').write_text('a\n1\n')
+    _journal(journal, 'done', done, written=True)
+    _journal(journal, 'interrupted', interrupted, written=False)
+    (journal / 'torn.json').write_text('{"job_id": ')
+
+    queue = PersistenceQueue(db, journal_dir=str(journal))
+    assert queue.status('done')['state'] == SAVED
+    assert queue.status('interrupted')['state'] == FAILED
+    assert _history(db) == [(str(done), '(2, 1)')]
+    assert not (tmp_path / 'interrupted.partial.csv').exists()
+    # Only the unreadable entry is left, for inspection
+    assert os.listdir(journal) == ['torn.json']
+
+
+def test_journal_is_kept_until_the_history_row_is_stored(db, tmp_path, monkeypatch):
+    journal = tmp_path / 'pending'
+    journal.mkdir()
+    done = tmp_path / 'done.csv'
+    done.write_text('a\n1\n')
+    _journal(journal, 'done', done, written=True)
+
+    monkeypatch.setattr(db, 'save_cleaning_history_batch', lambda records: False)
+    PersistenceQueue(db, journal_dir=str(journal))
+    assert os.listdir(journal) == ['done.json']
+    assert _history(db) == []
+
+    monkeypatch.undo()
+    queue = PersistenceQueue(db, journal_dir=str(journal))
+    assert queue.status('done')['state'] == SAVED
+    assert _history(db) == [(str(done), '(2, 1)')]
+    assert os.listdir(journal) == []
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from modules import profiler
+from modules.profiler import get_column_profile, get_profile, profile_column
+
+
+def test_unhashable_values_are_profiled_by_their_text():
+    series = pd.Series([[1, 2], [1, 2], {'a': 1}, None], name='tags')
+    profile = profile_column(series)
+    assert profile['missing'] == 1
+    assert profile['distinct'] == 2
+    assert profile['top_values'][0] == ([1, 2], 2)
+
+
+def test_column_profile_is_cached():
+    df = pd.DataFrame({'a': range(100), 'b': list('xy') * 50})
+    first = get_column_profile(df, 'b', fingerprint='column-cache-test')
+    assert get_column_profile(df, 'b', fingerprint='column-cache-test') is first
+    assert first['distinct'] == 2
+
+
+def test_column_profile_comes_from_the_full_report():
+    df = pd.DataFrame({'a': range(100), 'b': list('xy') * 50})
+    report = get_profile(df, fingerprint='report-cache-test')
+    assert get_column_profile(df, 'a', fingerprint='report-cache-test') is report.columns['a']
+    assert ('report-cache-test', 'a', ()) not in profiler._column_cache
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+from modules.cleaner import DataCleaner
+from modules.streaming import StreamingCleaner
+
+
+def test_matches_in_memory_cleaning(tmp_path):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'a': rng.integers(0, 4, 1000).astype(float), 'b': rng.choice(['x', 'y'], 1000)})
+    df.loc[::9, 'a'] = np.nan
+    df.to_csv(tmp_path / 'in.csv', index=False)
+
+    streaming = StreamingCleaner(tmp_path / 'in.csv', chunksize=128, spill_dir=tmp_path)
+    streaming.fill_missing('a').remove_duplicates().run(tmp_path / 'out.csv')
+    eager = DataCleaner(pd.read_csv(tmp_path / 'in.csv')).fill_missing('a').remove_duplicates()
+
+    tm.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'), eager.df.reset_index(drop=True))
+
+
+def test_header_only_input_keeps_cleaned_header(tmp_path):
+    (tmp_path / 'in.csv').write_text('a,b,c\n')
+    streaming = StreamingCleaner(tmp_path / 'in.csv', spill_dir=tmp_path)
+    result = streaming.drop_columns('b').fill_missing('a').run(tmp_path / 'out.csv')
+    assert (tmp_path / 'out.csv').read_text().strip() == 'a,c'
+    assert result['rows_out'] == 0
+
+
+def test_empty_input_writes_empty_output(tmp_path):
+    (tmp_path / 'in.csv').write_text('')
+    StreamingCleaner(tmp_path / 'in.csv').remove_duplicates().run(tmp_path / 'out.csv')
+    assert (tmp_path / 'out.csv').read_text() == ''
+
+
+def test_auto_fill_uses_the_whole_column_type(tmp_path):
+    # The first chunk reads as numbers, a later one as text, so the
+    # column is text and takes the mode like in memory
+    values = ['1', '1', '2', None] + ['b', 'b', 'b', None]
+    pd.DataFrame({'a': values}).to_csv(tmp_path / 'in.csv', index=False)
+    streaming = StreamingCleaner(tmp_path / 'in.csv', chunksize=4)
+    streaming.fill_missing('a').run(tmp_path / 'out.csv')
+    assert pd.read_csv(tmp_path / 'out.csv', dtype=str)['a'].tolist()[3::4] == ['b', 'b']
+
+
+def test_all_missing_column_is_left_alone(tmp_path):
+    pd.DataFrame({'a': [1, 2], 'b': [None, None]}).to_csv(tmp_path / 'in.csv', index=False)
+    streaming = StreamingCleaner(tmp_path / 'in.csv')
+    streaming.fill_missing('b', 'mode').run(tmp_path / 'out.csv')
+    assert pd.read_csv(tmp_path / 'out.csv')['b'].isna().all()
+    assert streaming.get_changes_log() == []
+
+
+def test_mode_ties_across_mixed_types_go_to_the_first_value(tmp_path):
+    # The first chunk reads as integers and the second as text, so the
+    # tied values 7 and 'b' have different types
+    values = ['7', '7', 'b', None, 'b', None]
+    pd.DataFrame({'a': values}).to_csv(tmp_path / 'in.csv', index=False)
+    streaming = StreamingCleaner(tmp_path / 'in.csv', chunksize=2)
+    streaming.fill_missing('a', 'mode').run(tmp_path / 'out.csv')
+    assert pd.read_csv(tmp_path / 'out.csv', dtype=str)['a'].tolist() == ['7', '7', 'b', '7', 'b', '7']
+    assert streaming.get_changes_log() == ["Filled missing values in a with mode: 7"]
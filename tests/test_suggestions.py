@@ -0,0 +1,26 @@
+import pandas as pd
+
+from modules.suggestions import SuggestionEngine
+
+
+def _frame():
+    return pd.DataFrame({
+        'tags': [[1, 2], [1, 2], {'a': 1}, None] * 10,
+        'code': ['1', '2', '3', '4'] * 10,
+    })
+
+
+def test_unhashable_values_are_profiled():
+    profile = SuggestionEngine().profile(_frame())
+    assert profile['columns']['tags']['nulls'] == 10
+    assert profile['columns']['tags']['distinct'] == 2
+    assert profile['columns']['tags']['type_hint'] is None
+    assert profile['columns']['code']['type_hint'] == 'numeric'
+    assert profile['duplicates'] == 36
+
+
+def test_unhashable_values_on_a_sample():
+    engine = SuggestionEngine(sample_threshold=10, sample_size=20)
+    suggestions = engine.suggest(_frame())
+    assert [s['action'] for s in suggestions if s['action'] == 'convert_types']
+    assert all('tags' not in s.get('types', {}) for s in suggestions)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+from modules.memory import frame_nbytes
+from modules.upload_cache import ParsedDatasetCache
+
+
+def frame(seed, rows=1000):
+    return pd.DataFrame({'a': np.random.default_rng(seed).normal(size=rows)})
+
+
+def test_spill_files_survive_a_restart(tmp_path):
+    size = frame_nbytes(frame(0))
+    cache = ParsedDatasetCache(max_bytes=size, spill_dir=tmp_path)
+    cache.put('first', frame(0))
+    cache.put('second', frame(1))  # evicts 'first' to disk
+
+    restarted = ParsedDatasetCache(max_bytes=size, spill_dir=tmp_path)
+    tm.assert_frame_equal(restarted.get('first'), frame(0))
+
+
+def test_adopted_spill_files_count_against_the_quota(tmp_path):
+    for seed in range(3):
+        frame(seed).to_pickle(tmp_path / f"key{seed}.pkl")
+    (tmp_path / "key9.pkl.123.partial").write_bytes(b"truncated")
+    one_file = (tmp_path / "key0.pkl").stat().st_size
+    ParsedDatasetCache(spill_dir=tmp_path, max_spill_bytes=2 * one_file)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_frames_over_max_bytes_are_not_cached(tmp_path):
+    cache = ParsedDatasetCache(max_bytes=100, spill_dir=tmp_path)
+    cache.put('big', frame(0))
+    assert cache.get('big') is None
+    assert list(tmp_path.iterdir()) == []